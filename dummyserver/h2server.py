@@ -0,0 +1,132 @@
+"""
+HTTP/2 server used for testing :mod:`urllib3.contrib.http2`, on top of
+:class:`dummyserver.server.SocketServerThread`.
+"""
+from __future__ import print_function
+
+import select
+import socket
+import ssl
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+
+from dummyserver.server import DEFAULT_CERTS
+
+
+def h2_socket_handler(app, num=1, certs=DEFAULT_CERTS, alpn_protocols=('h2',)):
+    """
+    Return a socket handler serving ``num`` TLS connections, one after the
+    other, speaking HTTP/2 on those where it was negotiated with ALPN.
+
+    :param app:
+        Callable taking the headers and body of a request and returning the
+        status, headers and body of its response. It's called on a thread
+        of its own for every request, so that it may block without holding
+        up the other streams of the connection.
+
+    :param alpn_protocols:
+        The protocols the server supports. If ``h2`` isn't negotiated, the
+        requests are answered with HTTP/1.1 and ``Connection: close``, with
+        the headers passed to ``app`` being the request line and headers.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    context.load_cert_chain(certs['certfile'], certs['keyfile'])
+    # TLS 1.3 session tickets make idle connections look dropped to
+    # urllib3.util.connection.is_connection_dropped.
+    context.options |= getattr(ssl, 'OP_NO_TLSv1_3', 0)
+    context.set_alpn_protocols(list(alpn_protocols))
+
+    def socket_handler(listener):
+        for _ in range(num):
+            sock = context.wrap_socket(listener.accept()[0], server_side=True)
+            if sock.selected_alpn_protocol() == 'h2':
+                _serve_h2(sock, app)
+            else:
+                _serve_http11(sock, app)
+            sock.close()
+
+    return socket_handler
+
+
+def _serve_http11(sock, app):
+    head = b''
+    while b'\r\n\r\n' not in head:
+        try:
+            data = sock.recv(65536)
+        except socket.error:
+            return
+        if not data:
+            return
+        head += data
+    status, headers, body = app(head.split(b'\r\n\r\n')[0].split(b'\r\n'), b'')
+    lines = ['HTTP/1.1 %d OK' % status, 'Connection: close',
+             'Content-Length: %d' % len(body)]
+    lines.extend('%s: %s' % header for header in headers)
+    sock.sendall('\r\n'.join(lines).encode('latin-1') + b'\r\n\r\n' + body)
+
+
+def _serve_h2(sock, app):
+    config = h2.config.H2Configuration(client_side=False,
+                                       header_encoding='utf-8')
+    conn = h2.connection.H2Connection(config=config)
+    lock = threading.Lock()
+    requests = {}
+    workers = []
+
+    def respond(stream_id, headers, body):
+        status, response_headers, response_body = app(headers, body)
+        fields = [(':status', str(status))]
+        fields.extend(response_headers)
+        fields.append(('content-length', str(len(response_body))))
+        with lock:
+            try:
+                conn.send_headers(stream_id, fields)
+                conn.send_data(stream_id, response_body, end_stream=True)
+                sock.sendall(conn.data_to_send())
+            except Exception:
+                # The stream or the connection was closed in the meantime.
+                pass
+
+    with lock:
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+
+    while True:
+        # The workers write to the socket as we read from it, which a TLS
+        # connection only allows one at a time.
+        if not sock.pending():
+            select.select([sock], [], [], 0.1)
+        with lock:
+            if not sock.pending() and not select.select([sock], [], [], 0)[0]:
+                continue
+            try:
+                data = sock.recv(65536)
+            except socket.error:
+                break
+            if not data:
+                break
+
+            events = conn.receive_data(data)
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    requests[event.stream_id] = (event.headers, [])
+                elif isinstance(event, h2.events.DataReceived):
+                    requests[event.stream_id][1].append(event.data)
+                    conn.acknowledge_received_data(event.flow_controlled_length,
+                                                   event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    headers, body = requests.pop(event.stream_id)
+                    worker = threading.Thread(target=respond, args=(
+                        event.stream_id, headers, b''.join(body)))
+                    worker.daemon = True
+                    worker.start()
+                    workers.append(worker)
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    break
+            sock.sendall(conn.data_to_send())
+
+    for worker in workers:
+        worker.join(5)
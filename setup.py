@@ -70,6 +70,9 @@ setup(name='urllib3',
           ],
           'socks': [
               'PySocks>=1.5.6,<2.0,!=1.5.7',
-          ]
+          ],
+          'http2': [
+              'h2>=3.0.0',
+          ],
       },
       )
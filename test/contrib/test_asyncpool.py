@@ -0,0 +1,203 @@
+import socket
+import threading
+
+import pytest
+
+from dummyserver.testcase import (HTTPDummyServerTestCase,
+                                  SocketDummyServerTestCase, consume_socket)
+from urllib3.exceptions import (EmptyPoolError, HostChangedError, MaxRetryError,
+                                NewConnectionError, ReadTimeoutError)
+from urllib3.util.retry import Retry
+from urllib3.util.timeout import Timeout
+
+asyncio = pytest.importorskip('asyncio')
+
+from urllib3.contrib.asyncpool import (  # noqa: E402
+    AsyncHTTPConnectionPool, AsyncPoolManager,
+)
+
+
+class AsyncTestCase(object):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+
+    def run_coroutine(self, coro):
+        return self.loop.run_until_complete(coro)
+
+
+class TestAsyncPoolManager(AsyncTestCase, HTTPDummyServerTestCase):
+
+    def setUp(self):
+        super(TestAsyncPoolManager, self).setUp()
+        self.base_url = 'http://%s:%d' % (self.host, self.port)
+        self.base_url_alt = 'http://%s:%d' % (self.host_alt, self.port)
+
+    def test_request(self):
+        with AsyncPoolManager() as http:
+            r = self.run_coroutine(http.request('GET', '%s/echo' % self.base_url,
+                                                fields={'foo': 'bar'}))
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.data, b'foo=bar')
+
+            r = self.run_coroutine(http.request('POST', '%s/echo' % self.base_url,
+                                                fields={'foo': 'bar'},
+                                                encode_multipart=False))
+            self.assertEqual(r.data, b'foo=bar')
+
+    def test_chunked_response(self):
+        with AsyncPoolManager() as http:
+            r = self.run_coroutine(http.request('GET', '%s/chunked' % self.base_url))
+            self.assertEqual(r.data, b'123' * 4)
+
+    def test_concurrent_requests(self):
+        with AsyncPoolManager(maxsize=3, block=True) as http:
+            requests = [http.request('GET', '%s/echo?i=%d' % (self.base_url, i))
+                        for i in range(20)]
+            responses = self.run_coroutine(asyncio.gather(*requests))
+            self.assertEqual([r.data for r in responses],
+                             [('i=%d' % i).encode('ascii') for i in range(20)])
+
+            pool = http.connection_from_url(self.base_url)
+            self.assertTrue(pool.num_connections <= 3)
+
+    def test_keepalive(self):
+        with AsyncPoolManager() as http:
+            for _ in range(3):
+                r = self.run_coroutine(http.request('GET', '%s/keepalive' % self.base_url))
+                self.assertEqual(r.data, b'Keeping alive')
+            pool = http.connection_from_url(self.base_url)
+            self.assertEqual(pool.num_connections, 1)
+            self.assertEqual(pool.num_requests, 3)
+
+    def test_redirect(self):
+        with AsyncPoolManager() as http:
+            r = self.run_coroutine(http.request(
+                'GET', '%s/redirect' % self.base_url,
+                fields={'target': '%s/echo?a=b' % self.base_url_alt}))
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.data, b'a=b')
+
+            r = self.run_coroutine(http.request(
+                'GET', '%s/redirect' % self.base_url,
+                fields={'target': '/'}, redirect=False))
+            self.assertEqual(r.status, 303)
+
+            with pytest.raises(MaxRetryError):
+                self.run_coroutine(http.request(
+                    'GET', '%s/redirect' % self.base_url,
+                    fields={'target': '/'}, retries=Retry(redirect=0)))
+
+    def test_retry_on_status(self):
+        retries = Retry(total=1, status_forcelist=[418])
+        with AsyncPoolManager(retries=retries) as http:
+            r = self.run_coroutine(http.request(
+                'GET', '%s/successful_retry' % self.base_url,
+                headers={'test-name': 'asyncpool'}))
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.retries.total, 0)
+
+    def test_request_many(self):
+        with AsyncPoolManager() as http:
+            self.assertRaises(NotImplementedError, http.request_many, [])
+
+
+class TestAsyncHTTPConnectionPool(AsyncTestCase, HTTPDummyServerTestCase):
+
+    def test_host_changed(self):
+        with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+            with pytest.raises(HostChangedError):
+                self.run_coroutine(pool.urlopen('GET', 'http://example.com/'))
+
+            r = self.run_coroutine(pool.urlopen('GET', '/echo?a=b'))
+            self.assertEqual(r.data, b'a=b')
+
+    def test_empty_pool(self):
+        with AsyncHTTPConnectionPool(self.host, self.port, maxsize=1, block=True) as pool:
+            # Hold the only connection
+            self.run_coroutine(pool._get_conn())
+            with pytest.raises(EmptyPoolError):
+                self.run_coroutine(pool.urlopen('GET', '/', pool_timeout=0.01))
+
+    def test_release_conn_and_chunked(self):
+        with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+            r = self.run_coroutine(pool.urlopen('GET', '/echo?a=b', release_conn=False))
+            self.assertEqual(r.data, b'a=b')
+            self.assertEqual(pool.num_requests, 1)
+
+            with pytest.raises(NotImplementedError):
+                self.run_coroutine(pool.urlopen('POST', '/echo', body=[b'a'],
+                                                chunked=True))
+            self.assertEqual(pool.num_requests, 1)
+
+    def test_connection_refused(self):
+        # Find a port nothing listens on
+        sock = socket.socket()
+        sock.bind(('localhost', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        with AsyncHTTPConnectionPool('localhost', port) as pool:
+            with pytest.raises(MaxRetryError) as e:
+                self.run_coroutine(pool.urlopen('GET', '/', retries=1))
+            self.assertTrue(isinstance(e.value.reason, NewConnectionError))
+
+            # The failed attempts gave their slots back
+            self.assertEqual(pool.pool.qsize(), 1)
+
+
+class TestAsyncSocketLevel(AsyncTestCase, SocketDummyServerTestCase):
+
+    def test_close_delimited_response(self):
+        self.start_response_handler(
+            b'HTTP/1.1 100 Continue\r\n\r\n'
+            b'HTTP/1.1 200 OK\r\n'
+            b'Connection: close\r\n'
+            b'\r\n'
+            b'until the end')
+
+        with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+            r = self.run_coroutine(pool.urlopen('GET', '/'))
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.data, b'until the end')
+
+    def test_dropped_connection_replaced(self):
+        def socket_handler(listener):
+            for body in (b'first', b'second'):
+                sock = listener.accept()[0]
+                consume_socket(sock)
+                sock.send(('HTTP/1.1 200 OK\r\n'
+                           'Content-Length: %d\r\n'
+                           '\r\n' % len(body)).encode('ascii') + body)
+                sock.close()
+
+        self._start_server(socket_handler)
+
+        with AsyncHTTPConnectionPool(self.host, self.port, retries=False) as pool:
+            r = self.run_coroutine(pool.urlopen('GET', '/'))
+            self.assertEqual(r.data, b'first')
+
+            # Let the connection see it was closed while in the pool
+            self.run_coroutine(asyncio.sleep(0.1))
+            r = self.run_coroutine(pool.urlopen('GET', '/'))
+            self.assertEqual(r.data, b'second')
+
+    def test_read_timeout(self):
+        done = threading.Event()
+
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            consume_socket(sock)
+            done.wait(5)
+            sock.close()
+
+        self._start_server(socket_handler)
+        self.addCleanup(done.set)
+
+        with AsyncHTTPConnectionPool(self.host, self.port, retries=False,
+                                     timeout=Timeout(read=0.1)) as pool:
+            with pytest.raises(ReadTimeoutError):
+                self.run_coroutine(pool.urlopen('GET', '/'))
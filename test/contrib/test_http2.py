@@ -0,0 +1,187 @@
+import io
+import threading
+
+import pytest
+
+from dummyserver.server import DEFAULT_CA
+from dummyserver.testcase import SocketDummyServerTestCase
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+from urllib3.poolmanager import PoolManager, pool_classes_by_scheme
+from urllib3.util.retry import Retry
+from urllib3.util.timeout import Timeout
+
+pytest.importorskip('h2')
+
+from dummyserver.h2server import h2_socket_handler  # noqa: E402
+from urllib3.contrib.http2 import HTTP2ConnectionPool  # noqa: E402
+
+
+class TestHTTP2ConnectionPool(SocketDummyServerTestCase):
+
+    def _pool(self, **kw):
+        pool = HTTP2ConnectionPool(self.host, self.port, cert_reqs='CERT_REQUIRED',
+                                   ca_certs=DEFAULT_CA, **kw)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_request(self):
+        requests = []
+
+        def app(headers, body):
+            requests.append((dict(headers), body))
+            return 200, [('content-type', 'text/plain')], b'hello'
+
+        self._start_server(h2_socket_handler(app))
+        pool = self._pool()
+
+        r = pool.request('GET', '/path?q=1', headers={'X-Foo': 'bar',
+                                                      'Connection': 'keep-alive'})
+        self.assertTrue(pool.is_http2)
+        self.assertEqual(r.status, 200)
+        self.assertEqual(r.version, 20)
+        self.assertEqual(r.alpn_protocol, 'h2')
+        self.assertEqual(r.headers['Content-Type'], 'text/plain')
+        self.assertEqual(r.data, b'hello')
+
+        r = pool.request('POST', '/', body=b'x' * 100000)
+        self.assertEqual(r.data, b'hello')
+
+        headers, body = requests[0]
+        self.assertEqual(headers[':method'], 'GET')
+        self.assertEqual(headers[':scheme'], 'https')
+        self.assertEqual(headers[':authority'], '%s:%d' % (self.host, self.port))
+        self.assertEqual(headers[':path'], '/path?q=1')
+        self.assertEqual(headers['x-foo'], 'bar')
+        self.assertFalse('connection' in headers)
+
+        # Larger than the initial flow control window
+        self.assertEqual(requests[1][1], b'x' * 100000)
+
+    def test_concurrent_requests(self):
+        cond = threading.Condition()
+        arrived = []
+
+        def app(headers, body):
+            # Only answer once all the requests are in
+            with cond:
+                arrived.append(headers)
+                cond.notify_all()
+                while len(arrived) < 5:
+                    cond.wait(5)
+            path = dict(headers)[':path']
+            return 200, [], path.encode('ascii')
+
+        # A single connection is served
+        self._start_server(h2_socket_handler(app))
+        pool = self._pool(maxsize=1, block=True)
+
+        results = {}
+
+        def request(i):
+            results[i] = pool.request('GET', '/%d' % i).data
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(results, dict((i, ('/%d' % i).encode('ascii'))
+                                       for i in range(5)))
+        self.assertEqual(pool.num_connections, 1)
+
+    def test_retry_on_status(self):
+        statuses = [503, 200]
+
+        def app(headers, body):
+            return statuses.pop(0), [], b''
+
+        self._start_server(h2_socket_handler(app))
+        pool = self._pool(retries=Retry(total=1, status_forcelist=[503]))
+
+        r = pool.request('GET', '/')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(r.retries.total, 0)
+
+    def test_retry_rewinds_file_body(self):
+        statuses = [503, 200]
+        bodies = []
+
+        def app(headers, body):
+            bodies.append(body)
+            return statuses.pop(0), [], b''
+
+        self._start_server(h2_socket_handler(app))
+        pool = self._pool(retries=Retry(total=1, status_forcelist=[503],
+                                        method_whitelist=['POST']))
+
+        r = pool.urlopen('POST', '/', body=io.BytesIO(b'data'))
+        self.assertEqual(r.status, 200)
+        self.assertEqual(bodies, [b'data', b'data'])
+
+    def test_read_timeout(self):
+        done = threading.Event()
+        self.addCleanup(done.set)
+
+        def app(headers, body):
+            if dict(headers)[':path'] == '/slow':
+                done.wait(5)
+            return 200, [], b'ok'
+
+        self._start_server(h2_socket_handler(app))
+        pool = self._pool(retries=False, timeout=Timeout(read=0.1))
+
+        with pytest.raises(ReadTimeoutError):
+            pool.request('GET', '/slow')
+
+        # Only the stream was given up on
+        r = pool.request('GET', '/fast')
+        self.assertEqual(r.data, b'ok')
+        self.assertEqual(pool.num_connections, 1)
+
+        with pytest.raises(MaxRetryError):
+            pool.request('GET', '/slow', retries=1)
+
+    def test_http11_fallback(self):
+        def app(headers, body):
+            return 200, [], headers[0]
+
+        self._start_server(h2_socket_handler(app, num=2,
+                                             alpn_protocols=['http/1.1']))
+        pool = self._pool()
+
+        for _ in range(2):
+            r = pool.request('GET', '/')
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.version, 11)
+            self.assertEqual(r.alpn_protocol, 'http/1.1')
+            self.assertEqual(r.data, b'GET / HTTP/1.1')
+        self.assertFalse(pool.is_http2)
+
+    def test_http11_only(self):
+        def app(headers, body):
+            return 200, [], b''
+
+        # No protocol in common, the server falls back to HTTP/1.1
+        self._start_server(h2_socket_handler(app))
+        pool = self._pool(alpn_protocols=['http/1.1'])
+        self.assertFalse(pool.is_http2)
+
+        r = pool.request('GET', '/')
+        self.assertEqual(r.version, 11)
+        self.assertEqual(r.alpn_protocol, None)
+
+    def test_pool_manager(self):
+        def app(headers, body):
+            return 200, [], b'hello'
+
+        self._start_server(h2_socket_handler(app))
+
+        http = PoolManager(cert_reqs='CERT_REQUIRED', ca_certs=DEFAULT_CA)
+        http.pool_classes_by_scheme = dict(pool_classes_by_scheme,
+                                           https=HTTP2ConnectionPool)
+        self.addCleanup(http.clear)
+
+        r = http.request('GET', 'https://%s:%d/' % (self.host, self.port))
+        self.assertEqual(r.data, b'hello')
+        self.assertEqual(r.version, 20)
@@ -0,0 +1,205 @@
+import socket
+import threading
+
+import pytest
+
+from dummyserver.testcase import (HTTPDummyServerTestCase,
+                                  SocketDummyServerTestCase, consume_socket)
+from urllib3.contrib.selectorengine import SelectorEngine
+from urllib3.exceptions import (DecodeError, MaxRetryError, NewConnectionError,
+                                ProtocolError, ReadTimeoutError)
+from urllib3.util.retry import Retry
+from urllib3.util.timeout import Timeout
+
+
+class TestSelectorEngine(HTTPDummyServerTestCase):
+
+    def setUp(self):
+        self.base_url = 'http://%s:%d' % (self.host, self.port)
+
+    def test_request(self):
+        with SelectorEngine() as engine:
+            r = engine.request('GET', '%s/echo' % self.base_url,
+                               fields={'foo': 'bar'})
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.data, b'foo=bar')
+
+            r = engine.request('POST', '%s/echo' % self.base_url,
+                               fields={'foo': 'bar'}, encode_multipart=False)
+            self.assertEqual(r.data, b'foo=bar')
+
+    def test_chunked_response(self):
+        with SelectorEngine() as engine:
+            r = engine.request('GET', '%s/chunked' % self.base_url)
+            self.assertEqual(r.data, b'123' * 4)
+
+            r = engine.request('GET', '%s/chunked' % self.base_url,
+                               preload_content=False)
+            self.assertEqual(list(r.stream()), [b'123'] * 4)
+
+    def test_keepalive(self):
+        with SelectorEngine(maxsize=1) as engine:
+            for _ in range(3):
+                r = engine.request('GET', '%s/keepalive' % self.base_url)
+                self.assertEqual(r.data, b'Keeping alive')
+            self.assertEqual(engine._num_connections, 1)
+
+            r = engine.request('GET', '%s/keepalive?close=1' % self.base_url)
+            self.assertEqual(r.data, b'Closing')
+            self.assertEqual(engine._num_connections, 0)
+
+    def test_request_many(self):
+        with SelectorEngine(maxsize=3, block=True) as engine:
+            requests = [('GET', '%s/echo' % self.base_url, {'fields': {'i': i}})
+                        for i in range(20)]
+            requests.append(('GET', '%s/not_found' % self.base_url))
+            requests.append(('GET', 'http://'))
+
+            results = list(engine.request_many(requests))
+            self.assertEqual([index for index, _ in results], list(range(22)))
+            for i in range(20):
+                self.assertEqual(results[i][1].data, ('i=%d' % i).encode('ascii'))
+            self.assertEqual(results[20][1].status, 404)
+            self.assertTrue(isinstance(results[21][1], Exception))
+
+            # block=True never opens more than maxsize connections
+            self.assertTrue(engine._num_connections <= 3)
+
+    def test_request_many_unordered(self):
+        with SelectorEngine(maxsize=2) as engine:
+            requests = [('GET', '%s/echo?i=%d' % (self.base_url, i))
+                        for i in range(10)]
+            results = dict(engine.request_many(requests, ordered=False))
+            self.assertEqual(sorted(results), list(range(10)))
+            for i, r in results.items():
+                self.assertEqual(r.data, ('i=%d' % i).encode('ascii'))
+
+    def test_retry_on_status(self):
+        retries = Retry(total=1, status_forcelist=[418])
+        with SelectorEngine(retries=retries) as engine:
+            r = engine.request('GET', '%s/successful_retry' % self.base_url,
+                               headers={'test-name': 'selectorengine'})
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.retries.total, 0)
+
+            retries = Retry(total=1, status_forcelist=[404])
+            self.assertRaises(MaxRetryError, engine.request, 'GET',
+                              '%s/not_found' % self.base_url, retries=retries)
+
+            retries = Retry(total=1, status_forcelist=[404], raise_on_status=False)
+            r = engine.request('GET', '%s/not_found' % self.base_url,
+                               retries=retries)
+            self.assertEqual(r.status, 404)
+
+    def test_connection_refused(self):
+        # Find a port nothing listens on
+        sock = socket.socket()
+        sock.bind(('localhost', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        with SelectorEngine(retries=False) as engine:
+            with pytest.raises(NewConnectionError):
+                engine.request('GET', 'http://localhost:%d/' % port)
+
+        with SelectorEngine(retries=1) as engine:
+            with pytest.raises(MaxRetryError) as e:
+                engine.request('GET', 'http://localhost:%d/' % port)
+            self.assertTrue(isinstance(e.value.reason, NewConnectionError))
+
+    def test_unsupported_body(self):
+        with SelectorEngine() as engine:
+            self.assertRaises(TypeError, engine.urlopen, 'POST',
+                              '%s/echo' % self.base_url, body=iter([b'foo']))
+
+    def test_urlopen_options(self):
+        with SelectorEngine() as engine:
+            r = engine.urlopen('GET', '%s/echo?a=b' % self.base_url,
+                               release_conn=False, pool_timeout=1)
+            self.assertEqual(r.data, b'a=b')
+
+            self.assertRaises(NotImplementedError, engine.urlopen, 'POST',
+                              '%s/echo' % self.base_url, body=b'foo', chunked=True)
+            self.assertRaises(ValueError, engine.urlopen, 'GET', self.base_url,
+                              headers={'X-Foo': 'bar\r\nX-Injected: 1'})
+            self.assertEqual(engine._busy, set())
+
+
+class TestSelectorEngineSocketLevel(SocketDummyServerTestCase):
+
+    def test_close_delimited_response(self):
+        self.start_response_handler(
+            b'HTTP/1.1 100 Continue\r\n\r\n'
+            b'HTTP/1.1 200 OK\r\n'
+            b'Connection: close\r\n'
+            b'\r\n'
+            b'until the end')
+
+        with SelectorEngine() as engine:
+            r = engine.request('GET', 'http://%s:%d/' % (self.host, self.port))
+            self.assertEqual(r.status, 200)
+            self.assertEqual(r.data, b'until the end')
+            self.assertEqual(engine._num_connections, 0)
+
+    def test_concurrent_requests(self):
+        def socket_handler(listener):
+            # Only answer once all the requests are in
+            socks = [listener.accept()[0] for _ in range(5)]
+            for i, sock in enumerate(socks):
+                consume_socket(sock)
+                sock.send(('HTTP/1.1 200 OK\r\n'
+                           'Content-Length: 1\r\n'
+                           '\r\n%d' % i).encode('ascii'))
+            for sock in socks:
+                sock.close()
+
+        self._start_server(socket_handler)
+
+        with SelectorEngine(maxsize=5, timeout=5) as engine:
+            url = 'http://%s:%d/' % (self.host, self.port)
+            results = list(engine.request_many([('GET', url)] * 5))
+            self.assertEqual(sorted(r.data for _, r in results),
+                             [b'0', b'1', b'2', b'3', b'4'])
+
+    def test_incomplete_response(self):
+        self.start_response_handler(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Length: 10\r\n'
+            b'\r\n'
+            b'short')
+
+        with SelectorEngine(retries=3) as engine:
+            self.assertRaises(ProtocolError, engine.request, 'GET',
+                              'http://%s:%d/' % (self.host, self.port))
+
+    def test_undecodable_response(self):
+        self.start_response_handler(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Encoding: gzip\r\n'
+            b'Content-Length: 3\r\n'
+            b'\r\n'
+            b'foo', num=2)
+
+        with SelectorEngine(retries=3) as engine:
+            url = 'http://%s:%d/' % (self.host, self.port)
+            self.assertRaises(DecodeError, engine.request, 'GET', url)
+
+            results = list(engine.request_many([('GET', url)]))
+            self.assertEqual(results[0][0], 0)
+            self.assertTrue(isinstance(results[0][1], DecodeError))
+
+    def test_read_timeout(self):
+        done = threading.Event()
+
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            consume_socket(sock)
+            done.wait(5)
+            sock.close()
+
+        self._start_server(socket_handler)
+        self.addCleanup(done.set)
+
+        with SelectorEngine(timeout=Timeout(read=0.1), retries=False) as engine:
+            self.assertRaises(ReadTimeoutError, engine.request, 'GET',
+                              'http://%s:%d/' % (self.host, self.port))
@@ -0,0 +1,96 @@
+from mock import patch
+
+from urllib3.util.circuit import CircuitBreaker
+
+
+class Pool(object):
+    scheme = 'http'
+
+    def __init__(self, host, port=80):
+        self.host = host
+        self.port = port
+
+
+class TestCircuitBreaker(object):
+
+    def test_string(self):
+        assert str(CircuitBreaker()) == 'CircuitBreaker(failure_threshold=5, recovery_timeout=30)'
+
+    @patch('urllib3.util.circuit.current_time')
+    def test_opens_after_consecutive_failures(self, current_time):
+        current_time.return_value = 0
+        breaker = CircuitBreaker(failure_threshold=3)
+        pool = Pool('example.com')
+
+        breaker.record_failure(pool)
+        breaker.record_failure(pool)
+        breaker.record_success(pool)
+        breaker.record_failure(pool)
+        breaker.record_failure(pool)
+        assert breaker.allow_request(pool)
+        assert not breaker.is_open(pool)
+
+        breaker.record_failure(pool)
+        assert breaker.is_open(pool)
+        assert not breaker.allow_request(pool)
+
+    @patch('urllib3.util.circuit.current_time')
+    def test_half_open(self, current_time):
+        current_time.return_value = 0
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        pool = Pool('example.com')
+
+        breaker.record_failure(pool)
+        current_time.return_value = 9
+        assert not breaker.allow_request(pool)
+
+        # A single probe is let through
+        current_time.return_value = 10
+        assert breaker.allow_request(pool)
+        assert not breaker.allow_request(pool)
+
+        # The probe failed, the circuit is open for another recovery_timeout
+        current_time.return_value = 11
+        breaker.record_failure(pool)
+        current_time.return_value = 20
+        assert not breaker.allow_request(pool)
+
+        # The probe got a response
+        current_time.return_value = 21
+        assert breaker.allow_request(pool)
+        breaker.record_success(pool)
+        assert not breaker.is_open(pool)
+        assert breaker.allow_request(pool)
+        assert breaker.allow_request(pool)
+
+        # Nor does a probe which never got a result hold the circuit open
+        breaker.record_failure(pool)
+        current_time.return_value = 31
+        assert breaker.allow_request(pool)
+        current_time.return_value = 41
+        assert breaker.allow_request(pool)
+
+    def test_per_host(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure(Pool('example.com'))
+
+        assert not breaker.allow_request(Pool('example.com'))
+        assert breaker.allow_request(Pool('example.com', 8080))
+        assert breaker.allow_request(Pool('other.example.com'))
+
+    def test_bounded(self):
+        breaker = CircuitBreaker(failure_threshold=1, max_hosts=2)
+        for i in range(5):
+            breaker.record_failure(Pool('%d.example.com' % i))
+        assert len(breaker._circuits) == 2
+
+        # The least recently failed hosts are forgotten
+        assert breaker.allow_request(Pool('0.example.com'))
+        assert not breaker.allow_request(Pool('4.example.com'))
+
+        # Hosts are forgotten once their circuit is closed
+        breaker.record_success(Pool('4.example.com'))
+        breaker.record_success(Pool('5.example.com'))
+        assert len(breaker._circuits) == 1
+        assert breaker.allow_request(Pool('5.example.com'))
+        assert len(breaker._circuits) == 1
@@ -1,7 +1,10 @@
 from urllib3._collections import (
     HTTPHeaderDict,
-    RecentlyUsedContainer as Container
+    RecentlyUsedContainer as Container,
+    _disposer,
 )
+import threading
+
 import pytest
 
 from urllib3.packages import six
@@ -97,6 +100,35 @@ class TestLRUContainer(object):
         with pytest.raises(KeyError):
             d[5]
 
+    def test_get_does_not_wait_for_lock(self):
+        d = Container(5)
+
+        for i in xrange(5):
+            d[i] = i
+
+        locked = threading.Event()
+        unlock = threading.Event()
+
+        def hold_lock():
+            with d.lock:
+                locked.set()
+                unlock.wait()
+
+        t = threading.Thread(target=hold_lock)
+        t.start()
+        locked.wait()
+        try:
+            assert d.get(0) == 0
+            assert d.get(5) is None
+        finally:
+            unlock.set()
+            t.join()
+
+        # The item is only moved to the end when the lock is free.
+        assert list(d.keys()) == [0, 1, 2, 3, 4]
+        assert d.get(0) == 0
+        assert list(d.keys()) == [1, 2, 3, 4, 0]
+
     def test_disposal(self):
         evicted_items = []
 
@@ -120,6 +152,49 @@ class TestLRUContainer(object):
         d.clear()
         assert evicted_items == [0, 1, 2, 3, 4, 5]
 
+    def test_background_disposal(self):
+        evicted_items = []
+        disposing = threading.Event()
+        dispose = threading.Event()
+
+        def dispose_func(arg):
+            disposing.set()
+            dispose.wait()
+            evicted_items.append((arg, threading.current_thread()))
+
+        d = Container(1, dispose_func=dispose_func, background_dispose=True)
+        d[0] = 0
+        d[1] = 1
+        d[1] = 2
+
+        # Setting items didn't wait for the disposal of the evicted ones.
+        disposing.wait()
+        assert evicted_items == []
+
+        dispose.set()
+        _disposer.join()
+        assert [item for item, _ in evicted_items] == [0, 1]
+        assert all(t is not threading.current_thread() for _, t in evicted_items)
+
+        # Deleting still disposes of the value right away.
+        del d[1]
+        assert evicted_items[-1] == (2, threading.current_thread())
+
+    def test_background_disposal_error(self):
+        evicted_items = []
+
+        def dispose_func(arg):
+            if arg == 0:
+                raise ValueError(arg)
+            evicted_items.append(arg)
+
+        d = Container(1, dispose_func=dispose_func, background_dispose=True)
+        for i in xrange(3):
+            d[i] = i
+
+        _disposer.join()
+        assert evicted_items == [1]
+
     def test_iter(self):
         d = Container()
 
@@ -127,6 +202,103 @@ class TestLRUContainer(object):
             d.__iter__()
 
 
+class TestShardedLRUContainer(object):
+    def test_maxsize(self):
+        evicted_items = []
+        d = Container(6, dispose_func=evicted_items.append, shards=3)
+
+        for i in xrange(6):
+            d[i] = i
+        assert len(d) == 6
+        assert evicted_items == []
+
+        # 6 lands in the shard of 0 and 3, evicting the older of the two.
+        d[6] = 6
+        assert len(d) == 6
+        assert evicted_items == [0]
+
+        d[3]
+        d[9] = 9
+        assert len(d) == 6
+        assert evicted_items == [0, 6]
+        assert sorted(d.keys()) == [1, 2, 3, 4, 5, 9]
+
+    def test_evict_from_other_shard(self):
+        evicted_items = []
+        d = Container(2, dispose_func=evicted_items.append, shards=4)
+
+        d[1] = 1
+        d[2] = 2
+        d[3] = 3
+        assert evicted_items == [1]
+        assert sorted(d.keys()) == [2, 3]
+
+    def test_never_evict_new_key(self):
+        evicted_items = []
+        d = Container(1, dispose_func=evicted_items.append, shards=4)
+
+        for i in xrange(8):
+            d[i] = i
+            assert d.get(i) == i
+            assert len(d) == 1
+        assert evicted_items == list(range(7))
+
+    def test_maxsize_zero(self):
+        evicted_items = []
+        d = Container(0, dispose_func=evicted_items.append, shards=2)
+        d[1] = 1
+        assert len(d) == 0
+        assert evicted_items == [1]
+
+    def test_no_deadlock_holding_lock_for(self):
+        d = Container(2, shards=4)
+        errors = []
+
+        def insert(offset):
+            try:
+                for i in xrange(offset, offset + 2000, 8):
+                    with d.lock_for(i):
+                        d[i] = i
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=insert, args=(i,)) for i in xrange(8)]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join(10)
+
+        assert not any(t.is_alive() for t in threads)
+        assert errors == []
+
+        # Shards skipped under contention are evicted from once it is over.
+        d['last'] = 0
+        assert len(d) == 2
+
+    def test_lock_for(self):
+        d = Container(shards=2)
+        assert d.lock_for(0) is d.lock_for(2)
+        assert d.lock_for(0) is not d.lock_for(1)
+        assert d.lock_for(0) is d.lock
+
+    def test_delete_and_clear(self):
+        evicted_items = []
+        d = Container(5, dispose_func=evicted_items.append, shards=2)
+
+        for i in xrange(4):
+            d[i] = i
+
+        del d[1]
+        assert 1 not in d
+        assert d.get(2) == 2
+        assert evicted_items == [1]
+
+        d.clear()
+        assert len(d) == 0
+        assert sorted(evicted_items) == [0, 1, 2, 3]
+
+
 class NonMappingHeaderContainer(object):
     def __init__(self, **kwargs):
         self._data = {}
@@ -253,6 +425,24 @@ class TestHTTPHeaderDict(object):
         assert d is not h
         assert d == h
 
+    def test_copy_is_independent(self, d):
+        assert d['cookie'] == 'foo, bar'
+        h = d.copy()
+        h.add('cookie', 'baz')
+        assert h['cookie'] == 'foo, bar, baz'
+        assert d['cookie'] == 'foo, bar'
+
+    def test_merged_value_follows_add(self, d):
+        assert d['cookie'] == 'foo, bar'
+        d.add('Cookie', 'baz')
+        assert d['cookie'] == 'foo, bar, baz'
+        d['cookie'] = 'qux'
+        assert d['cookie'] == 'qux'
+
+    def test_getlist_returns_copy(self, d):
+        d.getlist('cookie').append('baz')
+        assert d.getlist('cookie') == ['foo', 'bar']
+
     def test_getlist(self, d):
         assert d.getlist('cookie') == ['foo', 'bar']
         assert d.getlist('Cookie') == ['foo', 'bar']
@@ -1,10 +1,21 @@
 import datetime
+import io
 import mock
+import tempfile
 
 import pytest
 
+from urllib3.packages import six
+from urllib3 import connection
+from urllib3._collections import HTTPHeaderDict
 from urllib3.connection import (
+    BadStatusLine,
     CertificateError,
+    FastHTTPResponse,
+    HTTPConnection,
+    HTTPSConnection,
+    _encode_request,
+    _file_body_length,
     _match_hostname,
     RECENT_DATE
 )
@@ -53,3 +64,349 @@ class TestConnection(object):
         # according to the rules defined in that file.
         two_years = datetime.timedelta(days=365 * 2)
         assert RECENT_DATE > (datetime.datetime.today() - two_years).date()
+
+    def test_file_body_length(self):
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b'x' * 100)
+            fp.seek(10)
+            assert _file_body_length(fp, {}) == 90
+            assert _file_body_length(fp, {'Content-Length': '50'}) == 50
+            assert _file_body_length(fp, {'Transfer-Encoding': 'chunked'}) is None
+            assert _file_body_length(fp, {'content-length': 'foo'}) is None
+
+    @pytest.mark.parametrize('body', [
+        None,
+        b'foo',
+        io.BytesIO(b'foo'),
+        [b'foo'],
+    ])
+    def test_file_body_length_not_a_file(self, body):
+        assert _file_body_length(body, {}) is None
+
+    @pytest.mark.parametrize('no_memoryview', [False, True])
+    def test_send_file_in_blocks(self, no_memoryview, monkeypatch):
+        # Sockets that aren't plain sockets, such as TLS sockets, get the file
+        # in blocks of ``file_blocksize``.
+        if no_memoryview:  # As on Python 2.6
+            monkeypatch.setattr('urllib3.connection._memoryview', None)
+        conn = HTTPConnection('localhost', 80)
+        conn.file_blocksize = 7
+        conn.sock = mock.Mock()
+        sent = []
+        conn.sock.sendall.side_effect = lambda data: sent.append(bytes(data))
+
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b'0123456789' * 5)
+            fp.seek(5)
+            conn._send_file(fp, 40)
+            assert fp.tell() == 45
+
+        assert sent[0] == b'5678901'
+        assert max(len(data) for data in sent) == 7
+        assert b''.join(sent) == (b'0123456789' * 5)[5:45]
+
+    def _mock_conn(self):
+        conn = HTTPConnection('localhost', 80)
+        conn.sock = mock.Mock()
+        sent = []
+        conn.sock.sendall.side_effect = lambda data: sent.append(bytes(data))
+        return conn, sent
+
+    def _reset_state(self, conn):
+        # As if the response to the previous request had been read.
+        conn._HTTPConnection__state = 'Idle'
+
+    def test_small_body_sent_with_headers(self):
+        conn, sent = self._mock_conn()
+        conn.request('POST', '/', body=b'foo=bar')
+
+        assert len(sent) == 1
+        assert sent[0].startswith(b'POST / HTTP/1.1\r\n')
+        assert sent[0].endswith(b'\r\n\r\nfoo=bar')
+
+    def test_large_body_sent_separately(self):
+        conn, sent = self._mock_conn()
+        body = b'x' * (conn.coalesce_size + 1)
+        conn.request('POST', '/', body=body)
+
+        assert sent[-1] == body
+        assert sent[-2].endswith(b'\r\n\r\n')
+
+    @pytest.mark.parametrize('method, body, headers', [
+        ('GET', None, {}),
+        ('POST', None, {'X-Foo': 'bar'}),
+        ('POST', b'foo=bar', {'Host': 'example.com', 'Accept-Encoding': 'gzip'}),
+        ('PUT', b'foo=bar', {'Content-Length': '7', 'X-Num': 42}),
+        ('GET', None, HTTPHeaderDict([('Cookie', 'a=1'), ('cookie', 'b=2')])),
+    ])
+    def test_fast_request_serializer(self, method, body, headers):
+        conn, sent = self._mock_conn()
+        conn.request(method, '/path', body=body, headers=headers)
+
+        # The second time around, the kept header block is used.
+        fast_conn, fast_sent = self._mock_conn()
+        fast_conn.fast_request_serializer = True
+        for _ in range(2):
+            del fast_sent[:]
+            self._reset_state(fast_conn)
+            fast_conn.request(method, '/path', body=body, headers=headers)
+            assert fast_sent == sent
+
+    def test_fast_request_serializer_reuses_default_headers(self, monkeypatch):
+        render = mock.Mock(wraps=connection._render_header_block)
+        monkeypatch.setattr('urllib3.connection._render_header_block', render)
+        conn, sent = self._mock_conn()
+        conn.fast_request_serializer = True
+
+        default_headers = {'User-Agent': 'test'}
+        conn.request('GET', '/', headers=default_headers)
+        self._reset_state(conn)
+        conn.request('GET', '/', headers=default_headers)
+        assert render.call_count == 1
+
+        # Headers changed in place are encoded again
+        default_headers['User-Agent'] = 'other'
+        self._reset_state(conn)
+        conn.request('GET', '/', headers=default_headers)
+        assert render.call_count == 2
+        assert sent[-1].endswith(b'User-Agent: other\r\n\r\n')
+
+        # Equal headers of another request are encoded on their own
+        self._reset_state(conn)
+        conn.request('GET', '/', headers={'User-Agent': 'other'})
+        assert render.call_count == 3
+
+    def test_fast_request_serializer_without_endheaders_body(self, monkeypatch):
+        # Python 2.6 sends the headers on their own
+        monkeypatch.setattr('urllib3.connection._ENDHEADERS_TAKES_BODY', False)
+        conn, sent = self._mock_conn()
+        conn.fast_request_serializer = True
+        conn.request('POST', '/', body=b'foo=bar')
+
+        assert sent[0].endswith(b'Content-Length: 7\r\n\r\n')
+        assert sent[1:] == [b'foo=bar']
+
+    def test_fast_request_serializer_chunked(self):
+        conn, sent = self._mock_conn()
+        conn.fast_request_serializer = True
+        conn.request_chunked('POST', '/', body=[b'foo'], headers={'X-Foo': 'bar'})
+
+        assert sent[0].endswith(b'X-Foo: bar\r\nTransfer-Encoding: chunked\r\n'
+                                b'\r\n3\r\nfoo')
+
+    @pytest.mark.parametrize('headers', [
+        {'X-Foo': 'bar\r\nX-Injected: 1'},
+        {'X-Foo\r\nX-Injected': '1'},
+        {'': 'empty'},
+    ])
+    def test_fast_request_serializer_invalid_headers(self, headers):
+        conn, sent = self._mock_conn()
+        conn.fast_request_serializer = True
+        with pytest.raises(ValueError):
+            conn.request('GET', '/', headers=headers)
+
+    def test_encode_request(self):
+        request = _encode_request('POST', '/path?q', 'example.com', b'foo=bar',
+                                  {'X-Foo': 'bar'})
+        assert request == (b'POST /path?q HTTP/1.1\r\n'
+                           b'Host: example.com\r\n'
+                           b'Accept-Encoding: identity\r\n'
+                           b'Content-Length: 7\r\n'
+                           b'X-Foo: bar\r\n'
+                           b'\r\n'
+                           b'foo=bar')
+
+    @pytest.mark.parametrize('method, url, host, headers', [
+        ('GET\r\nX-Injected: 1\r\n', '/', 'example.com', {}),
+        ('GET', '/ HTTP/1.1\r\nX-Injected: 1', 'example.com', {}),
+        ('GET', '/path with spaces', 'example.com', {}),
+        ('GET', '/\x00', 'example.com', {}),
+        ('GET', '/', 'example.com\r\nX-Injected: 1', {}),
+        ('GET', '/', 'example.com', {'X-Foo': 'bar\r\nX-Injected: 1'}),
+        ('GET', '/', 'example.com', {'X-Foo\r\nX-Injected': '1'}),
+    ])
+    def test_encode_request_rejects_injection(self, method, url, host, headers):
+        with pytest.raises(ValueError):
+            _encode_request(method, url, host, None, headers)
+
+    def test_request_chunked_coalesces_frames(self):
+        conn, sent = self._mock_conn()
+        conn.request_chunked('POST', '/', body=[b'foo', b'', u'bar'])
+
+        assert len(sent) == 3
+        assert sent[0].endswith(b'Transfer-Encoding: chunked\r\n\r\n3\r\nfoo')
+        assert sent[1:] == [b'\r\n3\r\nbar', b'\r\n0\r\n\r\n']
+
+    def test_request_chunked_without_endheaders_body(self, monkeypatch):
+        # Python 2.6 sends the headers on their own
+        monkeypatch.setattr('urllib3.connection._ENDHEADERS_TAKES_BODY', False)
+        conn, sent = self._mock_conn()
+        conn.request_chunked('POST', '/', body=[b'foo'])
+
+        assert sent[0].endswith(b'Transfer-Encoding: chunked\r\n\r\n')
+        assert sent[1:] == [b'3\r\nfoo', b'\r\n0\r\n\r\n']
+
+    def test_request_chunked_large_chunk(self):
+        conn, sent = self._mock_conn()
+        chunk = b'x' * (conn.coalesce_size + 1)
+        conn.request_chunked('POST', '/', body=[chunk])
+
+        assert sent[0].endswith(b'\r\n\r\n' + hex(len(chunk))[2:].encode('ascii') + b'\r\n')
+        assert sent[1:] == [chunk, b'\r\n0\r\n\r\n']
+
+    def test_request_chunked_empty_body(self):
+        conn, sent = self._mock_conn()
+        conn.request_chunked('POST', '/')
+
+        assert len(sent) == 1
+        assert sent[0].endswith(b'\r\n\r\n0\r\n\r\n')
+
+    def test_request_chunked_chunk_size(self):
+        conn, sent = self._mock_conn()
+        conn.chunk_size = 6
+        body = [b'ab', b'cd', memoryview(b'ef'), b'gh', b'', b'ij', b'klmnopqr', u'st']
+        conn.request_chunked('POST', '/', body=body)
+
+        frames = b''.join(sent).split(b'\r\n\r\n', 1)[1]
+        assert frames == (b'6\r\nabcdef\r\n'
+                          b'2\r\ngh\r\n'  # Flushed by the empty marker
+                          b'2\r\nij\r\n'
+                          b'8\r\nklmnopqr\r\n'
+                          b'2\r\nst\r\n'
+                          b'0\r\n\r\n')
+
+    def test_request_chunked_chunk_size_without_memoryview(self, monkeypatch):
+        monkeypatch.setattr('urllib3.connection._memoryview', None)  # As on Python 2.6
+        conn, sent = self._mock_conn()
+        conn.chunk_size = 4
+        conn.request_chunked('POST', '/', body=[b'ab', u'cd', b'efgh'])
+
+        frames = b''.join(sent).split(b'\r\n\r\n', 1)[1]
+        assert frames == b'4\r\nabcd\r\n4\r\nefgh\r\n0\r\n\r\n'
+
+    def test_request_chunked_large_memoryview_not_copied(self):
+        conn, sent = self._mock_conn()
+        conn.chunk_size = 16
+        conn.coalesce_size = 16
+        chunk = memoryview(b'x' * 32)
+        conn.sock.sendall.side_effect = lambda data: sent.append(data)
+        conn.request_chunked('POST', '/', body=[b'abc', chunk])
+
+        assert any(data is chunk for data in sent)
+
+    @mock.patch('urllib3.connection.ssl_wrap_socket')
+    def test_alpn_protocol_only_queried_when_offered(self, ssl_wrap_socket):
+        # As pyOpenSSL 0.14, which can't tell the negotiated protocol
+        sock = ssl_wrap_socket.return_value
+        sock.selected_alpn_protocol.side_effect = AttributeError
+        conn = HTTPSConnection('localhost', ssl_context=mock.Mock())
+        conn._new_conn = mock.Mock()
+        conn.connect()
+        assert not sock.selected_alpn_protocol.called
+        assert conn.alpn_protocol is None
+
+        conn.alpn_protocols = ['h2', 'http/1.1']
+        conn.connect()
+        assert sock.selected_alpn_protocol.called
+        assert conn.alpn_protocol is None
+
+
+class RawSock(object):
+    def __init__(self, data, buffered=True):
+        self.data = data
+        self.buffered = buffered
+
+    def makefile(self, *args, **kwargs):
+        fp = io.BytesIO(self.data)
+        if self.buffered:
+            return io.BufferedReader(fp)
+        return fp
+
+
+class TestFastHTTPResponse(object):
+    @pytest.mark.parametrize('buffered', [True, False])
+    def test_parse(self, buffered):
+        sock = RawSock(b'HTTP/1.1 100 Continue\r\n\r\n'
+                       b'HTTP/1.1 200 OK\r\n'
+                       b'Content-Length: 3\r\n'
+                       b'Set-Cookie: a=1\r\n'
+                       b'set-cookie: b=2\r\n'
+                       b'X-Folded: foo\r\n'
+                       b' bar\r\n'
+                       b'\r\n'
+                       b'foobaz', buffered)
+        r = FastHTTPResponse(sock)
+        r.begin()
+        assert (r.status, r.reason, r.version) == (200, 'OK', 11)
+        assert r.msg.getlist('set-cookie') == ['a=1', 'b=2']
+        assert r.msg['x-folded'] == 'foo\r\n bar'
+        assert r.getheader('Content-Length') == '3'
+        assert r.length == 3
+        assert not r.will_close
+        assert r.read() == b'foo'
+
+    def test_parse_bare_newlines(self):
+        r = FastHTTPResponse(RawSock(b'HTTP/1.0 404 Not Found\n'
+                                     b'Connection: keep-alive\n'
+                                     b'Transfer-Encoding: chunked\n'
+                                     b'\n'
+                                     b'3\r\nfoo\r\n0\r\n\r\n'))
+        r.begin()
+        assert (r.status, r.reason, r.version) == (404, 'Not Found', 10)
+        assert r.chunked
+        assert not r.will_close
+        assert r.read() == b'foo'
+
+    @pytest.mark.parametrize('buffered', [True, False])
+    def test_non_ascii_header_value(self, buffered):
+        # U+0105 is \xc4\x85 in UTF-8, and \x85 is a line break in Latin-1.
+        value = u'\u0105\x0c\u0142'.encode('utf-8')
+        r = FastHTTPResponse(RawSock(b'HTTP/1.1 200 OK\r\n'
+                                     b'X-Name: ' + value + b'\r\n'
+                                     b'Content-Length: 0\r\n'
+                                     b'\r\n', buffered))
+        r.begin()
+        if six.PY3:
+            value = value.decode('iso-8859-1')
+        assert r.msg['x-name'] == value
+        assert r.length == 0
+        assert r.unparsed_headers == []
+
+    def test_no_length_closes(self):
+        r = FastHTTPResponse(RawSock(b'HTTP/1.1 200 OK\r\n\r\nfoo'))
+        r.begin()
+        assert r.will_close
+        assert r.read() == b'foo'
+
+    def test_unparsed_headers(self):
+        r = FastHTTPResponse(RawSock(b'HTTP/1.1 200 OK\r\n'
+                                     b'Content-Length: 0\r\n'
+                                     b': no name\r\n'
+                                     b'no colon\r\n'
+                                     b'\r\n'))
+        r.begin()
+        assert list(r.msg) == ['Content-Length']
+        assert r.unparsed_headers == [': no name', 'no colon']
+
+    def test_head_has_no_body(self):
+        sock = RawSock(b'HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\n')
+        r = FastHTTPResponse(sock, method='HEAD')
+        r.begin()
+        assert r.length == 0
+
+    @pytest.mark.parametrize('data', [
+        b'',
+        b'\r\n\r\n',
+        b'FOO 200 OK\r\n\r\n',
+        b'HTTP/1.1 2OO OK\r\n\r\n',
+        b'HTTP/1.1 42 OK\r\n\r\n',
+    ])
+    def test_bad_status_line(self, data):
+        r = FastHTTPResponse(RawSock(data))
+        with pytest.raises(BadStatusLine):
+            r.begin()
+
+    def test_connection_option(self):
+        assert HTTPConnection('localhost').response_class is not FastHTTPResponse
+        conn = HTTPConnection('localhost', fast_response_parser=True)
+        assert conn.response_class is FastHTTPResponse
@@ -10,6 +10,7 @@ from urllib3.connectionpool import (
 )
 from urllib3.response import httplib, HTTPResponse
 from urllib3.util.timeout import Timeout
+from urllib3.util.url import parse_url
 from urllib3.packages.six.moves.http_client import HTTPException
 from urllib3.packages.six.moves.queue import Empty
 from urllib3.packages.ssl_match_hostname import CertificateError
@@ -59,6 +60,7 @@ class TestConnectionPool(object):
     def test_same_host(self, a, b):
         with connection_from_url(a) as c:
             assert c.is_same_host(b)
+            assert c.is_same_host(parse_url(b))
 
     @pytest.mark.parametrize('a, b', [
         ('https://google.com/', 'http://google.com/'),
@@ -82,6 +84,7 @@ class TestConnectionPool(object):
     def test_not_same_host(self, a, b):
         with connection_from_url(a) as c:
             assert not c.is_same_host(b)
+            assert not c.is_same_host(parse_url(b))
 
         with connection_from_url(b) as c:
             assert not c.is_same_host(a)
@@ -1,6 +1,8 @@
+import io
+
 import pytest
 
-from urllib3.filepost import encode_multipart_formdata, iter_fields
+from urllib3.filepost import encode_multipart_formdata, iter_fields, MultipartEncoder
 from urllib3.fields import RequestField
 from urllib3.packages.six import b, u
 
@@ -116,3 +118,78 @@ class TestMultipartEncoding(object):
                     b'--' + b(BOUNDARY) + b'--\r\n')
 
         assert encoded == expected
+
+
+class TestMultipartEncoder(object):
+
+    def _fields(self, fp):
+        return [('k', 'v'), ('f', ('somefile.bin', fp, 'image/jpeg'))]
+
+    def test_matches_encode_multipart_formdata(self):
+        fp = io.BytesIO(b'x' * 100000)
+        expected, content_type = encode_multipart_formdata(
+            self._fields(b'x' * 100000), boundary=BOUNDARY)
+
+        encoder = MultipartEncoder(self._fields(fp), boundary=BOUNDARY)
+        assert encoder.is_streaming
+        assert encoder.content_type == content_type
+        assert encoder.content_length == len(expected)
+        # Nothing is read from the file before the body is consumed.
+        assert fp.tell() == 0
+
+        assert b''.join(encoder) == expected
+
+    def test_file_read_from_current_position(self):
+        fp = io.BytesIO(b'skipped' + b'data')
+        fp.read(7)
+
+        encoder = MultipartEncoder(self._fields(fp), boundary=BOUNDARY)
+        expected, _ = encode_multipart_formdata(self._fields(b'data'), boundary=BOUNDARY)
+        assert encoder.content_length == len(expected)
+        assert encoder.read() == expected
+
+    def test_string_fields_not_streaming(self):
+        encoder = MultipartEncoder([('k', 'v')], boundary=BOUNDARY)
+        assert not encoder.is_streaming
+        assert encoder.read() == encode_multipart_formdata([('k', 'v')], boundary=BOUNDARY)[0]
+
+    @pytest.mark.parametrize('amt', [1, 7, 100, 4096])
+    def test_partial_reads(self, amt):
+        fp = io.BytesIO(b'x' * 10000)
+        encoder = MultipartEncoder(self._fields(fp), boundary=BOUNDARY)
+
+        chunks = []
+        while True:
+            chunk = encoder.read(amt)
+            if not chunk:
+                break
+            assert len(chunk) <= amt
+            chunks.append(chunk)
+
+        assert len(b''.join(chunks)) == encoder.content_length
+        assert encoder.tell() == encoder.content_length
+
+    @pytest.mark.parametrize('pos', [0, 10, 150, 5000, -5])
+    def test_seek(self, pos):
+        fp = io.BytesIO(b'x' * 10000)
+        encoder = MultipartEncoder(self._fields(fp), boundary=BOUNDARY)
+        expected = encoder.read()
+        if pos < 0:
+            pos += len(expected)
+
+        assert encoder.seek(pos) == pos
+        assert encoder.tell() == pos
+        assert encoder.read() == expected[pos:]
+
+    def test_unknown_file_size(self):
+        class Unseekable(object):
+            def __init__(self):
+                self._fp = io.BytesIO(b'data')
+
+            def read(self, amt=-1):
+                return self._fp.read(amt)
+
+        encoder = MultipartEncoder(self._fields(Unseekable()), boundary=BOUNDARY)
+        expected, _ = encode_multipart_formdata(self._fields(b'data'), boundary=BOUNDARY)
+        assert encoder.content_length is None
+        assert b''.join(encoder) == expected
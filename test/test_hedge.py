@@ -0,0 +1,46 @@
+import pytest
+
+from urllib3.util.hedge import Hedge
+from urllib3.util.retry import Retry
+
+
+class TestHedge(object):
+
+    def test_string(self):
+        assert str(Hedge()) == 'Hedge(delay=None, percentile=95, max_hedges=1)'
+
+    def test_invalid_percentile(self):
+        with pytest.raises(ValueError):
+            Hedge(percentile=101)
+        with pytest.raises(ValueError):
+            Hedge(percentile=-1)
+
+    def test_delay_before_enough_samples(self):
+        hedge = Hedge(delay=0.5, min_samples=3)
+        assert hedge.get_delay([]) == 0.5
+        assert hedge.get_delay([0.1, 0.2]) == 0.5
+        assert Hedge(min_samples=3).get_delay([0.1]) is None
+
+    def test_percentile_delay(self):
+        times = [i / 100.0 for i in range(100, 0, -1)]
+        assert Hedge(percentile=95).get_delay(times) == 0.95
+        assert Hedge(percentile=50).get_delay(times) == 0.5
+        assert Hedge(percentile=100).get_delay(times) == 1.0
+        assert Hedge(percentile=0).get_delay(times) == 0.01
+
+        assert Hedge(percentile=90, min_samples=1).get_delay([0.3]) == 0.3
+
+    def test_is_hedged(self):
+        hedge = Hedge()
+        for method in Retry.DEFAULT_METHOD_WHITELIST:
+            assert hedge.is_hedged(method)
+        assert hedge.is_hedged('get')
+        assert not hedge.is_hedged('POST')
+        assert not hedge.is_hedged('PATCH')
+
+        assert hedge.is_hedged('PUT', b'body')
+        assert hedge.is_hedged('PUT', u'body')
+        assert not hedge.is_hedged('PUT', iter([b'body']))
+
+        assert Hedge(method_whitelist=['POST']).is_hedged('POST')
+        assert not Hedge(max_hedges=0).is_hedged('GET')
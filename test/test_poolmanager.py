@@ -1,6 +1,10 @@
+import collections
 import socket
+import threading
+import time
 
 import pytest
+from mock import patch
 
 from urllib3.poolmanager import (
     PoolKey,
@@ -8,11 +12,39 @@ from urllib3.poolmanager import (
     PoolManager,
 )
 from urllib3 import connection_from_url
+from urllib3._collections import _disposer
 from urllib3.exceptions import (
     ClosedPoolError,
     LocationValueError,
 )
 from urllib3.util import retry, timeout
+from urllib3.util.circuit import CircuitBreaker
+from urllib3.util.hedge import Hedge
+from urllib3.util.url import parse_url
+
+
+class RecordingPoolManager(PoolManager):
+    """Answers requests itself, recording how many are in flight by host."""
+
+    def __init__(self, *args, **kw):
+        super(RecordingPoolManager, self).__init__(*args, **kw)
+        self.lock = threading.Lock()
+        self.in_flight = collections.defaultdict(int)
+        self.max_in_flight = collections.defaultdict(int)
+
+    def urlopen(self, method, url, **kw):
+        host = parse_url(url).host.lower()
+        with self.lock:
+            self.in_flight[host] += 1
+            self.max_in_flight[host] = max(self.max_in_flight[host],
+                                           self.in_flight[host])
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight[host] -= 1
+
+        if url.endswith('/fail'):
+            raise ValueError(url)
+        return method, url, kw.get('retries')
 
 
 class TestPoolManager(object):
@@ -106,6 +138,11 @@ class TestPoolManager(object):
             'block': True,
             'strict': True,
             'source_address': '127.0.0.1',
+            'chunk_size': 65536,
+            'fast_response_parser': True,
+            'fast_request_serializer': True,
+            'hedge': Hedge(delay=0.1),
+            'circuit_breaker': CircuitBreaker(),
         }
         p = PoolManager()
         conn_pools = [
@@ -139,6 +176,7 @@ class TestPoolManager(object):
             'cert_reqs': 'CERT_REQUIRED',
             'ca_certs': '/root/path_to_pem',
             'ssl_version': 'SSLv23_METHOD',
+            'alpn_protocols': ['h2', 'http/1.1'],
         }
         p = PoolManager()
         conn_pools = [
@@ -363,3 +401,209 @@ class TestPoolManager(object):
         p = PoolManager(strict=True)
         merged = p._merge_pool_kwargs({'invalid_key': None})
         assert p.connection_pool_kw == merged
+
+    def test_pool_key_from_host_matches_key_fn(self):
+        """Assert pool keys built from parts equal those of the key function"""
+        p = PoolManager(strict=True, headers={'a': 'b'},
+                        socket_options=[(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)])
+        overrides = [
+            None,
+            {'strict': False, 'block': True},
+            {'headers': {'c': 'd'}, 'socket_options': []},
+            {'strict': None, 'timeout': 3},
+        ]
+        for pool_kwargs in overrides:
+            for scheme, host, port in (('http', 'example.com', 80),
+                                       ('HTTPS', 'EXAMPLE.com', 8443)):
+                context = p._merge_pool_kwargs(pool_kwargs)
+                context.update(scheme=scheme, host=host, port=port)
+                key_fn = p.key_fn_by_scheme[scheme.lower()]
+                assert key_fn(context) == p._pool_key_from_host(
+                    scheme, host, port, pool_kwargs)
+
+    def test_pool_key_cache_follows_connection_pool_kw(self):
+        """Assert cached pool keys are dropped once connection_pool_kw changes"""
+        p = PoolManager(strict=True)
+        key = p._pool_key_from_host('http', 'example.com', 80)
+        assert key is p._pool_key_from_host('http', 'example.com', 80)
+
+        p.connection_pool_kw['strict'] = False
+        other_key = p._pool_key_from_host('http', 'example.com', 80)
+        assert other_key.key_strict is False
+        assert key != other_key
+
+        del p.connection_pool_kw['strict']
+        assert p._pool_key_from_host('http', 'example.com', 80).key_strict is None
+
+    def test_pool_key_cache_follows_nested_changes(self):
+        """Assert values of connection_pool_kw modified in place change the key"""
+        p = PoolManager(socket_options=[(1, 2, 3)])
+        p.connection_pool_kw['headers'] = {'X-Foo': 'foo'}
+        pool = p.connection_from_host('example.com')
+
+        p.connection_pool_kw['headers']['X-Foo'] = 'bar'
+        key = p._pool_key_from_host('http', 'example.com', 80)
+        assert key.key_headers == frozenset([('X-Foo', 'bar')])
+        other_pool = p.connection_from_host('example.com')
+        assert other_pool is not pool
+        assert other_pool.headers == {'X-Foo': 'bar'}
+
+        p.connection_pool_kw['socket_options'].append((4, 5, 6))
+        key = p._pool_key_from_host('http', 'example.com', 80)
+        assert key.key_socket_options == ((1, 2, 3), (4, 5, 6))
+
+    def test_pool_key_from_host_custom_key_fn(self):
+        """Assert custom key functions are left to build their own keys"""
+        p = PoolManager()
+        p.key_fn_by_scheme['http'] = lambda x: (x['host'],)
+        assert p._pool_key_from_host('http', 'example.com', 80) is None
+        assert p._pool_key_from_host('https', 'example.com', 443) is not None
+
+    def test_pool_kwargs_invalid_key(self):
+        """Assert overrides which aren't pool key fields are still checked"""
+        p = PoolManager()
+        pool = p.connection_from_host('example.com', pool_kwargs={'invalid_key': None})
+        assert pool is p.connection_from_host('example.com')
+        with pytest.raises(TypeError):
+            p.connection_from_host('example.com', pool_kwargs={'invalid_key': 1})
+
+    def test_connection_from_url_threads(self):
+        """Assert concurrent lookups of a host share a single pool"""
+        p = PoolManager()
+        pools = []
+
+        def lookup():
+            for _ in range(100):
+                pools.append(p.connection_from_url('http://example.com/'))
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert 1 == len(p.pools)
+        assert 800 == len(pools)
+        assert all(pool is pools[0] for pool in pools)
+
+    def test_pool_shards(self):
+        """Assert sharded pools are reused and bounded by num_pools"""
+        p = PoolManager(num_pools=4, pool_shards=2)
+        pools = [p.connection_from_host('%d.example.com' % i) for i in range(4)]
+        assert all(pool is p.connection_from_host('%d.example.com' % i)
+                   for i, pool in enumerate(pools))
+
+        for i in range(4, 8):
+            p.connection_from_host('%d.example.com' % i)
+        assert 4 == len(p.pools)
+
+    def test_pool_shards_more_than_num_pools(self):
+        """Assert a new pool isn't evicted when there are more shards than pools"""
+        p = PoolManager(num_pools=2, pool_shards=4)
+        for i in range(50):
+            pool = p.connection_from_host('%d.example.com' % i)
+            assert pool.pool is not None
+            conn = pool._get_conn()
+            pool._put_conn(conn)
+        assert 2 == len(p.pools)
+
+    def test_close_pools_in_background(self):
+        """Assert evicted pools are closed by the background disposer"""
+        p = PoolManager(num_pools=1, close_pools_in_background=True)
+        pool = p.connection_from_url('http://example.com/')
+        p.connection_from_url('http://other.example.com/')
+        _disposer.join()
+
+        assert pool.pool is None
+        with pytest.raises(ClosedPoolError):
+            pool._get_conn()
+
+    def test_request_many(self):
+        """Assert request_many yields the result of each request in order"""
+        p = RecordingPoolManager(maxsize=2)
+        requests = [
+            ('GET', 'http://a.example.com/0'),
+            ('POST', 'http://b.example.com/1', {'retries': 3}),
+            ('GET', 'http://a.example.com/fail'),
+            ('GET', 'http://a.example.com/3', {'retries': False}),
+        ]
+        results = list(p.request_many(requests, max_workers=4))
+
+        assert [i for i, _ in results] == [0, 1, 2, 3]
+        assert results[0][1] == ('GET', 'http://a.example.com/0', None)
+        assert results[1][1] == ('POST', 'http://b.example.com/1', 3)
+        assert isinstance(results[2][1], ValueError)
+        assert results[3][1] == ('GET', 'http://a.example.com/3', False)
+
+    def test_request_many_per_host_limit(self):
+        """Assert request_many keeps to the limit of requests to each host"""
+        p = RecordingPoolManager(maxsize=3)
+        requests = [('GET', 'http://%s.example.com/%d' % (host, i))
+                    for i in range(12) for host in 'ab']
+
+        results = list(p.request_many(requests, ordered=False))
+        assert sorted(i for i, _ in results) == list(range(24))
+        assert 0 < p.max_in_flight['a.example.com'] <= 3
+        assert 0 < p.max_in_flight['b.example.com'] <= 3
+
+        p.max_in_flight.clear()
+        list(p.request_many(requests, max_workers=8, per_host_limit=1))
+        assert p.max_in_flight['a.example.com'] == 1
+        assert p.max_in_flight['b.example.com'] == 1
+
+    def test_request_many_bounded_workers(self):
+        """Assert request_many starts no more threads than its pools can use"""
+        p = RecordingPoolManager(num_pools=3, maxsize=2)
+        requests = [('GET', 'http://%d.example.com/' % i) for i in range(50)]
+
+        started = []
+        start = threading.Thread.start
+
+        def record_start(thread):
+            started.append(thread)
+            start(thread)
+
+        with patch.object(threading.Thread, 'start', record_start):
+            results = list(p.request_many(requests))
+        assert len(results) == 50
+        assert len(started) == 6
+
+    def test_request_many_default_port(self):
+        """Assert requests to a host count against one limit whatever the port spelling"""
+        p = RecordingPoolManager(maxsize=1)
+        requests = [('GET', 'http://a.example.com/'), ('GET', 'http://A.example.com:80/'),
+                    ('GET', 'HTTP://a.example.com/')] * 4
+
+        list(p.request_many(requests, max_workers=8))
+        assert p.max_in_flight['a.example.com'] == 1
+
+    def test_request_many_invalid_url(self):
+        """Assert an invalid URL is a result like any other error"""
+        p = RecordingPoolManager()
+        results = list(p.request_many([('GET', 'http://a.example.com:port/'),
+                                       ('GET', 'http://a.example.com/')]))
+
+        assert isinstance(results[0][1], LocationValueError)
+        assert results[1][1] == ('GET', 'http://a.example.com/', None)
+
+    def test_request_many_empty(self):
+        p = PoolManager()
+        assert list(p.request_many([])) == []
+
+    @pytest.mark.parametrize('kw', [
+        {'max_workers': 0},
+        {'max_workers': -1},
+        {'per_host_limit': 0},
+        {'per_host_limit': -2},
+    ])
+    def test_request_many_invalid_limits(self, kw):
+        """Assert request_many refuses limits that would leave it waiting forever"""
+        p = RecordingPoolManager()
+        with pytest.raises(ValueError):
+            p.request_many([('GET', 'http://a.example.com/')], **kw)
+
+    def test_request_many_bad_url_type(self):
+        """Assert request_many only turns invalid URLs into results"""
+        p = RecordingPoolManager()
+        with pytest.raises((AttributeError, TypeError)):
+            p.request_many([('GET', 42)])
@@ -1,6 +1,12 @@
+import mock
 import pytest
 
 from urllib3.poolmanager import ProxyManager
+from urllib3.util.url import (
+    Url,
+    clear_parse_url_cache,
+    parse_url_cache_info,
+)
 
 
 class TestProxyManager(object):
@@ -32,6 +38,20 @@ class TestProxyManager(object):
 
             assert headers == expected_headers
 
+    def test_url_parsed_once(self):
+        url = 'http://pypi.python.org/test'
+        with ProxyManager('http://something:1234') as p:
+            pool = p.connection_from_url(url)
+            with mock.patch.object(pool, 'urlopen') as urlopen:
+                urlopen.return_value.get_redirect_location.return_value = False
+                clear_parse_url_cache()
+                p.urlopen('GET', url)
+
+            assert parse_url_cache_info().misses == 1
+            args, kwargs = urlopen.call_args
+            assert args[1] == Url('http', host='pypi.python.org', path='/test')
+            assert kwargs['headers']['Host'] == 'pypi.python.org'
+
     def test_default_port(self):
         with ProxyManager('http://something') as p:
             assert p.proxy.port == 80
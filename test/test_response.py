@@ -1,3 +1,4 @@
+import email.message
 import socket
 
 from io import BytesIO, BufferedReader
@@ -9,6 +10,7 @@ from urllib3.response import HTTPResponse
 from urllib3.exceptions import (
     DecodeError, ResponseNotChunked, ProtocolError, InvalidHeader
 )
+from urllib3.packages import six
 from urllib3.packages.six.moves import http_client as httplib
 from urllib3.util.retry import Retry
 from urllib3.util.response import is_fp_closed
@@ -629,6 +631,38 @@ class TestResponse(object):
         assert r.headers.get('host') == 'example.com'
         assert r.headers.get('Host') == 'example.com'
 
+    def test_from_httplib_converts_headers_lazily(self):
+        class RawSock(object):
+            def makefile(self, *args, **kwargs):
+                return BytesIO(b'HTTP/1.1 200 OK\r\n'
+                               b'Content-Length: 3\r\n'
+                               b'Set-Cookie: a=1\r\n'
+                               b'set-cookie: b=2\r\n'
+                               b'\r\n'
+                               b'foo')
+
+        r = httplib.HTTPResponse(RawSock())
+        r.begin()
+        resp = HTTPResponse.from_httplib(r)
+        assert resp.data == b'foo'
+        assert resp.getheader('SET-COOKIE') == 'a=1, b=2'
+        assert resp.getheader('missing') is None
+        assert resp._headers is None
+
+        assert resp.headers.getlist('set-cookie') == ['a=1', 'b=2']
+        assert resp.headers['content-length'] == '3'
+        assert resp.headers is resp.getheaders()
+
+    @pytest.mark.skipif(six.PY2, reason='Python 2 messages are mimetools.Message')
+    def test_from_httplib_other_message(self):
+        msg = email.message.Message()
+        msg['Set-Cookie'] = 'a=1'
+        msg['Set-Cookie'] = 'b=2'
+        r = mock.Mock(msg=msg, status=200, version=11, reason='OK')
+
+        resp = HTTPResponse.from_httplib(r, preload_content=False)
+        assert resp.headers.getlist('set-cookie') == ['a=1', 'b=2']
+
     def test_retries(self):
         fp = BytesIO(b'')
         resp = HTTPResponse(fp)
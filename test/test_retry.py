@@ -1,8 +1,10 @@
+import random
+
 import pytest
 
 from urllib3.response import HTTPResponse
 from urllib3.packages.six.moves import xrange
-from urllib3.util.retry import Retry, RequestHistory
+from urllib3.util.retry import Retry, RetryBudget, RequestHistory
 from urllib3.exceptions import (
     ConnectTimeoutError,
     MaxRetryError,
@@ -130,6 +132,54 @@ class TestRetry(object):
 
         assert retry.get_backoff_time() == max_backoff
 
+    def test_backoff_jitter(self):
+        retry = Retry(total=100, backoff_factor=0.2, backoff_jitter='full',
+                      rng=random.Random(0))
+        retry = retry.increment(method='GET')
+        assert retry.get_backoff_time() == 0  # First retry
+
+        expected = random.Random(0)
+        for backoff in (0.4, 0.8, 1.6):
+            retry = retry.increment(method='GET')
+            assert retry.get_backoff_time() == expected.uniform(0, backoff)
+            # Drawn once per retry
+            assert retry.get_backoff_time() == retry.get_backoff_time()
+
+        retry = Retry(total=100, backoff_factor=0.2, backoff_jitter='equal',
+                      rng=random.Random(0))
+        retry = retry.increment(method='GET').increment(method='GET')
+        assert retry.get_backoff_time() == 0.2 + random.Random(0).uniform(0, 0.2)
+
+        retry = Retry(total=100, backoff_factor=1, backoff_jitter='full')
+        for _ in xrange(20):
+            retry = retry.increment(method='GET')
+            assert 0 <= retry.get_backoff_time() <= Retry.BACKOFF_MAX
+
+    def test_decorrelated_backoff_jitter(self):
+        retry = Retry(total=100, backoff_factor=0.2, backoff_jitter='decorrelated',
+                      rng=random.Random(0))
+        retry = retry.increment(method='GET')
+        assert retry.get_backoff_time() == 0
+
+        expected = random.Random(0)
+        previous = 0.2
+        for _ in xrange(30):
+            retry = retry.increment(method='GET')
+            backoff = min(Retry.BACKOFF_MAX, expected.uniform(0.2, previous * 3))
+            assert retry.get_backoff_time() == backoff
+            previous = backoff
+        assert previous == Retry.BACKOFF_MAX
+
+        # A redirect starts over
+        response = HTTPResponse(status=302, headers={'Location': '/'})
+        retry = retry.increment(method='GET', response=response)
+        retry = retry.increment(method='GET').increment(method='GET')
+        assert 0.2 <= retry.get_backoff_time() <= 0.6
+
+    def test_invalid_backoff_jitter(self):
+        with pytest.raises(ValueError):
+            Retry(backoff_jitter='partial')
+
     def test_zero_backoff(self):
         retry = Retry()
         assert retry.get_backoff_time() == 0
@@ -249,3 +299,42 @@ class TestRetry(object):
         retry = Retry()
         with pytest.raises(ReadTimeoutError):
             retry.increment(method='POST', error=error)
+
+    def test_budget(self):
+        budget = RetryBudget(max_tokens=2, token_ratio=0.5)
+        retry = Retry(total=10, budget=budget)
+        error = ConnectTimeoutError('conntimeout')
+
+        retry = retry.increment(error=error)
+        retry = retry.increment(error=error)
+        assert retry.budget is budget
+        assert budget.tokens == 0
+
+        with pytest.raises(MaxRetryError) as e:
+            retry.increment(error=error)
+        assert e.value.reason == error
+
+        # Two successful requests earn back a retry, never more than max_tokens
+        budget.deposit()
+        with pytest.raises(MaxRetryError):
+            retry.increment(error=error)
+        budget.deposit()
+        retry = retry.increment(error=error)
+
+        for _ in range(10):
+            budget.deposit()
+        assert budget.tokens == 2
+
+    def test_budget_redirects_are_free(self):
+        budget = RetryBudget(max_tokens=0)
+        retry = Retry(total=10, budget=budget)
+
+        response = HTTPResponse(status=303, headers={'Location': '/'})
+        retry = retry.increment('GET', '/', response=response)
+        assert retry.total == 9
+
+        response = HTTPResponse(status=500)
+        with pytest.raises(MaxRetryError) as e:
+            retry.increment('GET', '/', response=response)
+        msg = ResponseError.SPECIFIC_ERROR.format(status_code=500)
+        assert str(e.value.reason) == msg
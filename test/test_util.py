@@ -4,19 +4,29 @@ import logging
 import io
 import ssl
 import socket
+import zlib
 from itertools import chain
 
 from mock import patch, Mock
 import pytest
 
 from urllib3 import add_stderr_logger, disable_warnings
-from urllib3.util.request import make_headers, rewind_body, _FAILEDTELL
+from urllib3.util.request import (
+    make_headers,
+    rewind_body,
+    encode_body,
+    _FAILEDTELL,
+)
 from urllib3.util.response import assert_header_parsing
 from urllib3.util.retry import Retry
 from urllib3.util.timeout import Timeout
 from urllib3.util.url import (
+    clear_parse_url_cache,
     get_host,
     parse_url,
+    parse_url_cache_info,
+    PARSE_URL_CACHE_SIZE,
+    set_parse_url_cache_size,
     split_first,
     Url,
 )
@@ -200,6 +210,51 @@ class TestUtil(object):
         with pytest.raises(ValueError):
             parse_url('[::1')
 
+    def test_parse_url_cache(self):
+        clear_parse_url_cache()
+        url = 'http://cache.example.com:8080/path?q'
+        first = parse_url(url)
+        assert parse_url(url) is first
+        assert get_host(url) == ('http', 'cache.example.com', 8080)
+
+        info = parse_url_cache_info()
+        assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+
+        with pytest.raises(LocationParseError):
+            parse_url('http://cache.example.com:bad/')
+        with pytest.raises(LocationParseError):
+            parse_url('http://cache.example.com:bad/')
+        info = parse_url_cache_info()
+        assert (info.hits, info.misses, info.currsize) == (2, 3, 1)
+
+        clear_parse_url_cache()
+        assert parse_url_cache_info()[:2] == (0, 0)
+        assert parse_url(url) == first
+
+        # Already parsed urls are passed through as they are
+        assert parse_url(first) is first
+        assert get_host(first) == ('http', 'cache.example.com', 8080)
+        assert parse_url_cache_info()[:2] == (0, 1)
+
+    def test_set_parse_url_cache_size(self):
+        try:
+            set_parse_url_cache_size(2)
+            urls = ['http://%d.example.com/' % i for i in range(3)]
+            for url in urls:
+                parse_url(url)
+            assert parse_url_cache_info()[1:] == (3, 2, 2)
+
+            # The oldest url was evicted
+            parse_url(urls[2])
+            parse_url(urls[0])
+            assert parse_url_cache_info()[:2] == (1, 4)
+
+            set_parse_url_cache_size(0)
+            parse_url(urls[0])
+            assert parse_url_cache_info() == (0, 1, 0, 0)
+        finally:
+            set_parse_url_cache_size(PARSE_URL_CACHE_SIZE)
+
     def test_Url_str(self):
         U = Url('http', host='google.com')
         assert str(U) == U.url
@@ -294,6 +349,36 @@ class TestUtil(object):
         with pytest.raises(UnrewindableBodyError):
             rewind_body(BadSeek(), body_pos=2)
 
+    @pytest.mark.parametrize('content_encoding, wbits', [
+        ('gzip', 16 + zlib.MAX_WBITS),
+        ('deflate', zlib.MAX_WBITS),
+        ('GZIP', 16 + zlib.MAX_WBITS),
+    ])
+    def test_encode_body_string(self, content_encoding, wbits):
+        encoded = encode_body(u'test data', content_encoding)
+        assert isinstance(encoded, six.binary_type)
+        assert zlib.decompress(encoded, wbits) == b'test data'
+
+    def test_encode_body_file(self):
+        body = io.BytesIO(b'skip' + b'x' * 100000)
+        body.read(4)
+
+        encoded = encode_body(body, 'gzip')
+        assert not isinstance(encoded, six.binary_type)
+        # Nothing is read until the body is consumed.
+        assert body.tell() == 4
+
+        data = b''.join(encoded)
+        assert zlib.decompress(data, 16 + zlib.MAX_WBITS) == b'x' * 100000
+
+    def test_encode_body_iterable(self):
+        encoded = encode_body([b'foo', u'bar', b'', b'baz'], 'deflate')
+        assert zlib.decompress(b''.join(encoded)) == b'foobarbaz'
+
+    def test_encode_body_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            encode_body(b'test data', 'br')
+
     @pytest.mark.parametrize('input, expected', [
         (('abcd', 'b'),  ('a', 'cd', 'b')),
         (('abcd', 'cb'), ('a', 'cd', 'b')),
@@ -471,7 +556,7 @@ class TestUtil(object):
         ssl_wrap_socket(sock=socket, cert_reqs='CERT_REQUIRED')
 
         create_urllib3_context.assert_called_once_with(
-            None, 'CERT_REQUIRED', ciphers=None
+            None, 'CERT_REQUIRED', ciphers=None, alpn_protocols=None
         )
 
     def test_ssl_wrap_socket_loads_verify_locations(self):
@@ -492,6 +577,48 @@ class TestUtil(object):
             None, '/path/to/pems'
         )
 
+    @patch('urllib3.util.ssl_.create_urllib3_context')
+    def test_ssl_wrap_socket_sets_alpn_protocols(self,
+                                                 create_urllib3_context):
+        socket = object()
+        ssl_wrap_socket(sock=socket, alpn_protocols=('h2', 'http/1.1'))
+        create_urllib3_context.assert_called_once_with(
+            None, None, ciphers=None, alpn_protocols=('h2', 'http/1.1')
+        )
+
+        # A context that is passed in is left as it is
+        mock_context = Mock()
+        ssl_wrap_socket(ssl_context=mock_context, sock=socket,
+                        alpn_protocols=['h2'])
+        assert not mock_context.set_alpn_protocols.called
+
+    def test_set_alpn_protocols(self):
+        mock_context = Mock()
+        ssl_._set_alpn_protocols(mock_context, ('h2', 'http/1.1'))
+        mock_context.set_alpn_protocols.assert_called_once_with(
+            ['h2', 'http/1.1']
+        )
+
+        # Contexts without ALPN support are left as they are
+        ssl_._set_alpn_protocols(Mock(spec=[]), ['h2'])
+
+        for error in (AttributeError, NotImplementedError):
+            mock_context = Mock()
+            mock_context.set_alpn_protocols.side_effect = error
+            ssl_._set_alpn_protocols(mock_context, ['h2'])
+
+    def test_selected_alpn_protocol(self):
+        sock = Mock()
+        sock.selected_alpn_protocol.return_value = 'h2'
+        assert ssl_.selected_alpn_protocol(sock) == 'h2'
+        assert ssl_.selected_alpn_protocol(object()) is None
+
+    @pytest.mark.parametrize('error', [AttributeError, NotImplementedError])
+    def test_selected_alpn_protocol_unsupported(self, error):
+        sock = Mock()
+        sock.selected_alpn_protocol.side_effect = error
+        assert ssl_.selected_alpn_protocol(sock) is None
+
     def test_ssl_wrap_socket_with_no_sni_warns(self):
         socket = object()
         mock_context = Mock()
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import zlib
 
 from urllib3 import HTTPConnectionPool
 from urllib3.packages import six
@@ -105,3 +106,35 @@ class TestChunkedTransfer(SocketDummyServerTestCase):
 
         host_headers = [x for x in header_lines if x.startswith(b'host')]
         self.assertEqual(len(host_headers), 1)
+
+    def test_gzip_iterable_body(self):
+        self.start_chunked_handler()
+        chunks = [b'foo', b'bar', b'', b'bazzzzzzzzzzzzzzzzzzzzzz']
+        pool = HTTPConnectionPool(self.host, self.port, retries=False)
+        self.addCleanup(pool.close)
+        pool.urlopen('POST', '/', (c for c in chunks), content_encoding='gzip')
+
+        header, body = self.buffer.split(b'\r\n\r\n', 1)
+        header_lines = header.split(b'\r\n')
+        self.assertTrue(b'Transfer-Encoding: chunked' in header_lines)
+        self.assertTrue(b'Content-Encoding: gzip' in header_lines)
+
+        data = b''
+        while True:
+            len_str, body = body.split(b'\r\n', 1)
+            length = int(len_str, 16)
+            if not length:
+                break
+            data += body[:length]
+            body = body[length + 2:]
+        self.assertEqual(zlib.decompress(data, 16 + zlib.MAX_WBITS), b''.join(chunks))
+
+    def test_chunk_size(self):
+        self.start_chunked_handler()
+        chunks = [b'foo', b'bar', b'', b'baz']
+        pool = HTTPConnectionPool(self.host, self.port, retries=False, chunk_size=1024)
+        self.addCleanup(pool.close)
+        pool.urlopen('POST', '/', chunks, chunked=True)
+
+        body = self.buffer.split(b'\r\n\r\n', 1)[1]
+        self.assertEqual(body, b'6\r\nfoobar\r\n3\r\nbaz\r\n0\r\n\r\n')
@@ -5,6 +5,7 @@ import sys
 import unittest
 import time
 import warnings
+import zlib
 
 import mock
 
@@ -20,6 +21,7 @@ from urllib3.exceptions import (
     ConnectTimeoutError,
     EmptyPoolError,
     DecodeError,
+    HostChangedError,
     MaxRetryError,
     ReadTimeoutError,
     NewConnectionError,
@@ -27,7 +29,7 @@ from urllib3.exceptions import (
 )
 from urllib3.packages.six import b, u
 from urllib3.packages.six.moves.urllib.parse import urlencode
-from urllib3.util.retry import Retry, RequestHistory
+from urllib3.util.retry import Retry, RetryBudget, RequestHistory
 from urllib3.util.timeout import Timeout
 
 from dummyserver.testcase import HTTPDummyServerTestCase, SocketDummyServerTestCase
@@ -284,6 +286,28 @@ class TestConnectionPool(HTTPDummyServerTestCase):
         fields = [('hi', 'hello')]
         self.assertRaises(TypeError, self.pool.request, 'POST', '/echo', body=body, fields=fields)
 
+    def test_upload_streamed_file(self):
+        data = b'I\'m in ur multipart form-data, hazing a cheezburgr' * 1000
+        fields = {
+            'upload_param': 'filefield',
+            'upload_filename': 'lolcat.txt',
+            'upload_size': len(data),
+            'filefield': ('lolcat.txt', io.BytesIO(data)),
+        }
+
+        r = self.pool.request('POST', '/upload', fields=fields)
+        self.assertEqual(r.status, 200, r.data)
+
+    def test_request_body_content_encoding(self):
+        body = b'hi' * 1000
+        r = self.pool.request('POST', '/echo', body=body, content_encoding='gzip')
+        self.assertEqual(zlib.decompress(r.data, 16 + zlib.MAX_WBITS), body)
+        self.assertTrue(len(r.data) < len(body))
+
+        r = self.pool.request('POST', '/echo', body=io.BytesIO(body),
+                              content_encoding='deflate')
+        self.assertEqual(zlib.decompress(r.data), body)
+
     def test_unicode_upload(self):
         fieldname = u('myfile')
         filename = u('\xe2\x99\xa5.txt')
@@ -434,6 +458,67 @@ class TestConnectionPool(HTTPDummyServerTestCase):
         self.assertEqual(pool.num_connections, 1)
         self.assertEqual(pool.num_requests, 2)
 
+    def test_keepalive_fast_response_parser(self):
+        pool = HTTPConnectionPool(self.host, self.port, block=True, maxsize=1,
+                                  fast_response_parser=True)
+        self.addCleanup(pool.close)
+
+        r = pool.request('GET', '/keepalive?close=0')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(r.data, b'Keeping alive')
+        self.assertEqual(r.headers['Connection'], 'keep-alive')
+
+        r = pool.request('GET', '/keepalive?close=0')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(pool.num_connections, 1)
+        self.assertEqual(pool.num_requests, 2)
+
+    def test_pipeline(self):
+        for fast in (False, True):
+            pool = HTTPConnectionPool(self.host, self.port, block=True, maxsize=1,
+                                      fast_response_parser=fast)
+            self.addCleanup(pool.close)
+
+            requests = [('GET', '/echo?i=%d' % i) for i in range(10)]
+            requests.append(('HEAD', '/'))
+            requests.append(('PUT', '/echo', b'put body'))
+            responses = pool.pipeline(requests, depth=4)
+
+            self.assertEqual([r.data for r in responses[:10]],
+                             [('i=%d' % i).encode('ascii') for i in range(10)])
+            self.assertEqual(responses[10].status, 200)
+            self.assertEqual(responses[11].data, b'put body')
+            self.assertEqual(pool.num_connections, 1)
+            self.assertEqual(pool.num_requests, 12)
+
+            # The connection is reusable afterwards
+            r = pool.request('GET', '/keepalive?close=0')
+            self.assertEqual(r.data, b'Keeping alive')
+            self.assertEqual(pool.num_connections, 1)
+
+    def test_pipeline_connection_close(self):
+        pool = HTTPConnectionPool(self.host, self.port, block=True, maxsize=1)
+        self.addCleanup(pool.close)
+
+        requests = [('GET', '/echo?a=1'), ('GET', '/keepalive?close=1'),
+                    ('GET', '/echo?a=2'), ('GET', '/echo?a=3')]
+        responses = pool.pipeline(requests, retries=False)
+
+        self.assertEqual([r.data for r in responses],
+                         [b'a=1', b'Closing', b'a=2', b'a=3'])
+        # The requests after the one closing the connection are sent again
+        self.assertEqual(pool.num_connections, 2)
+        self.assertEqual(pool.num_requests, 6)
+
+    def test_pipeline_not_retryable(self):
+        pool = HTTPConnectionPool(self.host, self.port)
+        self.addCleanup(pool.close)
+
+        self.assertRaises(ValueError, pool.pipeline, [('GET', '/'), ('POST', '/')])
+        self.assertRaises(HostChangedError, pool.pipeline,
+                          [('GET', 'http://example.com/')])
+        self.assertEqual(pool.num_requests, 0)
+
     def test_keepalive_close(self):
         pool = HTTPConnectionPool(self.host, self.port,
                                   block=True, maxsize=1, timeout=2)
@@ -825,6 +910,31 @@ class TestRetry(HTTPDummyServerTestCase):
                                  headers=headers, retries=retry)
         self.assertEqual(resp.status, 200)
 
+    def test_retry_budget(self):
+        budget = RetryBudget(max_tokens=1, token_ratio=0.5)
+        retry = Retry(total=1, status_forcelist=[418], raise_on_status=False,
+                      budget=budget)
+        pool = HTTPConnectionPool(self.host, self.port, retries=retry)
+        self.addCleanup(pool.close)
+
+        resp = pool.request('GET', '/successful_retry',
+                            headers={'test-name': 'test_retry_budget_1'})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(budget.tokens, 0.5)
+
+        # The budget is spent, so the request is not retried
+        resp = pool.request('GET', '/successful_retry',
+                            headers={'test-name': 'test_retry_budget_2'})
+        self.assertEqual(resp.status, 418)
+
+        resp = pool.request('GET', '/')
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(budget.tokens, 1)
+
+        resp = pool.request('GET', '/successful_retry',
+                            headers={'test-name': 'test_retry_budget_3'})
+        self.assertEqual(resp.status, 200)
+
     def test_retry_return_in_response(self):
         headers = {'test-name': 'test_retry_return_in_response'}
         retry = Retry(total=2, status_forcelist=[418])
@@ -34,6 +34,21 @@ class TestPoolManager(HTTPDummyServerTestCase):
         self.assertEqual(r.status, 200)
         self.assertEqual(r.data, b'Dummy server!')
 
+    def test_request_many(self):
+        http = PoolManager(maxsize=2)
+        self.addCleanup(http.clear)
+
+        requests = [('POST', '%s/echo' % self.base_url, {'body': str(i)})
+                    for i in range(10)]
+        requests.append(('GET', '%s/not_found' % self.base_url_alt))
+        results = list(http.request_many(requests))
+
+        self.assertEqual([i for i, _ in results], list(range(11)))
+        self.assertEqual([r.data for _, r in results[:10]],
+                         [str(i).encode() for i in range(10)])
+        self.assertEqual(results[10][1].status, 404)
+        self.assertEqual(len(http.pools), 2)
+
     def test_redirect_twice(self):
         http = PoolManager()
         self.addCleanup(http.clear)
@@ -2,8 +2,9 @@
 # rather than the socket level-ness of it.
 
 from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
-from urllib3.poolmanager import proxy_from_url
+from urllib3.poolmanager import PoolManager, proxy_from_url
 from urllib3.exceptions import (
+        CircuitOpenError,
         MaxRetryError,
         ProxyError,
         ReadTimeoutError,
@@ -11,6 +12,8 @@ from urllib3.exceptions import (
         ProtocolError,
 )
 from urllib3.response import httplib
+from urllib3.util.circuit import CircuitBreaker
+from urllib3.util.hedge import Hedge
 from urllib3.util.ssl_ import HAS_SNI
 from urllib3.util.timeout import Timeout
 from urllib3.util.retry import Retry
@@ -28,9 +31,13 @@ except ImportError:
     class MimeToolMessage(object):
         pass
 from threading import Event
+import os
 import select
+import shutil
 import socket
 import ssl
+import tempfile
+import time
 
 import pytest
 
@@ -1469,3 +1476,259 @@ class TestRetryPoolSizeDrainFail(SocketDummyServerTestCase):
 
         pool.urlopen('GET', '/not_found', preload_content=False)
         self.assertEquals(pool.num_connections, 1)
+
+
+class TestFileBody(SocketDummyServerTestCase):
+
+    def _start_upload_handler(self):
+        self.received = b''
+
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+
+            buf = b''
+            while b'\r\n\r\n' not in buf:
+                buf += sock.recv(65536)
+            header, body = buf.split(b'\r\n\r\n', 1)
+
+            lines = [line.split(b': ', 1) for line in header.split(b'\r\n')[1:]]
+            length = int(dict((k.lower(), v) for k, v in lines)[b'content-length'])
+            while len(body) < length:
+                body += sock.recv(65536)
+            self.received = body
+
+            sock.send(
+                b'HTTP/1.1 200 OK\r\n'
+                b'Content-Length: 0\r\n'
+                b'\r\n')
+            sock.close()
+
+        self._start_server(socket_handler)
+
+    def _temp_file(self, data):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'upload.bin')
+        with open(path, 'wb') as fp:
+            fp.write(data)
+        return path
+
+    def test_file_body(self):
+        data = b'x' * 100000 + b'tail'
+        self._start_upload_handler()
+
+        pool = HTTPConnectionPool(self.host, self.port, retries=False)
+        self.addCleanup(pool.close)
+        with open(self._temp_file(data), 'rb') as fp:
+            fp.read(4)
+            pool.urlopen('PUT', '/', body=fp)
+            self.assertEqual(fp.tell(), len(data))
+
+        self.assertEqual(self.received, data[4:])
+
+
+class TestPipelining(SocketDummyServerTestCase):
+
+    def _answer_first(self, listener, num_requests):
+        # Answer the first of the requests, then drop the connection
+        sock = listener.accept()[0]
+        buf = b''
+        while buf.count(b'\r\n\r\n') < num_requests:
+            buf += sock.recv(65536)
+        sock.send(b'HTTP/1.1 200 OK\r\n'
+                  b'Content-Length: 1\r\n'
+                  b'\r\n'
+                  b'0')
+        sock.close()
+
+    def test_retry_unanswered_requests(self):
+        def socket_handler(listener):
+            self._answer_first(listener, 3)
+
+            sock = listener.accept()[0]
+            buf = b''
+            while buf.count(b'\r\n\r\n') < 2:
+                buf += sock.recv(65536)
+            sock.send(b'HTTP/1.1 200 OK\r\n'
+                      b'Content-Length: 1\r\n'
+                      b'\r\n'
+                      b'1'
+                      b'HTTP/1.1 200 OK\r\n'
+                      b'Content-Length: 1\r\n'
+                      b'\r\n'
+                      b'2')
+            sock.close()
+
+        self._start_server(socket_handler)
+        pool = HTTPConnectionPool(self.host, self.port, timeout=2)
+        self.addCleanup(pool.close)
+
+        responses = pool.pipeline([('GET', '/0'), ('GET', '/1'), ('GET', '/2')],
+                                  retries=Retry(total=1))
+        self.assertEqual([r.data for r in responses], [b'0', b'1', b'2'])
+        self.assertEqual(pool.num_connections, 2)
+
+    def test_dropped_connection_without_retries(self):
+        self._start_server(lambda listener: self._answer_first(listener, 3))
+        pool = HTTPConnectionPool(self.host, self.port, timeout=2)
+        self.addCleanup(pool.close)
+
+        self.assertRaises(ProtocolError, pool.pipeline,
+                          [('GET', '/0'), ('GET', '/1'), ('GET', '/2')],
+                          retries=False)
+
+
+class TestHedging(SocketDummyServerTestCase):
+
+    def test_slow_response_is_hedged(self):
+        done = Event()
+        self.addCleanup(done.set)
+        slow_closed = Event()
+
+        def socket_handler(listener):
+            slow = listener.accept()[0]
+            consume_socket(slow)
+
+            fast = listener.accept()[0]
+            consume_socket(fast)
+            fast.send(b'HTTP/1.1 200 OK\r\n'
+                      b'Content-Length: 4\r\n'
+                      b'\r\n'
+                      b'fast')
+
+            # The slow response is discarded along with its connection
+            done.wait(5)
+            slow.send(b'HTTP/1.1 200 OK\r\n'
+                      b'Content-Length: 4\r\n'
+                      b'\r\n'
+                      b'slow')
+            if not slow.recv(65536):
+                slow_closed.set()
+            slow.close()
+            fast.close()
+
+        self._start_server(socket_handler)
+        pool = HTTPConnectionPool(self.host, self.port, maxsize=2, timeout=2,
+                                  hedge=Hedge(delay=0.05))
+        self.addCleanup(pool.close)
+
+        r = pool.request('GET', '/')
+        self.assertEqual(r.data, b'fast')
+        self.assertEqual(pool.num_connections, 2)
+
+        done.set()
+        self.assertTrue(slow_closed.wait(5))
+        self.assertEqual(len(pool._response_times), 2)
+
+    def test_not_idempotent_not_hedged(self):
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            consume_socket(sock)
+            time.sleep(0.2)
+            sock.send(b'HTTP/1.1 200 OK\r\n'
+                      b'Content-Length: 0\r\n'
+                      b'\r\n')
+            sock.close()
+
+        self._start_server(socket_handler)
+        pool = HTTPConnectionPool(self.host, self.port, timeout=2,
+                                  hedge=Hedge(delay=0.01))
+        self.addCleanup(pool.close)
+
+        r = pool.request('POST', '/', body=b'')
+        self.assertEqual(r.status, 200)
+        self.assertEqual(pool.num_connections, 1)
+
+    def test_no_hedging_before_enough_samples(self):
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            for _ in range(2):
+                consume_socket(sock)
+                time.sleep(0.1)
+                sock.send(b'HTTP/1.1 200 OK\r\n'
+                          b'Content-Length: 0\r\n'
+                          b'\r\n')
+            sock.close()
+
+        self._start_server(socket_handler)
+        pool = HTTPConnectionPool(self.host, self.port, timeout=2,
+                                  hedge=Hedge(min_samples=3))
+        self.addCleanup(pool.close)
+
+        for _ in range(2):
+            r = pool.request('GET', '/')
+            self.assertEqual(r.status, 200)
+        self.assertEqual(pool.num_connections, 1)
+        self.assertEqual(len(pool._response_times), 2)
+
+    def test_all_attempts_fail(self):
+        def socket_handler(listener):
+            socks = []
+            for _ in range(2):
+                sock = listener.accept()[0]
+                consume_socket(sock)
+                socks.append(sock)
+            for sock in socks:
+                sock.close()
+
+        self._start_server(socket_handler)
+        pool = HTTPConnectionPool(self.host, self.port, maxsize=2, timeout=2,
+                                  retries=False, hedge=Hedge(delay=0.05))
+        self.addCleanup(pool.close)
+
+        self.assertRaises(ProtocolError, pool.request, 'GET', '/')
+        self.assertEqual(pool.num_connections, 2)
+
+
+class TestCircuitBreaker(SocketDummyServerTestCase):
+
+    def test_circuit_opens_and_recovers(self):
+        def socket_handler(listener):
+            # Drop the first two connections without a response
+            for _ in range(2):
+                sock = listener.accept()[0]
+                consume_socket(sock)
+                sock.close()
+
+            sock = listener.accept()[0]
+            consume_socket(sock)
+            sock.send(b'HTTP/1.1 200 OK\r\n'
+                      b'Content-Length: 2\r\n'
+                      b'\r\n'
+                      b'ok')
+            sock.close()
+
+        self._start_server(socket_handler)
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+        pool = HTTPConnectionPool(self.host, self.port, circuit_breaker=breaker)
+        self.addCleanup(pool.close)
+
+        # Retries stop as soon as the circuit opens
+        with pytest.raises(CircuitOpenError):
+            pool.request('GET', '/', retries=5)
+        self.assertEqual(pool.num_connections, 2)
+
+        with pytest.raises(CircuitOpenError):
+            pool.request('GET', '/')
+
+        time.sleep(0.2)
+        r = pool.request('GET', '/', retries=0)
+        self.assertEqual(r.data, b'ok')
+        self.assertFalse(breaker.is_open(pool))
+
+    def test_unreachable_host(self):
+        host, port = get_unreachable_address()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+        http = PoolManager(circuit_breaker=breaker)
+        self.addCleanup(http.clear)
+        url = 'http://%s:%d/' % (host, port)
+
+        with pytest.raises(MaxRetryError):
+            http.request('GET', url, retries=0)
+        with pytest.raises(CircuitOpenError):
+            http.request('GET', url, retries=0)
+
+        # The circuit is kept for the host, not the pool
+        http.clear()
+        with pytest.raises(CircuitOpenError):
+            http.request('GET', url, retries=0)
@@ -1,29 +1,103 @@
 from __future__ import absolute_import
+import atexit
+import logging
 from collections import Mapping, MutableMapping
 try:
-    from threading import RLock
+    from threading import Lock, RLock, Thread
 except ImportError:  # Platform-specific: No threads available
+    Thread = None
+
     class RLock:
+        def acquire(self, blocking=True):
+            return True
+
+        def release(self):
+            pass
+
         def __enter__(self):
             pass
 
         def __exit__(self, exc_type, exc_value, traceback):
             pass
 
+    Lock = RLock
+
 
 try:  # Python 2.7+
     from collections import OrderedDict
 except ImportError:
     from .packages.ordered_dict import OrderedDict
 from .packages.six import iterkeys, itervalues, PY3
+from .packages.six.moves import queue
 
 
 __all__ = ['RecentlyUsedContainer', 'HTTPHeaderDict']
 
 
+log = logging.getLogger(__name__)
+
 _Null = object()
 
 
+class _BackgroundDisposer(object):
+    """
+    Calls ``dispose_func(value)`` for the values handed to :meth:`dispose` on
+    a daemon thread, in the order they were handed over. The thread is started
+    on first use, and again if it is gone, e.g. after a fork. It is stopped at
+    exit, once the values already handed over are disposed of.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = Lock()
+
+    def dispose(self, dispose_func, value):
+        self._queue.put((dispose_func, value))
+
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = Thread(target=self._run, name='urllib3-disposer')
+                    self._thread.daemon = True
+                    self._thread.start()
+
+    def join(self):
+        """
+        Wait until every value handed over so far has been disposed of.
+        """
+        self._queue.join()
+
+    def stop(self):
+        """
+        Dispose of the values handed over so far and stop the thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None and thread.is_alive():
+                self._queue.put(None)
+                thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            dispose_func, value = item
+            try:
+                dispose_func(value)
+            except Exception:
+                log.warning("Failed to dispose of %r", value, exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+_disposer = _BackgroundDisposer()
+atexit.register(_disposer.stop)
+
+
 class RecentlyUsedContainer(MutableMapping):
     """
     Provides a thread-safe dict-like container which maintains up to
@@ -36,66 +110,175 @@ class RecentlyUsedContainer(MutableMapping):
     :param dispose_func:
         Every time an item is evicted from the container,
         ``dispose_func(value)`` is called.  Callback which will get called
+
+    :param shards:
+        Number of independent shards the keys are spread over by their hash.
+        Each shard has its own lock, so threads using keys of different
+        shards don't wait on one another. Once the container is full, a new
+        key evicts the least recently used key of its own shard, or of another
+        shard if it is alone in its own, which makes the eviction order only
+        approximately least-recently-used. Another shard is skipped while its
+        lock is taken, so the container may briefly hold more than
+        ``maxsize`` keys.
+
+    :param background_dispose:
+        If true, ``dispose_func`` is called on a background thread for the
+        values evicted to make room for a new one or replaced, rather than by
+        the thread setting the item. Values which are deleted or cleared are
+        always disposed of before returning.
     """
 
     ContainerCls = OrderedDict
 
-    def __init__(self, maxsize=10, dispose_func=None):
+    def __init__(self, maxsize=10, dispose_func=None, shards=1,
+                 background_dispose=False):
         self._maxsize = maxsize
         self.dispose_func = dispose_func
+        self.background_dispose = background_dispose and Thread is not None
+
+        self._shards = [(self.ContainerCls(), RLock()) for _ in range(max(shards, 1))]
+
+        #: The lock of the first shard, which guards the whole container if it
+        #: has a single shard. Use :meth:`lock_for` to get the lock of a key.
+        self._container, self.lock = self._shards[0]
 
-        self._container = self.ContainerCls()
-        self.lock = RLock()
+    def _shard(self, key):
+        shards = self._shards
+        if len(shards) == 1:
+            return shards[0]
+        return shards[hash(key) % len(shards)]
+
+    def _len(self):
+        if len(self._shards) == 1:
+            return len(self._container)
+        return sum(len(container) for container, _lock in self._shards)
+
+    def lock_for(self, key):
+        """
+        Return the lock guarding ``key``, to make a series of operations on it
+        atomic.
+        """
+        return self._shard(key)[1]
 
     def __getitem__(self, key):
+        container, lock = self._shard(key)
         # Re-insert the item, moving it to the end of the eviction line.
-        with self.lock:
-            item = self._container.pop(key)
-            self._container[key] = item
+        with lock:
+            item = container.pop(key)
+            container[key] = item
             return item
 
+    def get(self, key, default=None):
+        """
+        Return the value for ``key`` if it is present, else ``default``.
+
+        Unlike ``self[key]`` this never waits for another thread: the value is
+        read without taking the lock, and only moved to the end of the
+        eviction line if the lock happens to be free. Under contention the
+        eviction order is therefore approximately least-recently-used.
+        """
+        container, lock = self._shard(key)
+        item = container.get(key, _Null)
+        if item is _Null:
+            return default
+
+        if lock.acquire(False):
+            try:
+                # The item may have been replaced or evicted in the meantime.
+                if container.get(key, _Null) is item:
+                    del container[key]
+                    container[key] = item
+            finally:
+                lock.release()
+        return item
+
     def __setitem__(self, key, value):
         evicted_value = _Null
-        with self.lock:
+        container, lock = self._shard(key)
+        with lock:
             # Possibly evict the existing value of 'key'
-            evicted_value = self._container.get(key, _Null)
-            self._container[key] = value
+            evicted_value = container.get(key, _Null)
+            container[key] = value
 
             # If we didn't evict an existing value, we might have to evict the
             # least recently used item from the beginning of the container.
-            if len(self._container) > self._maxsize:
-                _key, evicted_value = self._container.popitem(last=False)
+            if (evicted_value is _Null and len(container) > 1 and
+                    self._len() > self._maxsize):
+                _key, evicted_value = container.popitem(last=False)
+
+        evicted_values = [evicted_value] if evicted_value is not _Null else []
+        if not evicted_values and self._len() > self._maxsize:
+            evicted_values = self._evict_overflow(key)
+
+        if self.dispose_func:
+            for value in evicted_values:
+                if self.background_dispose:
+                    _disposer.dispose(self.dispose_func, value)
+                else:
+                    self.dispose_func(value)
 
-        if self.dispose_func and evicted_value is not _Null:
-            self.dispose_func(evicted_value)
+    def _evict_overflow(self, key):
+        """
+        Evict the least recently used items of each shard in turn, other than
+        ``key`` unless ``maxsize`` is 0, until there are no more than
+        ``maxsize`` items.
+
+        The caller may hold the lock of a shard, see :meth:`lock_for`, so
+        waiting for the lock of another one could deadlock with a thread
+        doing the same the other way around. Shards whose lock is taken are
+        skipped instead.
+        """
+        if self._maxsize <= 0:
+            key = _Null
+
+        evicted_values = []
+        for container, lock in self._shards:
+            if self._len() <= self._maxsize:
+                break
+            if not lock.acquire(False):
+                continue
+            try:
+                # The newest key of its shard, so only evicted if alone.
+                while (container and next(iter(container)) != key and
+                        self._len() > self._maxsize):
+                    _key, value = container.popitem(last=False)
+                    evicted_values.append(value)
+            finally:
+                lock.release()
+        return evicted_values
 
     def __delitem__(self, key):
-        with self.lock:
-            value = self._container.pop(key)
+        container, lock = self._shard(key)
+        with lock:
+            value = container.pop(key)
 
         if self.dispose_func:
             self.dispose_func(value)
 
     def __len__(self):
-        with self.lock:
-            return len(self._container)
+        return self._len()
 
     def __iter__(self):
         raise NotImplementedError('Iteration over this class is unlikely to be threadsafe.')
 
     def clear(self):
-        with self.lock:
-            # Copy pointers to all values, then wipe the mapping
-            values = list(itervalues(self._container))
-            self._container.clear()
+        values = []
+        for container, lock in self._shards:
+            with lock:
+                # Copy pointers to all values, then wipe the mapping
+                values.extend(itervalues(container))
+                container.clear()
 
         if self.dispose_func:
             for value in values:
                 self.dispose_func(value)
 
     def keys(self):
-        with self.lock:
-            return list(iterkeys(self._container))
+        keys = []
+        for container, lock in self._shards:
+            with lock:
+                keys.extend(iterkeys(container))
+        return keys
 
 
 class HTTPHeaderDict(MutableMapping):
@@ -122,6 +305,10 @@ class HTTPHeaderDict(MutableMapping):
     constructor or ``.update``, the behavior is undefined and some will be
     lost.
 
+    Values of fields that were added more than once are only merged when they
+    are looked up, and the merged value is kept until the field changes.
+    Fields with a single value are returned as they are.
+
     >>> headers = HTTPHeaderDict()
     >>> headers.add('Set-Cookie', 'foo=bar')
     >>> headers.add('set-cookie', 'baz=quxx')
@@ -132,9 +319,14 @@ class HTTPHeaderDict(MutableMapping):
     '7'
     """
 
+    __slots__ = ('_container', '_merged')
+
     def __init__(self, headers=None, **kwargs):
         super(HTTPHeaderDict, self).__init__()
+        # Lowercased name -> [original name, value, ...]
         self._container = OrderedDict()
+        # Lowercased name -> merged value, for fields with several values
+        self._merged = {}
         if headers is not None:
             if isinstance(headers, HTTPHeaderDict):
                 self._copy_from(headers)
@@ -144,15 +336,24 @@ class HTTPHeaderDict(MutableMapping):
             self.extend(kwargs)
 
     def __setitem__(self, key, val):
-        self._container[key.lower()] = [key, val]
-        return self._container[key.lower()]
+        key_lower = key.lower()
+        self._container[key_lower] = [key, val]
+        if self._merged:
+            self._merged.pop(key_lower, None)
 
     def __getitem__(self, key):
-        val = self._container[key.lower()]
-        return ', '.join(val[1:])
+        key_lower = key.lower()
+        vals = self._container[key_lower]
+        if len(vals) == 2:
+            # Single value, nothing to merge
+            return vals[1]
+        return self._merged_value(key_lower, vals)
 
     def __delitem__(self, key):
-        del self._container[key.lower()]
+        key_lower = key.lower()
+        del self._container[key_lower]
+        if self._merged:
+            self._merged.pop(key_lower, None)
 
     def __contains__(self, key):
         return key.lower() in self._container
@@ -160,10 +361,10 @@ class HTTPHeaderDict(MutableMapping):
     def __eq__(self, other):
         if not isinstance(other, Mapping) and not hasattr(other, 'keys'):
             return False
-        if not isinstance(other, type(self)):
+        if not isinstance(other, HTTPHeaderDict):
             other = type(self)(other)
-        return (dict((k.lower(), v) for k, v in self.itermerged()) ==
-                dict((k.lower(), v) for k, v in other.itermerged()))
+        return (dict(self._itermerged_lower()) ==
+                dict(other._itermerged_lower()))
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -220,6 +421,8 @@ class HTTPHeaderDict(MutableMapping):
         vals = self._container.setdefault(key_lower, new_vals)
         if new_vals is not vals:
             vals.append(val)
+            if self._merged:
+                self._merged.pop(key_lower, None)
 
     def extend(self, *args, **kwargs):
         """Generic import function for any type of header-like object.
@@ -241,8 +444,16 @@ class HTTPHeaderDict(MutableMapping):
             for key in other.keys():
                 self.add(key, other[key])
         else:
+            # Same as calling self.add for every pair, inlined as this is how
+            # the headers of every response are built.
+            container = self._container
             for key, value in other:
-                self.add(key, value)
+                key_lower = key.lower()
+                new_vals = [key, value]
+                vals = container.setdefault(key_lower, new_vals)
+                if new_vals is not vals:
+                    vals.append(value)
+                    self._merged.pop(key_lower, None)
 
         for key, value in kwargs.items():
             self.add(key, value)
@@ -271,6 +482,12 @@ class HTTPHeaderDict(MutableMapping):
         return "%s(%s)" % (type(self).__name__, dict(self.itermerged()))
 
     def _copy_from(self, other):
+        if isinstance(other, HTTPHeaderDict):
+            for key_lower, vals in other._container.items():
+                self._container[key_lower] = list(vals)
+            self._merged.update(other._merged)
+            return
+
         for key in other:
             val = other.getlist(key)
             if isinstance(val, list):
@@ -285,16 +502,29 @@ class HTTPHeaderDict(MutableMapping):
 
     def iteritems(self):
         """Iterate over all header lines, including duplicate ones."""
-        for key in self:
-            vals = self._container[key.lower()]
+        for vals in self._container.values():
+            key = vals[0]
             for val in vals[1:]:
-                yield vals[0], val
+                yield key, val
 
     def itermerged(self):
         """Iterate over all headers, merging duplicate ones together."""
-        for key in self:
-            val = self._container[key.lower()]
-            yield val[0], ', '.join(val[1:])
+        for key_lower, vals in self._container.items():
+            yield vals[0], self._merged_value(key_lower, vals)
+
+    def _itermerged_lower(self):
+        for key_lower, vals in self._container.items():
+            yield key_lower, self._merged_value(key_lower, vals)
+
+    def _merged_value(self, key_lower, vals):
+        if len(vals) == 2:
+            return vals[1]
+        # Join the values once and keep the result until the field changes.
+        try:
+            return self._merged[key_lower]
+        except KeyError:
+            merged = self._merged[key_lower] = ', '.join(vals[1:])
+            return merged
 
     def items(self):
         return list(self.iteritems())
@@ -2,6 +2,8 @@ from __future__ import absolute_import
 import datetime
 import logging
 import os
+import re
+import stat
 import sys
 import socket
 from socket import error as SocketError, timeout as SocketTimeout
@@ -9,6 +11,12 @@ import warnings
 from .packages import six
 from .packages.six.moves.http_client import HTTPConnection as _HTTPConnection
 from .packages.six.moves.http_client import HTTPException  # noqa: F401
+from .packages.six.moves.http_client import (
+    HTTPResponse as _HTTPResponse,
+    BadStatusLine,
+    LineTooLong,
+    UnknownProtocol,
+)
 
 try:  # Compiled with SSL?
     import ssl
@@ -28,6 +36,12 @@ except NameError:  # Python 2:
         pass
 
 
+try:  # Python 3.5+
+    from .packages.six.moves.http_client import RemoteDisconnected
+except ImportError:  # Python 2
+    RemoteDisconnected = BadStatusLine
+
+
 from .exceptions import (
     NewConnectionError,
     ConnectTimeoutError,
@@ -41,6 +55,7 @@ from .util.ssl_ import (
     resolve_ssl_version,
     assert_fingerprint,
     create_urllib3_context,
+    selected_alpn_protocol,
     ssl_wrap_socket
 )
 
@@ -49,8 +64,26 @@ from .util import connection
 
 from ._collections import HTTPHeaderDict
 
+try:  # Python 2.7+
+    _memoryview = memoryview
+except NameError:  # Python 2.6
+    _memoryview = None
+
+# Python 2.6's endheaders() can't send a body along with the headers.
+_ENDHEADERS_TAKES_BODY = sys.version_info >= (2, 7)
+
 log = logging.getLogger(__name__)
 
+# The same checks as httplib's putheader()
+_is_legal_header_name = re.compile(br'\A[^:\s][^:\r\n]*\Z').match
+_is_illegal_header_value = re.compile(br'\n(?![ \t])|\r(?![ \t\n])').search
+
+# The same checks as http.client's putrequest()
+_contains_disallowed_method_char = re.compile(r'[\x00-\x1f]').search
+_contains_disallowed_url_char = re.compile(r'[\x00-\x20\x7f]').search
+
+_METHODS_EXPECTING_BODY = frozenset(['PATCH', 'POST', 'PUT'])
+
 port_by_scheme = {
     'http': 80,
     'https': 443,
@@ -67,6 +100,181 @@ class DummyConnection(object):
     pass
 
 
+class FastHTTPResponse(_HTTPResponse, object):
+    """
+    Based on httplib.HTTPResponse but parses the status line and headers
+    itself rather than with the :mod:`email` package (:mod:`mimetools` on
+    Python 2).
+
+    When the whole head of the response is already in the read buffer, it is
+    taken out with a single read and the rest of the buffer is left to the
+    body. ``msg`` (and ``headers`` on Python 3) is a
+    :class:`~urllib3._collections.HTTPHeaderDict`.
+
+    Unlike httplib on Python 2, a status line that doesn't start with
+    ``HTTP/`` is always rejected rather than treated as an HTTP/0.9 response.
+    """
+
+    #: Longest status or header line accepted, the same limit as httplib's.
+    max_line = 65536
+
+    #: Most header lines accepted, the same limit as httplib's.
+    max_headers = 100
+
+    #: Header lines that couldn't be parsed and were left out of ``msg``.
+    unparsed_headers = ()
+
+    def begin(self):
+        if self.msg is not None:
+            # We've already started reading the response
+            return
+
+        # Skip the heads of any 100 Continue responses
+        while True:
+            lines = self._read_head()
+            version, status, reason = self._parse_status(lines)
+            if status != 100:
+                break
+
+        self.code = self.status = status
+        self.reason = reason.strip()
+        if version in ('HTTP/1.0', 'HTTP/0.9'):
+            self.version = 10
+        elif version.startswith('HTTP/1.'):
+            self.version = 11
+        else:
+            raise UnknownProtocol(version)
+
+        self.headers = self.msg = headers = self._parse_headers(lines[1:])
+
+        tr_enc = _first_header(headers, 'transfer-encoding')
+        self.chunked = bool(tr_enc and tr_enc.lower() == 'chunked')
+        self.chunk_left = None
+
+        self.will_close = self._check_close()
+
+        self.length = None
+        length = _first_header(headers, 'content-length')
+        if length and not self.chunked:
+            try:
+                self.length = int(length)
+            except ValueError:
+                pass
+            else:
+                if self.length < 0:
+                    self.length = None
+
+        if (status in (204, 304) or 100 <= status < 200 or
+                self._method == 'HEAD'):
+            self.length = 0
+
+        # Without a length, the end of the body is the end of the connection
+        if not self.will_close and not self.chunked and self.length is None:
+            self.will_close = True
+
+    def _read_head(self):
+        """
+        Read the status line and header lines of a response, without the
+        empty line ending them, as native strings.
+        """
+        fp = self.fp
+        peek = getattr(fp, 'peek', None)
+        if peek is not None:
+            buffered = peek(1)
+            end = _find_head_end(buffered)
+            if end is not None:
+                # Split on line feeds only, like httplib: the text
+                # splitlines() also splits on bytes like \x85, which occur
+                # in UTF-8 header values. Leave out the empty line at the end.
+                lines = [line.rstrip(b'\r') for line in fp.read(end).split(b'\n')[:-2]]
+                if six.PY3:
+                    lines = [line.decode('iso-8859-1') for line in lines]
+                return lines
+
+        # Not all of it is buffered (or can't tell), read it line by line.
+        lines = []
+        while True:
+            line = fp.readline(self.max_line + 1)
+            if len(line) > self.max_line:
+                raise LineTooLong('header line' if lines else 'status line')
+            if not lines:
+                if not line:
+                    raise RemoteDisconnected('Remote end closed connection '
+                                             'without response')
+            elif line in (b'\r\n', b'\n', b''):
+                break
+            if six.PY3:
+                line = line.decode('iso-8859-1')
+            lines.append(line.rstrip('\r\n'))
+            if len(lines) > self.max_headers + 1:
+                raise HTTPException('got more than %d headers' %
+                                    self.max_headers)
+        return lines
+
+    def _parse_status(self, lines):
+        line = lines[0] if lines else ''
+        try:
+            version, status, reason = line.split(None, 2)
+        except ValueError:
+            try:
+                version, status = line.split(None, 1)
+                reason = ''
+            except ValueError:
+                version = ''
+        if not version.startswith('HTTP/'):
+            self.close()
+            raise BadStatusLine(line)
+
+        try:
+            status = int(status)
+        except ValueError:
+            raise BadStatusLine(line)
+        if status < 100 or status > 999:
+            raise BadStatusLine(line)
+        return version, status, reason
+
+    def _parse_headers(self, lines):
+        if len(lines) > self.max_headers:
+            raise HTTPException('got more than %d headers' % self.max_headers)
+
+        fields = []
+        unparsed = []
+        for line in lines:
+            if line.startswith((' ', '\t')) and fields:
+                # Folded continuation of the previous field
+                name, value = fields[-1]
+                fields[-1] = (name, value + '\r\n' + line.rstrip())
+                continue
+
+            name, sep, value = line.partition(':')
+            if sep and name:
+                fields.append((name, value.strip()))
+            else:
+                unparsed.append(line)
+
+        self.unparsed_headers = unparsed
+        return HTTPHeaderDict(fields)
+
+    def _check_close(self):
+        conn = self.msg.get('connection')
+        if self.version == 11:
+            # HTTP/1.1 connections stay open unless explicitly closed
+            return bool(conn and 'close' in conn.lower())
+
+        # Some HTTP/1.0 implementations support persistent connections
+        if self.msg.get('keep-alive'):
+            return False
+        if conn and 'keep-alive' in conn.lower():
+            return False
+        pconn = self.msg.get('proxy-connection')
+        if pconn and 'keep-alive' in pconn.lower():
+            return False
+        return True
+
+    def getheader(self, name, default=None):
+        return self.msg.get(name, default)
+
+
 class HTTPConnection(_HTTPConnection, object):
     """
     Based on httplib.HTTPConnection but provides an extra constructor
@@ -92,6 +300,20 @@ class HTTPConnection(_HTTPConnection, object):
             ]
 
         Or you may want to disable the defaults by passing an empty list (e.g., ``[]``).
+
+      - ``chunk_size``: When sending a body with chunked transfer encoding, buffer the pieces
+        yielded by the body into chunks of up to this many bytes. A single piece which is larger
+        is sent as a chunk of its own, and an empty piece flushes the buffer early. If not
+        specified, each non-empty piece is sent as its own chunk.
+
+      - ``fast_response_parser``: If True, read responses with :class:`FastHTTPResponse`, which
+        parses the status line and headers straight into an
+        :class:`~urllib3._collections.HTTPHeaderDict`.
+
+      - ``fast_request_serializer``: If True, encode and validate the request headers as one
+        block instead of one ``putheader()`` call each. The block of the last headers sent is
+        kept, so a pool's default headers, which are the same object for every request, are
+        only encoded again once they change.
     """
 
     default_port = port_by_scheme['http']
@@ -103,6 +325,15 @@ class HTTPConnection(_HTTPConnection, object):
     #: Whether this connection verifies the host's certificate.
     is_verified = False
 
+    #: Size of the blocks read from file bodies that can't be handed to
+    #: ``sendfile()``, such as when the connection is encrypted.
+    file_blocksize = 65536
+
+    #: Bodies and chunks up to this size are sent in the same ``send()`` call
+    #: as the data preceding them, such as the request headers. Larger ones are
+    #: sent on their own rather than copied.
+    coalesce_size = 16384
+
     def __init__(self, *args, **kw):
         if six.PY3:  # Python 3
             kw.pop('strict', None)
@@ -121,6 +352,19 @@ class HTTPConnection(_HTTPConnection, object):
         #: provided, we use the default options.
         self.socket_options = kw.pop('socket_options', self.default_socket_options)
 
+        #: Minimum size of the chunks sent by :meth:`request_chunked`, if any.
+        self.chunk_size = kw.pop('chunk_size', None)
+
+        if kw.pop('fast_response_parser', False):
+            self.response_class = FastHTTPResponse
+
+        #: Whether request headers are serialized by :meth:`_putheaders` in one
+        #: block rather than by :meth:`putheader`.
+        self.fast_request_serializer = kw.pop('fast_request_serializer', False)
+        # The headers of the last request with the fast serializer, their
+        # items, and their block and lowercased names.
+        self._last_header_block = None
+
         # Superclass also sets self.source_address in Python 2.7+.
         _HTTPConnection.__init__(self, *args, **kw)
 
@@ -166,6 +410,197 @@ class HTTPConnection(_HTTPConnection, object):
         conn = self._new_conn()
         self._prepare_conn(conn)
 
+    def request(self, method, url, body=None, headers=None, **kw):
+        """
+        Same as :meth:`httplib.HTTPConnection.request`, but file bodies backed
+        by a regular file are sent with :meth:`socket.socket.sendfile` where
+        possible, or in blocks of :attr:`file_blocksize` otherwise.
+        """
+        if headers is None:
+            headers = {}
+
+        if (self.fast_request_serializer and not kw and
+                (body is None or isinstance(body, six.binary_type))):
+            return self._request_serialized(method, url, body, headers)
+
+        length = _file_body_length(body, headers)
+        if length is None:
+            return _HTTPConnection.request(self, method, url, body=body, headers=headers, **kw)
+
+        header_names = set(k.lower() for k in headers)
+        if 'content-length' not in header_names:
+            headers = HTTPHeaderDict(headers)
+            headers['Content-Length'] = str(length)
+
+        # Send the request line and headers on their own, then the file.
+        _HTTPConnection.request(self, method, url, headers=headers)
+        self._send_file(body, length)
+
+    def _request_serialized(self, method, url, body, headers):
+        block, names = self._encode_header_block(headers)
+        self.putrequest(
+            method,
+            url,
+            skip_accept_encoding='accept-encoding' in names,
+            skip_host='host' in names
+        )
+        # Same Content-Length rules as httplib for bodies that aren't streamed
+        if 'content-length' not in names and 'transfer-encoding' not in names:
+            if body is not None:
+                self._buffer.append(b'Content-Length: ' + str(len(body)).encode('ascii'))
+            elif method.upper() in _METHODS_EXPECTING_BODY:
+                self._buffer.append(b'Content-Length: 0')
+        if block:
+            self._buffer.append(block)
+        if _ENDHEADERS_TAKES_BODY:
+            self.endheaders(body)
+        else:  # Python 2.6
+            self.endheaders()
+            if body is not None:
+                self.send(body)
+
+    def _putheaders(self, headers):
+        """
+        Add ``headers`` to the request being built, with one :meth:`putheader`
+        call each or, with :attr:`fast_request_serializer`, as one block.
+        """
+        if not self.fast_request_serializer:
+            for header, value in headers.items():
+                self.putheader(header, value)
+            return
+
+        block = self._encode_header_block(headers)[0]
+        if block:
+            self._buffer.append(block)
+
+    def _encode_header_block(self, headers):
+        """
+        :func:`_encode_header_block` for ``headers``, reusing the block of the
+        previous request if it was sent with the same ``headers`` object and
+        its items haven't changed since.
+        """
+        items = tuple(headers.items())
+        last = self._last_header_block
+        if last is not None and last[0] is headers and last[1] == items:
+            return last[2], last[3]
+
+        block, names, cacheable = _render_header_block(items)
+        self._last_header_block = (headers, items, block, names) if cacheable else None
+        return block, names
+
+    def _send_file(self, fp, length):
+        if not length:
+            return
+
+        sock = self.sock
+        is_plain_socket = (
+            isinstance(sock, socket.socket) and
+            not (ssl and isinstance(sock, ssl.SSLSocket))
+        )
+        if is_plain_socket and hasattr(sock, 'sendfile'):  # Python 3.5+
+            # Uses os.sendfile() where available and updates the file
+            # position once it's done, just like a regular read would.
+            sock.sendfile(fp, offset=fp.tell(), count=length)
+            return
+
+        if _memoryview is None:  # Python 2.6
+            while length > 0:
+                data = fp.read(min(self.file_blocksize, length))
+                if not data:
+                    break
+                sock.sendall(data)
+                length -= len(data)
+            return
+
+        view = _memoryview(bytearray(min(self.file_blocksize, length)))
+        while length > 0:
+            amt = fp.readinto(view[:length])
+            if not amt:
+                break
+            sock.sendall(view[:amt])
+            length -= amt
+
+    def _send_output(self, message_body=None, *args, **kw):
+        # Python 3 always sends the body separately from the headers. Send
+        # small bodies along with the headers in one call instead, which
+        # avoids an extra syscall and the delayed ACK/Nagle interaction.
+        # Python 2 already does so for any string body.
+        encode_chunked = kw.get('encode_chunked', args and args[0])
+        if (isinstance(message_body, (six.binary_type, bytearray)) and not encode_chunked and
+                len(message_body) <= self.coalesce_size):
+            self._buffer.extend((b'', b''))
+            msg = b'\r\n'.join(self._buffer)
+            del self._buffer[:]
+            self.send(msg + message_body)
+            return
+
+        # Python 2.6's _send_output() takes no message_body.
+        if message_body is not None or args:
+            args = (message_body,) + args
+        _HTTPConnection._send_output(self, *args, **kw)
+
+    def _iter_chunks(self, body):
+        """
+        Yield the chunks to send for ``body``. Without :attr:`chunk_size`, each
+        non-empty piece of the body is a chunk. Otherwise pieces are buffered
+        into chunks of up to :attr:`chunk_size` bytes, flushed early when the
+        body yields an empty piece. Pieces of at least :attr:`chunk_size`
+        bytes, such as large ``memoryview`` objects, are sent as they are
+        without copying.
+        """
+        if body is None:
+            return
+        elif isinstance(body, six.string_types + (six.binary_type,)):
+            body = (body,)
+
+        chunk_size = self.chunk_size
+        pending = []
+        pending_len = 0
+
+        for piece in body:
+            if isinstance(piece, six.text_type):
+                piece = piece.encode('utf8')
+            elif (_memoryview is not None and isinstance(piece, _memoryview) and
+                    (six.PY2 or piece.itemsize != 1)):
+                piece = piece.tobytes()
+
+            if not chunk_size:
+                if len(piece):
+                    yield piece
+                continue
+
+            if pending and (not len(piece) or pending_len + len(piece) > chunk_size):
+                yield b''.join(pending)
+                pending, pending_len = [], 0
+
+            if len(piece) >= chunk_size:
+                yield piece
+            elif len(piece):
+                pending.append(piece)
+                pending_len += len(piece)
+
+        if pending:
+            yield b''.join(pending)
+
+    def _iter_chunk_frames(self, body):
+        """
+        Frame ``body`` with chunked transfer encoding, yielding the data to
+        write. Each chunk's length line is written together with the chunk,
+        and its trailing CRLF together with the next length line, so that small
+        chunks only take one ``send()`` call each.
+        """
+        prefix = b''
+        for chunk in self._iter_chunks(body):
+            frame = prefix + hex(len(chunk))[2:].encode('utf-8') + b'\r\n'
+            if len(chunk) <= self.coalesce_size:
+                yield b''.join((frame, chunk))
+            else:
+                yield frame
+                yield chunk
+            prefix = b'\r\n'
+
+        yield prefix + b'0\r\n\r\n'
+
     def request_chunked(self, method, url, body=None, headers=None):
         """
         Alternative to the common request method, which sends the
@@ -180,29 +615,19 @@ class HTTPConnection(_HTTPConnection, object):
             skip_accept_encoding=skip_accept_encoding,
             skip_host=skip_host
         )
-        for header, value in headers.items():
-            self.putheader(header, value)
+        self._putheaders(headers)
         if 'transfer-encoding' not in headers:
             self.putheader('Transfer-Encoding', 'chunked')
-        self.endheaders()
-
-        if body is not None:
-            stringish_types = six.string_types + (six.binary_type,)
-            if isinstance(body, stringish_types):
-                body = (body,)
-            for chunk in body:
-                if not chunk:
-                    continue
-                if not isinstance(chunk, six.binary_type):
-                    chunk = chunk.encode('utf8')
-                len_str = hex(len(chunk))[2:]
-                self.send(len_str.encode('utf-8'))
-                self.send(b'\r\n')
-                self.send(chunk)
-                self.send(b'\r\n')
-
-        # After the if clause, to always have a closed body
-        self.send(b'0\r\n\r\n')
+
+        # The first frame goes out with the headers, the rest on their own.
+        # There is always at least one frame, terminating the body.
+        frames = self._iter_chunk_frames(body)
+        if _ENDHEADERS_TAKES_BODY:
+            self.endheaders(next(frames))
+        else:  # Python 2.6
+            self.endheaders()
+        for frame in frames:
+            self.send(frame)
 
 
 class HTTPSConnection(HTTPConnection):
@@ -210,6 +635,14 @@ class HTTPSConnection(HTTPConnection):
 
     ssl_version = None
 
+    #: The application protocols to offer with ALPN, in order of preference.
+    #: They're only set on the SSL context the connection creates itself, a
+    #: given ``ssl_context`` must have ALPN configured already.
+    alpn_protocols = None
+
+    #: The application protocol negotiated with ALPN once connected, or None.
+    alpn_protocol = None
+
     def __init__(self, host, port=None, key_file=None, cert_file=None,
                  strict=None, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
                  ssl_context=None, **kw):
@@ -233,6 +666,7 @@ class HTTPSConnection(HTTPConnection):
             self.ssl_context = create_urllib3_context(
                 ssl_version=resolve_ssl_version(None),
                 cert_reqs=resolve_cert_reqs(None),
+                alpn_protocols=self.alpn_protocols,
             )
 
         self.sock = ssl_wrap_socket(
@@ -240,7 +674,10 @@ class HTTPSConnection(HTTPConnection):
             keyfile=self.key_file,
             certfile=self.cert_file,
             ssl_context=self.ssl_context,
+            alpn_protocols=self.alpn_protocols,
         )
+        if self.alpn_protocols:
+            self.alpn_protocol = selected_alpn_protocol(self.sock)
 
 
 class VerifiedHTTPSConnection(HTTPSConnection):
@@ -312,6 +749,7 @@ class VerifiedHTTPSConnection(HTTPSConnection):
             self.ssl_context = create_urllib3_context(
                 ssl_version=resolve_ssl_version(self.ssl_version),
                 cert_reqs=resolve_cert_reqs(self.cert_reqs),
+                alpn_protocols=self.alpn_protocols,
             )
 
         context = self.ssl_context
@@ -323,7 +761,10 @@ class VerifiedHTTPSConnection(HTTPSConnection):
             ca_certs=self.ca_certs,
             ca_cert_dir=self.ca_cert_dir,
             server_hostname=hostname,
-            ssl_context=context)
+            ssl_context=context,
+            alpn_protocols=self.alpn_protocols)
+        if self.alpn_protocols:
+            self.alpn_protocol = selected_alpn_protocol(self.sock)
 
         if self.assert_fingerprint:
             assert_fingerprint(self.sock.getpeercert(binary_form=True),
@@ -351,6 +792,42 @@ class VerifiedHTTPSConnection(HTTPSConnection):
         )
 
 
+def _file_body_length(body, headers):
+    """
+    Return the number of bytes to send from ``body`` if it is a binary file
+    object backed by a regular file and the request isn't using a
+    ``Transfer-Encoding``. Otherwise return ``None``.
+    """
+    if body is None or not hasattr(body, 'readinto'):
+        return None
+
+    content_length = None
+    for key in headers:
+        lower_key = key.lower()
+        if lower_key == 'transfer-encoding':
+            return None
+        elif lower_key == 'content-length':
+            content_length = headers[key]
+
+    try:
+        st = os.fstat(body.fileno())
+        pos = body.tell()
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+
+    if not stat.S_ISREG(st.st_mode):
+        return None
+
+    length = max(st.st_size - pos, 0)
+    if content_length is not None:
+        try:
+            length = min(length, int(content_length))
+        except ValueError:
+            return None
+
+    return length
+
+
 def _match_hostname(cert, asserted_hostname):
     try:
         match_hostname(cert, asserted_hostname)
@@ -365,6 +842,110 @@ def _match_hostname(cert, asserted_hostname):
         raise
 
 
+def _encode_header_block(headers):
+    """
+    Return the lines for ``headers``, encoded and joined together as they go
+    into a request, and the set of their lowercased names.
+    """
+    return _render_header_block(tuple(headers.items()))[:2]
+
+
+def _render_header_block(items):
+    lines = []
+    names = set()
+    # Only reuse blocks of string values; 1 and True compare equal.
+    cacheable = True
+    for name, value in items:
+        names.add(name.lower())
+        if not isinstance(name, six.binary_type):
+            name = name.encode('ascii')
+        if not _is_legal_header_name(name):
+            raise ValueError('Invalid header name %r' % (name,))
+
+        if isinstance(value, six.binary_type):
+            pass
+        elif isinstance(value, six.text_type):
+            value = value.encode('latin-1')
+        else:
+            value = str(value).encode('ascii')
+            cacheable = False
+        if _is_illegal_header_value(value):
+            raise ValueError('Invalid header value %r' % (value,))
+
+        lines.append(name + b': ' + value)
+    return b'\r\n'.join(lines), frozenset(names), cacheable
+
+
+def _find_head_end(data):
+    """
+    Return the offset just past the empty line ending the head of a response
+    in ``data``, or None if ``data`` doesn't contain all of it.
+    """
+    crlf = data.find(b'\n\r\n')
+    lf = data.find(b'\n\n')
+    if crlf != -1 and (lf == -1 or crlf < lf):
+        return crlf + 3
+    if lf != -1:
+        return lf + 2
+    return None
+
+
+def _encode_request(method, request_uri, host, body, headers):
+    """
+    Return the bytes of a complete request, for the transports writing
+    requests to a socket themselves rather than through httplib.
+
+    ``Host``, ``Accept-Encoding`` and ``Content-Length`` are added as httplib
+    would unless ``headers`` contains them. ``body`` must be bytes, text or a
+    file object, which is read in full.
+    """
+    block, names = _encode_header_block(headers)
+
+    # Control characters would let the request line or Host header inject
+    # headers of their own, or another request.
+    if _contains_disallowed_method_char(method):
+        raise ValueError('Invalid method %r' % (method,))
+    if _contains_disallowed_url_char(request_uri):
+        raise ValueError('Invalid URL %r, can\'t contain control characters or '
+                         'spaces' % (request_uri,))
+
+    lines = ['%s %s HTTP/1.1' % (method, request_uri)]
+    if 'host' not in names:
+        try:
+            host.encode('ascii')
+        except UnicodeError:
+            host = host.encode('idna').decode('ascii')
+        if _contains_disallowed_url_char(host):
+            raise ValueError('Invalid host %r' % (host,))
+        lines.append('Host: %s' % host)
+    if 'accept-encoding' not in names:
+        lines.append('Accept-Encoding: identity')
+
+    if body is not None:
+        if hasattr(body, 'read'):
+            body = body.read()
+        if isinstance(body, six.text_type):
+            body = body.encode('iso-8859-1')
+        elif not isinstance(body, six.binary_type):
+            raise TypeError('The body of a request must be bytes, text or '
+                            'a file object, not %r' % type(body))
+    if ('content-length' not in names and 'transfer-encoding' not in names and
+            (body is not None or method.upper() in _METHODS_EXPECTING_BODY)):
+        lines.append('Content-Length: %d' % len(body or b''))
+
+    head = '\r\n'.join(lines).encode('ascii')
+    if block:
+        head += b'\r\n' + block
+    return head + b'\r\n\r\n' + (body or b'')
+
+
+def _first_header(headers, name):
+    values = headers.getlist(name)
+    if values:
+        return values[0]
+    return None
+
+
 if ssl:
     # Make a copy for testing.
     UnverifiedHTTPSConnection = HTTPSConnection
@@ -1,7 +1,11 @@
 from __future__ import absolute_import
+import collections
 import errno
+import itertools
 import logging
 import sys
+import threading
+import time
 import warnings
 
 from socket import error as SocketError, timeout as SocketTimeout
@@ -9,6 +13,7 @@ import socket
 
 
 from .exceptions import (
+    CircuitOpenError,
     ClosedPoolError,
     ProtocolError,
     EmptyPoolError,
@@ -30,17 +35,18 @@ from .connection import (
     port_by_scheme,
     DummyConnection,
     HTTPConnection, HTTPSConnection, VerifiedHTTPSConnection,
-    HTTPException, BaseSSLError,
+    HTTPException, BaseSSLError, _encode_request,
 )
 from .request import RequestMethods
 from .response import HTTPResponse
+from ._collections import HTTPHeaderDict
 
 from .util.connection import is_connection_dropped
-from .util.request import set_file_position
+from .util.request import set_file_position, encode_body
 from .util.response import assert_header_parsing
 from .util.retry import Retry
 from .util.timeout import Timeout
-from .util.url import get_host, Url
+from .util.url import get_host, parse_url, Url
 
 
 if six.PY2:
@@ -142,6 +148,14 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     :param retries:
         Retry configuration to use by default with requests in this pool.
 
+    :param hedge:
+        :class:`~urllib3.util.hedge.Hedge` configuration to use by default
+        with requests in this pool. Requests aren't hedged by default.
+
+    :param circuit_breaker:
+        :class:`~urllib3.util.circuit.CircuitBreaker` through which requests
+        to this pool's host fail fast once it keeps failing.
+
     :param _proxy:
         Parsed proxy URL, should not be used directly, instead, see
         :class:`urllib3.connectionpool.ProxyManager`"
@@ -162,8 +176,8 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     def __init__(self, host, port=None, strict=False,
                  timeout=Timeout.DEFAULT_TIMEOUT, maxsize=1, block=False,
                  headers=None, retries=None,
-                 _proxy=None, _proxy_headers=None,
-                 **conn_kw):
+                 _proxy=None, _proxy_headers=None, hedge=None,
+                 circuit_breaker=None, **conn_kw):
         ConnectionPool.__init__(self, host, port)
         RequestMethods.__init__(self, headers)
 
@@ -177,6 +191,12 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
 
         self.timeout = timeout
         self.retries = retries
+        self.hedge = hedge
+        self.circuit_breaker = circuit_breaker
+
+        # Recent response times of hedged requests, see Hedge.get_delay.
+        self._response_times = None
+        self._response_times_lock = threading.Lock()
 
         self.pool = self.QueueCls(maxsize)
         self.block = block
@@ -396,7 +416,14 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                   httplib_response.length)
 
         try:
-            assert_header_parsing(httplib_response.msg)
+            if isinstance(httplib_response.msg, HTTPHeaderDict):
+                # Parsed by FastHTTPResponse, which keeps what it skipped
+                unparsed = getattr(httplib_response, 'unparsed_headers', None)
+                if unparsed:
+                    raise HeaderParsingError(defects=None,
+                                             unparsed_data='\r\n'.join(unparsed))
+            else:
+                assert_header_parsing(httplib_response.msg)
         except (HeaderParsingError, TypeError) as hpe:  # Platform-specific: Python 3
             log.warning(
                 'Failed to parse headers (url=%s): %s',
@@ -426,9 +453,12 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     def is_same_host(self, url):
         """
         Check if the given ``url`` is a member of the same host as this
-        connection pool.
+        connection pool. ``url`` may also be a :class:`~urllib3.util.url.Url`.
         """
-        if url.startswith('/'):
+        if isinstance(url, Url):
+            if url.host is None:
+                return True
+        elif url.startswith('/'):
             return True
 
         # TODO: Add optional support for socket.gethostbyname checking.
@@ -447,7 +477,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     def urlopen(self, method, url, body=None, headers=None, retries=None,
                 redirect=True, assert_same_host=True, timeout=_Default,
                 pool_timeout=None, release_conn=None, chunked=False,
-                body_pos=None, **response_kw):
+                body_pos=None, content_encoding=None, hedge=None, **response_kw):
         """
         Get a connection from the pool and perform an HTTP request. This is the
         lowest level call for making a request, so you'll need to specify all
@@ -468,6 +498,11 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         :param method:
             HTTP request method (such as GET, POST, PUT, etc.)
 
+        :param url:
+            The URL to request. May also be a :class:`~urllib3.util.url.Url`
+            that was parsed already, which then isn't parsed again to check
+            its host.
+
         :param body:
             Data to send in the request body (useful for creating
             POST requests, see HTTPConnectionPool.post_url for
@@ -534,6 +569,19 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             redirect. Typically this won't need to be set because urllib3 will
             auto-populate the value when needed.
 
+        :param content_encoding:
+            If set, the body is compressed with this codec (such as ``'gzip'``
+            or ``'deflate'``, see :data:`urllib3.util.request.BODY_ENCODERS`)
+            and the ``Content-Encoding`` header is set accordingly. File-like
+            and iterable bodies are compressed while they are sent, which
+            implies ``chunked=True``.
+
+        :param hedge:
+            :class:`~urllib3.util.hedge.Hedge` configuration for this request,
+            overriding the pool's. Pass ``False`` not to hedge it. The same
+            request is then sent again on another connection if its response
+            is slow to come, and the first response is returned.
+
         :param \\**response_kw:
             Additional parameters are passed to
             :meth:`urllib3.response.HTTPResponse.from_httplib`
@@ -544,13 +592,32 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         if not isinstance(retries, Retry):
             retries = Retry.from_int(retries, redirect=redirect, default=self.retries)
 
+        if hedge is None:
+            hedge = self.hedge
+        if hedge and hedge.is_hedged(method, body):
+            return self._hedged_urlopen(
+                hedge, method, url, body, headers, retries,
+                redirect=redirect, assert_same_host=assert_same_host,
+                timeout=timeout, pool_timeout=pool_timeout, release_conn=release_conn,
+                chunked=chunked, body_pos=body_pos, content_encoding=content_encoding,
+                **response_kw)
+
         if release_conn is None:
             release_conn = response_kw.get('preload_content', True)
 
+        parsed_url = None
+        if isinstance(url, Url):
+            parsed_url, url = url, url.url
+
         # Check host
-        if assert_same_host and not self.is_same_host(url):
+        if assert_same_host and not self.is_same_host(url if parsed_url is None else parsed_url):
             raise HostChangedError(self, url, retries)
 
+        # Checked for every attempt, so that retries stop once the circuit
+        # opens.
+        if self.circuit_breaker and not self.circuit_breaker.allow_request(self):
+            raise CircuitOpenError(self, "Circuit is open, the host keeps failing.")
+
         conn = None
 
         # Track whether `conn` needs to be released before
@@ -571,6 +638,13 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             headers = headers.copy()
             headers.update(self.proxy_headers)
 
+        if content_encoding is not None and body is not None:
+            # The length of the compressed body is not known up front, so
+            # drop any length the caller may have computed for the raw body.
+            headers = HTTPHeaderDict(headers)
+            headers.discard('Content-Length')
+            headers['Content-Encoding'] = content_encoding
+
         # Must keep the exception bound to a separate variable or else Python 3
         # complains about UnboundLocalError.
         err = None
@@ -594,11 +668,19 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             if is_new_proxy_conn:
                 self._prepare_proxy(conn)
 
+            # Compress for every attempt, after the body has been rewound, so
+            # that retries send the complete payload again.
+            request_body, request_chunked = body, chunked
+            if content_encoding is not None and body is not None:
+                request_body = encode_body(body, content_encoding)
+                if not isinstance(request_body, six.binary_type):
+                    request_chunked = True
+
             # Make the request on the httplib connection object.
             httplib_response = self._make_request(conn, method, url,
                                                   timeout=timeout_obj,
-                                                  body=body, headers=headers,
-                                                  chunked=chunked)
+                                                  body=request_body, headers=headers,
+                                                  chunked=request_chunked)
 
             # If we're going to release the connection in ``finally:``, then
             # the response doesn't need to know about the connection. Otherwise
@@ -614,8 +696,13 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                                                      pool=self,
                                                      connection=response_conn,
                                                      retries=retries,
+                                                     alpn_protocol=getattr(conn, 'alpn_protocol',
+                                                                           None),
                                                      **response_kw)
 
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success(self)
+
             # Everything went great!
             clean_exit = True
 
@@ -635,6 +722,10 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             elif isinstance(e, (SocketError, HTTPException)):
                 e = ProtocolError('Connection aborted.', e)
 
+            if self.circuit_breaker and (retries._is_connection_error(e) or
+                                         retries._is_read_error(e)):
+                self.circuit_breaker.record_failure(self)
+
             retries = retries.increment(method, url, error=e, _pool=self,
                                         _stacktrace=sys.exc_info()[2])
             retries.sleep()
@@ -665,6 +756,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                                 redirect, assert_same_host,
                                 timeout=timeout, pool_timeout=pool_timeout,
                                 release_conn=release_conn, body_pos=body_pos,
+                                content_encoding=content_encoding, hedge=False,
                                 **response_kw)
 
         def drain_and_release_conn(response):
@@ -703,7 +795,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 assert_same_host=assert_same_host,
                 timeout=timeout, pool_timeout=pool_timeout,
                 release_conn=release_conn, body_pos=body_pos,
-                **response_kw)
+                content_encoding=content_encoding, hedge=False, **response_kw)
 
         # Check if we should retry the HTTP response.
         has_retry_after = bool(response.getheader('Retry-After'))
@@ -728,11 +820,335 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 retries=retries, redirect=redirect,
                 assert_same_host=assert_same_host,
                 timeout=timeout, pool_timeout=pool_timeout,
-                release_conn=release_conn,
-                body_pos=body_pos, **response_kw)
+                release_conn=release_conn, body_pos=body_pos,
+                content_encoding=content_encoding, hedge=False, **response_kw)
+
+        if retries.budget is not None:
+            retries.budget.deposit()
+
+        return response
+
+    def _hedged_urlopen(self, hedge, method, url, body, headers, retries,
+                        release_conn=None, preload_content=True, **kw):
+        """
+        Make the request of :meth:`urlopen` on up to ``hedge.max_hedges + 1``
+        connections, each one sent once the previous ones went without a
+        response for the hedging delay, and return the first response.
+
+        The other responses are discarded and their connections closed as
+        they come in. If all the attempts fail, the first error is raised.
+        """
+        with self._response_times_lock:
+            if self._response_times is None:
+                self._response_times = collections.deque(maxlen=hedge.sample_size)
+            delay = hedge.get_delay(self._response_times)
+
+        results = queue.Queue()
+        lock = threading.Lock()
+        done = []
+
+        def attempt():
+            start = time.time()
+            try:
+                response = self.urlopen(method, url, body, headers, retries,
+                                        release_conn=False if preload_content else release_conn,
+                                        preload_content=False, hedge=False, **kw)
+            except Exception:
+                result = (None, sys.exc_info())
+            else:
+                with self._response_times_lock:
+                    self._response_times.append(time.time() - start)
+                result = (response, None)
+
+            with lock:
+                if not done:
+                    results.put(result)
+                    return
+            if result[0] is not None:
+                _discard_response(result[0])
+
+        if delay is None:
+            # Too few response times are known to tell a slow response yet.
+            attempt()
+            attempts = hedges = 1
+        else:
+            attempts = 0
+            hedges = hedge.max_hedges + 1
+
+        errors = []
+        while True:
+            if attempts < hedges:
+                thread = threading.Thread(target=attempt)
+                thread.daemon = True
+                thread.start()
+                attempts += 1
+                if attempts > 1:
+                    log.debug("Hedging %s %s after %.3fs (attempt %d)",
+                              method, url, delay, attempts)
 
+            try:
+                response, exc_info = results.get(
+                    timeout=delay if attempts < hedges else None)
+            except queue.Empty:
+                continue
+
+            if exc_info is None:
+                break
+            errors.append(exc_info)
+            if len(errors) == attempts:
+                six.reraise(*errors[0])
+
+        with lock:
+            done.append(True)
+        # Other attempts may have got their response at the same time.
+        while not results.empty():
+            other = results.get()[0]
+            if other is not None:
+                _discard_response(other)
+
+        if preload_content:
+            try:
+                response.read(cache_content=True)
+            except BaseException:
+                _discard_response(response)
+                raise
+            response.release_conn()
         return response
 
+    def pipeline(self, requests, depth=8, headers=None, retries=None,
+                 timeout=_Default, pool_timeout=None, **response_kw):
+        """
+        Make a batch of idempotent requests with HTTP/1.1 pipelining: up to
+        ``depth`` requests are written back-to-back on one connection before
+        their responses are read, in order.
+
+        Pipelining saves a round trip per request, which adds up when making
+        many small requests to the same host. It is opt-in because some
+        servers and proxies mishandle it.
+
+        When the connection drops or the server closes it, the requests not
+        answered yet are sent again on a fresh connection. A dropped
+        connection counts as one error for ``retries``, the server closing it
+        normally doesn't.
+
+        :param requests:
+            An iterable of ``(method, url)`` or ``(method, url, body)``
+            tuples. Only methods ``retries`` may retry are accepted, see
+            :attr:`Retry.method_whitelist <urllib3.util.retry.Retry.method_whitelist>`,
+            since a request may be sent again after the server has acted on
+            it. The body must be bytes, text or a file object.
+
+        :param depth:
+            Most requests written on the connection before their responses
+            are read.
+
+        :param headers:
+            Headers of all the requests, the pool's headers by default.
+
+        :param retries:
+            Configure the number of retries to allow across the whole batch,
+            as for :meth:`urlopen`. Redirects and statuses are not retried,
+            every response is returned as it is.
+
+        :param timeout:
+            If specified, overrides the default timeout of the pool. The read
+            timeout applies to each response.
+
+        :param pool_timeout:
+            If set and the pool is set to block=True, then this method will
+            block for ``pool_timeout`` seconds and raise EmptyPoolError if no
+            connection is available within the time period.
+
+        :param \\**response_kw:
+            Additional parameters are passed to
+            :meth:`urllib3.response.HTTPResponse.from_httplib`. The content of
+            each response is always preloaded, so that the next one can be
+            read.
+
+        :return:
+            The list of responses, in the order of ``requests``.
+        """
+        if headers is None:
+            headers = self.headers
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, redirect=False, default=self.retries)
+
+        if self.scheme == 'http':
+            headers = headers.copy()
+            headers.update(self.proxy_headers)
+
+        # Encode every request once, so that retries can send it again.
+        pending = collections.deque()
+        for index, item in enumerate(requests):
+            method, url = item[0], item[1]
+            body = item[2] if len(item) > 2 else None
+            if isinstance(url, Url):
+                url = url.url
+            if not retries._is_method_retryable(method):
+                raise ValueError("%s requests can't be pipelined, they may not "
+                                 "be sent again safely" % method)
+            if self.proxy is None and not self.is_same_host(url):
+                raise HostChangedError(self, url, retries)
+
+            request = _encode_request(method, url, self._host_header(url), body, headers)
+            pending.append((index, method, url, request))
+
+        response_kw['preload_content'] = True
+        responses = [None] * len(pending)
+        while pending:
+            conn = None
+            # The server may close the connection after any response, the
+            # remaining requests are then sent on a fresh one.
+            keep_conn = False
+            method, url = pending[0][1:3]
+            try:
+                timeout_obj = self._get_timeout(timeout)
+                conn = self._get_conn(timeout=pool_timeout)
+                keep_conn = self._pipeline_batch(conn, pending, depth, timeout_obj,
+                                                 retries, responses, response_kw)
+
+            except queue.Empty:
+                # Timed out by queue.
+                raise EmptyPoolError(self, "No pool connections are available.")
+
+            except (TimeoutError, HTTPException, SocketError, ProtocolError,
+                    BaseSSLError, SSLError, CertificateError) as e:
+                if isinstance(e, (BaseSSLError, CertificateError)):
+                    e = SSLError(e)
+                elif isinstance(e, (SocketError, NewConnectionError)) and self.proxy:
+                    e = ProxyError('Cannot connect to proxy.', e)
+                elif isinstance(e, (SocketError, HTTPException)):
+                    e = ProtocolError('Connection aborted.', e)
+
+                method, url = pending[0][1:3]
+                retries = retries.increment(method, url, error=e, _pool=self,
+                                            _stacktrace=sys.exc_info()[2])
+                retries.sleep()
+                log.warning("Retrying (%r) %d pipelined requests after connection "
+                            "broken by '%r': %s", retries, len(pending), e, url)
+
+            finally:
+                if not keep_conn:
+                    conn = conn and conn.close()
+                self._put_conn(conn)
+
+        return responses
+
+    def _pipeline_batch(self, conn, pending, depth, timeout_obj, retries, responses,
+                        response_kw):
+        """
+        Send up to ``depth`` of the ``pending`` requests on ``conn`` and read
+        their responses into ``responses``, removing the requests answered
+        from ``pending``. Return whether ``conn`` can be reused.
+        """
+        batch = list(itertools.islice(pending, depth))
+        url = batch[0][2]
+
+        timeout_obj.start_connect()
+        conn.timeout = timeout_obj.connect_timeout
+
+        # Connect, as httplib would on sending the first request.
+        try:
+            if self.proxy is not None and not getattr(conn, 'sock', None):
+                self._prepare_proxy(conn)
+            self._validate_conn(conn)
+            if not conn.sock:
+                conn.connect()
+        except (SocketTimeout, BaseSSLError) as e:
+            self._raise_timeout(err=e, url=url, timeout_value=conn.timeout)
+            raise
+
+        read_timeout = timeout_obj.read_timeout
+        if read_timeout == 0:
+            raise ReadTimeoutError(
+                self, url, "Read timed out. (read timeout=%s)" % read_timeout)
+        if read_timeout is Timeout.DEFAULT_TIMEOUT:
+            conn.sock.settimeout(socket.getdefaulttimeout())
+        else:  # None or a value
+            conn.sock.settimeout(read_timeout)
+
+        # All the responses are read from one buffered file, where one
+        # response may already have been read along with the previous one.
+        fp = conn.sock.makefile('rb')
+        try:
+            conn.sock.sendall(b''.join(request for _, _, _, request in batch))
+            self.num_requests += len(batch)
+
+            for index, method, url, _ in batch:
+                httplib_response = conn.response_class(_SharedFile(fp), method=method)
+                try:
+                    httplib_response.begin()
+                except (SocketTimeout, BaseSSLError, SocketError) as e:
+                    self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
+                    raise
+
+                log.debug("%s://%s:%s \"%s %s %s\" %s %s (pipelined)", self.scheme,
+                          self.host, self.port, method, url, 'HTTP/1.1',
+                          httplib_response.status, httplib_response.length)
+
+                response_kw['request_method'] = method
+                try:
+                    response = self.ResponseCls.from_httplib(
+                        httplib_response, pool=self, retries=retries,
+                        alpn_protocol=getattr(conn, 'alpn_protocol', None), **response_kw)
+                except (SocketTimeout, BaseSSLError, SocketError) as e:
+                    self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
+                    raise
+
+                responses[index] = response
+                pending.popleft()
+                if httplib_response.will_close:
+                    return False
+        finally:
+            fp.close()
+
+        return True
+
+    def _host_header(self, url):
+        """
+        Return the ``Host`` header httplib would send with a request for
+        ``url`` on a connection of this pool.
+        """
+        if not url.startswith('/'):
+            # An absolute URL, sent to a proxy
+            return parse_url(url).netloc
+
+        host = self.host
+        if ':' in host:
+            host = '[%s]' % host
+        if self.port and self.port != port_by_scheme.get(self.scheme):
+            host = '%s:%d' % (host, self.port)
+        return host
+
+
+def _discard_response(response):
+    """
+    Close ``response`` along with its connection and give the slot of the
+    connection back to the pool.
+    """
+    response.close()
+    response.release_conn()
+
+
+class _SharedFile(object):
+    """
+    Stands in for a socket whose ``makefile`` is a buffered file shared
+    by several responses, which is left open when they close it.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def makefile(self, *args, **kw):
+        return self
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
 
 class HTTPSConnectionPool(HTTPConnectionPool):
     """
@@ -747,9 +1163,12 @@ class HTTPSConnectionPool(HTTPConnectionPool):
     If ``assert_hostname`` is False, no verification is done.
 
     The ``key_file``, ``cert_file``, ``cert_reqs``, ``ca_certs``,
-    ``ca_cert_dir``, and ``ssl_version`` are only used if :mod:`ssl` is
-    available and are fed into :meth:`urllib3.util.ssl_wrap_socket` to upgrade
-    the connection socket into an SSL socket.
+    ``ca_cert_dir``, ``ssl_version`` and ``alpn_protocols`` are only used if
+    :mod:`ssl` is available and are fed into
+    :meth:`urllib3.util.ssl_wrap_socket` to upgrade the connection socket into
+    an SSL socket. The protocol negotiated with ALPN, if any, is available as
+    :attr:`.HTTPResponse.alpn_protocol`. ``alpn_protocols`` aren't set on an
+    ``ssl_context`` given in ``conn_kw``, which must offer them itself.
     """
 
     scheme = 'https'
@@ -762,10 +1181,12 @@ class HTTPSConnectionPool(HTTPConnectionPool):
                  key_file=None, cert_file=None, cert_reqs=None,
                  ca_certs=None, ssl_version=None,
                  assert_hostname=None, assert_fingerprint=None,
-                 ca_cert_dir=None, **conn_kw):
+                 ca_cert_dir=None, alpn_protocols=None, hedge=None,
+                 circuit_breaker=None, **conn_kw):
 
         HTTPConnectionPool.__init__(self, host, port, strict, timeout, maxsize,
                                     block, headers, retries, _proxy, _proxy_headers,
+                                    hedge=hedge, circuit_breaker=circuit_breaker,
                                     **conn_kw)
 
         if ca_certs and cert_reqs is None:
@@ -779,6 +1200,7 @@ class HTTPSConnectionPool(HTTPConnectionPool):
         self.ssl_version = ssl_version
         self.assert_hostname = assert_hostname
         self.assert_fingerprint = assert_fingerprint
+        self.alpn_protocols = alpn_protocols
 
     def _prepare_conn(self, conn):
         """
@@ -795,6 +1217,7 @@ class HTTPSConnectionPool(HTTPConnectionPool):
                           assert_hostname=self.assert_hostname,
                           assert_fingerprint=self.assert_fingerprint)
             conn.ssl_version = self.ssl_version
+        conn.alpn_protocols = self.alpn_protocols
         return conn
 
     def _prepare_proxy(self, conn):
@@ -356,6 +356,22 @@ try:
     ]
     Security.SecCopyErrorMessageString.restype = CFStringRef
 
+    # ALPN is only available on macOS 10.13 and later.
+    try:
+        Security.SSLSetALPNProtocols.argtypes = [
+            SSLContextRef,
+            CFArrayRef
+        ]
+        Security.SSLSetALPNProtocols.restype = OSStatus
+
+        Security.SSLCopyALPNProtocols.argtypes = [
+            SSLContextRef,
+            POINTER(CFArrayRef)
+        ]
+        Security.SSLCopyALPNProtocols.restype = OSStatus
+    except AttributeError:
+        pass
+
     Security.SSLReadFunc = SSLReadFunc
     Security.SSLWriteFunc = SSLWriteFunc
     Security.SSLContextRef = SSLContextRef
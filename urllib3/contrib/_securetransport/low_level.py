@@ -56,6 +56,38 @@ def _cf_dictionary_from_tuples(tuples):
     )
 
 
+def _cf_string_array_from_list(strings):
+    """
+    Given a list of text strings, create a CFArray of CFStrings from it. This
+    CFArray object must be CFReleased by the caller.
+    """
+    string_array = CoreFoundation.CFArrayCreateMutable(
+        CoreFoundation.kCFAllocatorDefault,
+        0,
+        ctypes.byref(CoreFoundation.kCFTypeArrayCallBacks)
+    )
+    if not string_array:
+        raise ssl.SSLError("Unable to allocate memory!")
+
+    try:
+        for string in strings:
+            cf_string = CoreFoundation.CFStringCreateWithCString(
+                CoreFoundation.kCFAllocatorDefault,
+                string.encode('utf-8'),
+                CFConst.kCFStringEncodingUTF8
+            )
+            if not cf_string:
+                raise ssl.SSLError("Unable to allocate memory!")
+
+            CoreFoundation.CFArrayAppendValue(string_array, cf_string)
+            CoreFoundation.CFRelease(cf_string)
+    except Exception:
+        CoreFoundation.CFRelease(string_array)
+        raise
+
+    return string_array
+
+
 def _cf_string_to_unicode(value):
     """
     Creates a Unicode string from a CFString object. Used entirely for error
@@ -0,0 +1,733 @@
+"""
+This module provides provisional pools for :mod:`asyncio` applications:
+:class:`AsyncPoolManager`, :class:`AsyncHTTPConnectionPool` and
+:class:`AsyncHTTPSConnectionPool`. They take the same arguments as their
+blocking counterparts, but their ``urlopen`` and ``request`` methods are
+coroutines, so that a request in flight ties up neither a thread nor the event
+loop. It requires Python 3.4 or later.
+
+Example usage::
+
+    import asyncio
+    from urllib3.contrib.asyncpool import AsyncPoolManager
+
+    @asyncio.coroutine
+    def fetch_all(urls):
+        with AsyncPoolManager(maxsize=4) as http:
+            requests = [http.request('GET', url) for url in urls]
+            return (yield from asyncio.gather(*requests))
+
+    responses = asyncio.get_event_loop().run_until_complete(fetch_all(urls))
+
+Pools must only be used from the event loop which was current when they were
+created. Requests are retried according to :class:`~urllib3.util.retry.Retry`,
+waiting with :func:`asyncio.sleep` between attempts, and responses are
+:class:`~urllib3.response.HTTPResponse` objects.
+
+Known Limitations:
+
+- Responses are read into memory in full before they are returned, so
+  ``preload_content=False`` only defers decoding their content.
+- Request bodies must be bytes, text or file objects, not iterables.
+- Proxies are not supported.
+- HTTPS requires the standard library's :mod:`ssl` module; pyOpenSSL and
+  SecureTransport are not used even if injected.
+"""
+from __future__ import absolute_import
+
+import asyncio
+import io
+import logging
+import socket
+import sys
+import warnings
+
+from ..connection import (
+    FastHTTPResponse, HTTPConnection, HTTPException, BaseSSLError,
+    port_by_scheme, _encode_request, _match_hostname,
+)
+from ..connectionpool import ConnectionPool, HTTPConnectionPool, _Default
+from ..exceptions import (
+    ClosedPoolError,
+    ConnectTimeoutError,
+    EmptyPoolError,
+    HostChangedError,
+    InsecureRequestWarning,
+    MaxRetryError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+    SSLError,
+    TimeoutError,
+)
+from ..packages.ssl_match_hostname import CertificateError
+from ..poolmanager import PoolManager
+from ..request import RequestMethods
+from ..response import HTTPResponse
+from ..util.connection import allowed_gai_family, _set_socket_options
+from ..util.request import set_file_position
+from ..util.retry import Retry
+from ..util.ssl_ import (
+    assert_fingerprint, create_urllib3_context, resolve_cert_reqs,
+    resolve_ssl_version,
+)
+from ..util.timeout import Timeout
+from ..util.url import Url, parse_url
+
+from ..packages.six.moves.urllib.parse import urljoin
+
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+
+__all__ = ['AsyncPoolManager', 'AsyncHTTPConnectionPool', 'AsyncHTTPSConnectionPool']
+
+
+log = logging.getLogger(__name__)
+
+
+def _seconds(timeout):
+    if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+        return socket.getdefaulttimeout()
+    return timeout
+
+
+class AsyncHTTPConnection(object):
+    """
+    A connection to a host on top of :mod:`asyncio` streams, sending requests
+    written out in full and reading responses back in full.
+
+    Its coroutines raise :class:`asyncio.TimeoutError` when the time given
+    them runs out, which the pool turns into the exception to raise.
+    """
+
+    default_socket_options = HTTPConnection.default_socket_options
+
+    def __init__(self, host, port, socket_options=None, source_address=None,
+                 ssl_context=None, assert_hostname=None, assert_fingerprint=None):
+        self.host = host
+        self.port = port
+        if socket_options is None:
+            socket_options = self.default_socket_options
+        self.socket_options = socket_options
+        self.source_address = source_address
+        self.ssl_context = ssl_context
+        self.assert_hostname = assert_hostname
+        self.assert_fingerprint = assert_fingerprint
+        self.is_verified = False
+        self.reader = None
+        self.writer = None
+
+    @asyncio.coroutine
+    def connect(self, timeout=None):
+        """
+        Open the connection, within ``timeout`` seconds if given.
+        """
+        loop = asyncio.get_event_loop()
+        sock = yield from asyncio.wait_for(self._new_socket(loop), timeout)
+        try:
+            server_hostname = self.host if self.ssl_context is not None else None
+            self.reader, self.writer = yield from asyncio.wait_for(
+                asyncio.open_connection(sock=sock, ssl=self.ssl_context,
+                                        server_hostname=server_hostname),
+                timeout)
+        except BaseException:
+            sock.close()
+            raise
+
+        if self.ssl_context is not None:
+            self._verify(self.writer.get_extra_info('ssl_object'))
+
+    @asyncio.coroutine
+    def _new_socket(self, loop):
+        try:
+            addresses = yield from loop.getaddrinfo(self.host, self.port,
+                                                    family=allowed_gai_family(),
+                                                    type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NewConnectionError(
+                self, "Failed to establish a new connection: %s" % e)
+
+        err = None
+        for af, socktype, proto, _canonname, sa in addresses:
+            sock = socket.socket(af, socktype, proto)
+            try:
+                _set_socket_options(sock, self.socket_options)
+                sock.setblocking(False)
+                if self.source_address:
+                    sock.bind(self.source_address)
+                yield from loop.sock_connect(sock, sa)
+                return sock
+            except socket.error as e:
+                err = e
+                sock.close()
+            except BaseException:
+                sock.close()
+                raise
+
+        raise NewConnectionError(
+            self, "Failed to establish a new connection: %s" % err)
+
+    def _verify(self, sslobj):
+        context = self.ssl_context
+        if self.assert_fingerprint:
+            assert_fingerprint(sslobj.getpeercert(binary_form=True),
+                               self.assert_fingerprint)
+        elif (context.verify_mode != ssl.CERT_NONE and
+              not getattr(context, 'check_hostname', False) and
+              self.assert_hostname is not False):
+            _match_hostname(sslobj.getpeercert(), self.assert_hostname or self.host)
+
+        self.is_verified = (context.verify_mode == ssl.CERT_REQUIRED or
+                            self.assert_fingerprint is not None)
+
+    def is_dropped(self):
+        """
+        Whether the server has closed the connection since it was last used,
+        or it broke.
+        """
+        reader = self.reader
+        return reader.at_eof() or reader.exception() is not None
+
+    @asyncio.coroutine
+    def send(self, data, timeout=None):
+        self.writer.write(data)
+        yield from asyncio.wait_for(self.writer.drain(), timeout)
+
+    @asyncio.coroutine
+    def read_response(self, method, timeout=None):
+        """
+        Read a response, skipping any informational ones, and return it as a
+        :class:`~urllib3.connection.FastHTTPResponse` whose body is in memory.
+
+        ``timeout`` bounds every wait for data, not the whole response.
+        """
+        while True:
+            head = yield from self._read_head(timeout)
+            status = head.split(None, 2)[1:2]
+            if not status or not status[0].startswith(b'1') or status[0] == b'101':
+                break
+
+        response = FastHTTPResponse(_ResponseSocket(head), method=method)
+        response.begin()
+
+        if response.length is not None:
+            body = yield from self._read(self.reader.readexactly(response.length), timeout)
+        elif response.chunked:
+            body = yield from self._read_chunks(timeout)
+        else:
+            # The end of the connection is the end of the body
+            body = yield from self._read(self.reader.read(), timeout)
+
+        response.fp = io.BytesIO(body)
+        return response
+
+    @asyncio.coroutine
+    def _read(self, coro, timeout):
+        try:
+            return (yield from asyncio.wait_for(coro, timeout))
+        except asyncio.IncompleteReadError as e:
+            raise ProtocolError('Connection broken: IncompleteRead(%d bytes read, '
+                                '%d more expected)' % (len(e.partial), e.expected), e)
+        except ValueError as e:  # From readline(), past the limit of the stream
+            raise ProtocolError('Connection broken: line too long', e)
+
+    @asyncio.coroutine
+    def _read_head(self, timeout):
+        lines = []
+        while True:
+            line = yield from self._read(self.reader.readline(), timeout)
+            if not line:
+                if not lines:
+                    raise ProtocolError('Connection aborted.', ConnectionResetError(
+                        'Remote end closed connection without response'))
+                raise ProtocolError('Connection broken: incomplete response head')
+            lines.append(line)
+            if line in (b'\r\n', b'\n'):
+                return b''.join(lines)
+            if len(lines) > FastHTTPResponse.max_headers + 1:
+                raise ProtocolError('Connection broken: got more than %d headers' %
+                                    FastHTTPResponse.max_headers)
+
+    @asyncio.coroutine
+    def _read_chunks(self, timeout):
+        # Keep the chunks encoded, httplib decodes them as the body is read.
+        body = bytearray()
+        while True:
+            line = yield from self._read(self.reader.readline(), timeout)
+            body += line
+            size = line.split(b';', 1)[0].strip()
+            try:
+                size = int(size, 16)
+            except ValueError:
+                raise ProtocolError('Connection broken: invalid chunk length %r' % size)
+            if not size:
+                break
+            body += yield from self._read(self.reader.readexactly(size + 2), timeout)
+
+        # The trailer ends with an empty line
+        while True:
+            line = yield from self._read(self.reader.readline(), timeout)
+            body += line
+            if not line.strip():
+                return bytes(body)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class _ResponseSocket(object):
+    """Hands bytes already received to httplib as if it read them itself."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def makefile(self, *args, **kw):
+        return io.BytesIO(self._data)
+
+
+class AsyncHTTPConnectionPool(ConnectionPool, RequestMethods):
+    """
+    Connection pool for one host whose :meth:`urlopen` and :meth:`request`
+    methods are coroutines. See
+    :class:`~urllib3.connectionpool.HTTPConnectionPool` for its parameters.
+
+    With ``block=True``, requests wait their turn for a connection without
+    blocking the event loop.
+
+    :param \\**conn_kw:
+        ``socket_options`` and ``source_address`` of the connections.
+    """
+
+    scheme = 'http'
+    ConnectionCls = AsyncHTTPConnection
+    ResponseCls = HTTPResponse
+    QueueCls = asyncio.LifoQueue
+
+    def __init__(self, host, port=None, strict=False,
+                 timeout=Timeout.DEFAULT_TIMEOUT, maxsize=1, block=False,
+                 headers=None, retries=None, **conn_kw):
+        ConnectionPool.__init__(self, host, port)
+        RequestMethods.__init__(self, headers)
+
+        if not isinstance(timeout, Timeout):
+            timeout = Timeout.from_float(timeout)
+
+        if retries is None:
+            retries = Retry.DEFAULT
+
+        self.timeout = timeout
+        self.retries = retries
+
+        self.pool = self.QueueCls(maxsize)
+        self.block = block
+
+        # Fill the queue up so that doing get() on it will wait properly
+        for _ in range(maxsize):
+            self.pool.put_nowait(None)
+
+        # These are mostly for testing and debugging purposes.
+        self.num_connections = 0
+        self.num_requests = 0
+        self.conn_kw = conn_kw
+
+    # These don't involve any I/O.
+    is_same_host = HTTPConnectionPool.is_same_host
+    _get_timeout = HTTPConnectionPool._get_timeout
+    _absolute_url = HTTPConnectionPool._absolute_url
+
+    def _new_conn(self):
+        """
+        Return a fresh, unopened :class:`AsyncHTTPConnection`.
+        """
+        self.num_connections += 1
+        log.debug("Starting new HTTP connection (%d): %s:%s",
+                  self.num_connections, self.host, self.port or "80")
+        return self.ConnectionCls(self.host, self.port or port_by_scheme[self.scheme],
+                                  **self.conn_kw)
+
+    @asyncio.coroutine
+    def _get_conn(self, timeout=None):
+        """
+        Get a connection. Will return a pooled connection if one is available.
+
+        If no connections are available and :prop:`.block` is ``False``, then a
+        fresh connection is returned.
+
+        :param timeout:
+            Seconds to wait before giving up and raising
+            :class:`urllib3.exceptions.EmptyPoolError` if the pool is empty and
+            :prop:`.block` is ``True``.
+        """
+        if self.pool is None:
+            raise ClosedPoolError(self, "Pool is closed.")
+
+        conn = None
+        try:
+            if self.block:
+                conn = yield from asyncio.wait_for(self.pool.get(), timeout)
+            else:
+                conn = self.pool.get_nowait()
+        except asyncio.TimeoutError:
+            raise EmptyPoolError(self, "No pool connections are available.")
+        except asyncio.QueueEmpty:
+            pass  # Oh well, we'll create a new connection then
+
+        # If this is a persistent connection, check if it got disconnected
+        if conn and conn.is_dropped():
+            log.debug("Resetting dropped connection: %s", self.host)
+            conn.close()
+            conn = None
+
+        return conn or self._new_conn()
+
+    def _put_conn(self, conn):
+        """
+        Put a connection back into the pool, or close it if the pool is full
+        or closed.
+        """
+        try:
+            self.pool.put_nowait(conn)
+            return  # Everything is dandy, done.
+        except AttributeError:
+            # self.pool is None.
+            pass
+        except asyncio.QueueFull:
+            # This should never happen if self.block == True
+            log.warning(
+                "Connection pool is full, discarding connection: %s",
+                self.host)
+
+        # Connection never got put back into the pool, close it.
+        if conn:
+            conn.close()
+
+    def _validate_conn(self, conn):
+        """
+        Called right after a connection is opened, before any request is made
+        on it.
+        """
+        pass
+
+    @asyncio.coroutine
+    def _make_request(self, conn, method, url, timeout_obj, body=None, headers=None):
+        """
+        Perform a request on a given connection and read its response in
+        full, opening the connection first if needed.
+        """
+        self.num_requests += 1
+
+        timeout_obj.start_connect()
+        if conn.writer is None:
+            connect_timeout = timeout_obj.connect_timeout
+            try:
+                yield from conn.connect(_seconds(connect_timeout))
+            except asyncio.TimeoutError:
+                raise ConnectTimeoutError(
+                    conn, "Connection to %s timed out. (connect timeout=%s)" %
+                    (self.host, connect_timeout))
+            self._validate_conn(conn)
+
+        host = self.host
+        if ':' in host:
+            host = '[%s]' % host
+        if self.port and self.port != port_by_scheme.get(self.scheme):
+            host = '%s:%d' % (host, self.port)
+        request = _encode_request(method, url, host, body, headers)
+
+        read_timeout = timeout_obj.read_timeout
+        try:
+            yield from conn.send(request, _seconds(read_timeout))
+            httplib_response = yield from conn.read_response(method, _seconds(read_timeout))
+        except asyncio.TimeoutError:
+            raise ReadTimeoutError(
+                self, url, "Read timed out. (read timeout=%s)" % read_timeout)
+
+        log.debug("%s://%s:%s \"%s %s %s\" %s %s", self.scheme, self.host, self.port,
+                  method, url, 'HTTP/1.1', httplib_response.status,
+                  httplib_response.length)
+        return httplib_response
+
+    def close(self):
+        """
+        Close all pooled connections and disable the pool.
+        """
+        # Disable access to the pool
+        old_pool, self.pool = self.pool, None
+        if old_pool is None:
+            return
+
+        while not old_pool.empty():
+            conn = old_pool.get_nowait()
+            if conn:
+                conn.close()
+
+    @asyncio.coroutine
+    def urlopen(self, method, url, body=None, headers=None, retries=None,
+                redirect=True, assert_same_host=True, timeout=_Default,
+                pool_timeout=None, release_conn=None, chunked=False, body_pos=None,
+                **response_kw):
+        """
+        Get a connection from the pool and perform an HTTP request, as
+        :meth:`urllib3.connectionpool.HTTPConnectionPool.urlopen` does.
+
+        The response is read in full before it is returned and the connection
+        released to the pool, so ``release_conn`` is ignored. ``chunked`` isn't
+        supported and raises :class:`NotImplementedError`.
+        """
+        if chunked:
+            raise NotImplementedError(
+                'Chunked request bodies are not supported by AsyncHTTPConnectionPool')
+
+        if headers is None:
+            headers = self.headers
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, redirect=redirect, default=self.retries)
+
+        if isinstance(url, Url):
+            url = url.url
+
+        while True:
+            if assert_same_host and not self.is_same_host(url):
+                raise HostChangedError(self, url, retries)
+
+            # Rewind body position, if needed. Record current position
+            # for future rewinds in the event of a redirect/retry.
+            body_pos = set_file_position(body, body_pos)
+
+            conn = None
+            clean_exit = False
+            try:
+                timeout_obj = self._get_timeout(timeout)
+                conn = yield from self._get_conn(timeout=pool_timeout)
+                httplib_response = yield from self._make_request(
+                    conn, method, url, timeout_obj, body=body, headers=headers)
+                clean_exit = True
+
+            except (TimeoutError, HTTPException, socket.error, ProtocolError,
+                    BaseSSLError, SSLError, CertificateError) as e:
+                if isinstance(e, (BaseSSLError, CertificateError)):
+                    e = SSLError(e)
+                elif isinstance(e, (socket.error, HTTPException)):
+                    e = ProtocolError('Connection aborted.', e)
+
+                retries = retries.increment(method, url, error=e, _pool=self,
+                                            _stacktrace=sys.exc_info()[2])
+                log.warning("Retrying (%r) after connection "
+                            "broken by '%r': %s", retries, e, url)
+                backoff = retries.get_backoff_time()
+                if backoff > 0:
+                    yield from asyncio.sleep(backoff)
+                continue
+
+            finally:
+                if not clean_exit and conn is not None:
+                    # Throw the connection away, putting None back in the
+                    # pool to avoid leaking its slot. This also covers the
+                    # task being cancelled.
+                    conn.close()
+                    self._put_conn(None)
+
+            # The whole response has been read, so the connection can be
+            # reused straight away.
+            if httplib_response.will_close:
+                conn.close()
+                conn = None
+            self._put_conn(conn)
+
+            response_kw['request_method'] = method
+            response = self.ResponseCls.from_httplib(httplib_response, pool=self,
+                                                     retries=retries,
+                                                     **response_kw)
+
+            # Handle redirect?
+            redirect_location = redirect and response.get_redirect_location()
+            if redirect_location:
+                if response.status == 303:
+                    method = 'GET'
+
+                try:
+                    retries = retries.increment(method, url, response=response, _pool=self)
+                except MaxRetryError:
+                    if retries.raise_on_redirect:
+                        raise
+                    return response
+
+                delay = retries.get_retry_after(response)
+                if delay:
+                    yield from asyncio.sleep(delay)
+                log.debug("Redirecting %s -> %s", url, redirect_location)
+                url = redirect_location
+                continue
+
+            # Check if we should retry the HTTP response.
+            has_retry_after = bool(response.getheader('Retry-After'))
+            if retries.is_retry(method, response.status, has_retry_after):
+                try:
+                    retries = retries.increment(method, url, response=response, _pool=self)
+                except MaxRetryError:
+                    if retries.raise_on_status:
+                        raise
+                    return response
+
+                delay = retries.get_retry_after(response) or retries.get_backoff_time()
+                if delay > 0:
+                    yield from asyncio.sleep(delay)
+                log.debug("Retry: %s", url)
+                continue
+
+            if retries.budget is not None:
+                retries.budget.deposit()
+
+            return response
+
+
+class AsyncHTTPSConnectionPool(AsyncHTTPConnectionPool):
+    """
+    Same as :class:`.AsyncHTTPConnectionPool`, but HTTPS. Certificates are
+    verified as by :class:`~urllib3.connectionpool.HTTPSConnectionPool`, with
+    the same parameters.
+    """
+
+    scheme = 'https'
+
+    def __init__(self, host, port=None, strict=False,
+                 timeout=Timeout.DEFAULT_TIMEOUT, maxsize=1, block=False,
+                 headers=None, retries=None, key_file=None, cert_file=None,
+                 cert_reqs=None, ca_certs=None, ssl_version=None,
+                 assert_hostname=None, assert_fingerprint=None,
+                 ca_cert_dir=None, ssl_context=None, **conn_kw):
+        if ssl is None:
+            raise SSLError("Can't connect to HTTPS URL because the SSL "
+                           "module is not available.")
+
+        AsyncHTTPConnectionPool.__init__(self, host, port, strict, timeout, maxsize,
+                                         block, headers, retries, **conn_kw)
+
+        # As VerifiedHTTPSConnection guesses it
+        if cert_reqs is None:
+            if ca_certs or ca_cert_dir:
+                cert_reqs = 'CERT_REQUIRED'
+            elif ssl_context is not None:
+                cert_reqs = ssl_context.verify_mode
+
+        if ssl_context is None:
+            ssl_context = create_urllib3_context(resolve_ssl_version(ssl_version),
+                                                 resolve_cert_reqs(cert_reqs))
+        ssl_context.verify_mode = resolve_cert_reqs(cert_reqs)
+        if ca_certs or ca_cert_dir:
+            ssl_context.load_verify_locations(ca_certs, ca_cert_dir)
+        elif getattr(ssl_context, 'load_default_certs', None) is not None:
+            ssl_context.load_default_certs()
+        if cert_file:
+            ssl_context.load_cert_chain(cert_file, key_file)
+
+        self.ssl_context = ssl_context
+        self.assert_hostname = assert_hostname
+        self.assert_fingerprint = assert_fingerprint
+
+    def _new_conn(self):
+        """
+        Return a fresh, unopened :class:`AsyncHTTPConnection` to be secured
+        with TLS.
+        """
+        self.num_connections += 1
+        log.debug("Starting new HTTPS connection (%d): %s:%s",
+                  self.num_connections, self.host, self.port or "443")
+        return self.ConnectionCls(self.host, self.port or port_by_scheme[self.scheme],
+                                  ssl_context=self.ssl_context,
+                                  assert_hostname=self.assert_hostname,
+                                  assert_fingerprint=self.assert_fingerprint,
+                                  **self.conn_kw)
+
+    def _validate_conn(self, conn):
+        super(AsyncHTTPSConnectionPool, self)._validate_conn(conn)
+
+        if not conn.is_verified:
+            warnings.warn((
+                'Unverified HTTPS request is being made. '
+                'Adding certificate verification is strongly advised. See: '
+                'https://urllib3.readthedocs.io/en/latest/advanced-usage.html'
+                '#ssl-warnings'),
+                InsecureRequestWarning)
+
+
+class AsyncPoolManager(PoolManager):
+    """
+    A :class:`~urllib3.poolmanager.PoolManager` of
+    :class:`.AsyncHTTPConnectionPool` and :class:`.AsyncHTTPSConnectionPool`,
+    whose :meth:`urlopen` and :meth:`request` methods are coroutines. It takes
+    the same parameters.
+
+    Example::
+
+        >>> manager = AsyncPoolManager(num_pools=2)
+        >>> r = yield from manager.request('GET', 'http://google.com/')
+    """
+
+    def __init__(self, num_pools=10, headers=None, **connection_pool_kw):
+        super(AsyncPoolManager, self).__init__(num_pools, headers, **connection_pool_kw)
+        self.pool_classes_by_scheme = {
+            'http': AsyncHTTPConnectionPool,
+            'https': AsyncHTTPSConnectionPool,
+        }
+
+    @asyncio.coroutine
+    def urlopen(self, method, url, redirect=True, **kw):
+        """
+        Same as :meth:`urllib3.poolmanager.PoolManager.urlopen`, following
+        redirects across hosts, but a coroutine.
+        """
+        while True:
+            u = parse_url(url)
+            conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
+
+            kw['assert_same_host'] = False
+            kw['redirect'] = False
+            if 'headers' not in kw:
+                kw['headers'] = self.headers
+
+            response = yield from conn.urlopen(method, u.request_uri, **kw)
+
+            redirect_location = redirect and response.get_redirect_location()
+            if not redirect_location:
+                return response
+
+            if isinstance(url, Url):
+                url = url.url
+
+            # Support relative URLs for redirecting.
+            redirect_location = urljoin(url, redirect_location)
+
+            # RFC 7231, Section 6.4.4
+            if response.status == 303:
+                method = 'GET'
+
+            retries = kw.get('retries')
+            if not isinstance(retries, Retry):
+                retries = Retry.from_int(retries, redirect=redirect)
+
+            try:
+                retries = retries.increment(method, url, response=response, _pool=conn)
+            except MaxRetryError:
+                if retries.raise_on_redirect:
+                    raise
+                return response
+
+            kw['retries'] = retries
+
+            log.info("Redirecting %s -> %s", url, redirect_location)
+            url = redirect_location
+
+    def request_many(self, *args, **kwargs):
+        """
+        Not supported, the requests of an :class:`AsyncPoolManager` are run
+        concurrently with :func:`asyncio.gather` instead.
+        """
+        raise NotImplementedError(
+            'Use asyncio.gather() to make concurrent requests with an AsyncPoolManager')
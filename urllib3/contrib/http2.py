@@ -0,0 +1,577 @@
+"""
+This module contains provisional support for HTTP/2, with the h2 package. To
+enable its functionality, either install h2 or install this module with the
+``http2`` extra.
+
+:class:`HTTP2ConnectionPool` is an
+:class:`~urllib3.connectionpool.HTTPSConnectionPool` which negotiates HTTP/2
+with ALPN and then multiplexes the requests of all threads using the pool
+over a single TLS connection, rather than opening one connection for each
+request in flight. To use it for all HTTPS requests of a
+:class:`~urllib3.poolmanager.PoolManager`::
+
+    from urllib3 import PoolManager
+    from urllib3.contrib.http2 import HTTP2ConnectionPool
+    from urllib3.poolmanager import pool_classes_by_scheme
+
+    http = PoolManager()
+    http.pool_classes_by_scheme = dict(pool_classes_by_scheme,
+                                       https=HTTP2ConnectionPool)
+
+Servers which don't negotiate HTTP/2 are spoken to over HTTP/1.1, exactly as
+by :class:`~urllib3.connectionpool.HTTPSConnectionPool`. Retries, redirects
+and timeouts behave as they do over HTTP/1.1, the read timeout bounding the
+wait for each part of a response.
+
+Known Limitations:
+
+- Request bodies must be bytes, text or file objects, which are read in full.
+- Responses are read into memory in full before they are returned, so
+  ``preload_content=False`` only defers decoding their content.
+- Server push and stream priorities are not supported.
+- Proxies are not supported.
+- HTTP/2 is only used where ALPN is supported, see
+  :func:`urllib3.util.ssl_.create_urllib3_context`. Elsewhere requests are
+  always made over HTTP/1.1.
+"""
+from __future__ import absolute_import
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    import warnings
+    from ..exceptions import DependencyWarning
+
+    warnings.warn((
+        'HTTP/2 support in urllib3 requires the installation of optional '
+        'dependencies: specifically, h2. For more information, see '
+        'https://urllib3.readthedocs.io/en/latest/reference/urllib3.contrib.html'
+        ),
+        DependencyWarning
+    )
+    raise
+
+import io
+import logging
+import socket
+import sys
+import threading
+import time
+from socket import error as SocketError, timeout as SocketTimeout
+
+from ..connection import HTTPException, BaseSSLError
+from ..connectionpool import HTTPSConnectionPool, _Default
+from ..exceptions import (
+    CircuitOpenError,
+    HostChangedError,
+    MaxRetryError,
+    ProtocolError,
+    SSLError,
+    TimeoutError,
+)
+from ..packages import six
+from ..packages.six.moves.http_client import responses
+from ..packages.ssl_match_hostname import CertificateError
+from .._collections import HTTPHeaderDict
+from ..util.request import set_file_position
+from ..util.retry import Retry
+from ..util.timeout import Timeout
+from ..util.url import Url
+from ..util.wait import wait_for_read
+
+
+__all__ = ['HTTP2Connection', 'HTTP2ConnectionPool']
+
+
+log = logging.getLogger(__name__)
+
+# Headers specific to an HTTP/1.1 connection, which HTTP/2 forbids.
+_CONNECTION_HEADERS = frozenset([
+    'connection', 'host', 'keep-alive', 'proxy-connection', 'te',
+    'transfer-encoding', 'upgrade',
+])
+
+
+class _Stream(object):
+    """The response to a request, as it comes in."""
+
+    def __init__(self):
+        self.headers = None
+        self.data = bytearray()
+        self.ended = False
+        self.error = None
+
+
+class HTTP2Connection(object):
+    """
+    An HTTP/2 connection over an already connected socket, on which any
+    number of threads make requests at once.
+
+    Requests are sent under a lock. Responses are read by whichever thread
+    waiting for one gets to the socket first, handing the frames of the
+    other streams to the threads waiting for those.
+
+    :param sock:
+        The socket, on which ``h2`` was negotiated if it uses TLS.
+
+    :param authority:
+        The ``:authority`` of requests without a ``Host`` header.
+    """
+
+    def __init__(self, sock, authority):
+        self.sock = sock
+        self.authority = authority
+
+        config = h2.config.H2Configuration(client_side=True,
+                                           header_encoding='iso-8859-1')
+        self._h2 = h2.connection.H2Connection(config=config)
+        self._cond = threading.Condition(threading.RLock())
+        self._streams = {}
+        self._reading = False
+        #: Set once the connection can't be used anymore, to the reason why.
+        self._error = None
+        #: Set when the server sends GOAWAY: no new streams may be started.
+        self._going_away = False
+
+        with self._cond:
+            self._h2.initiate_connection()
+            self._flush()
+
+    def is_usable(self):
+        """
+        Whether new requests can be made on the connection.
+        """
+        return self._error is None and not self._going_away
+
+    def request(self, method, url, headers=None, body=None, timeout=None):
+        """
+        Send a request and return the id of its stream, to get its response
+        with :meth:`get_response`.
+
+        :param timeout:
+            Longest wait for the server to allow another stream, or more of
+            the body to be sent.
+        """
+        if isinstance(body, six.text_type):
+            body = body.encode('iso-8859-1')
+        elif hasattr(body, 'read'):
+            body = body.read()
+        if body is not None and not isinstance(body, six.binary_type):
+            raise TypeError('The body of an HTTP/2 request must be bytes, text '
+                            'or a file object, not %r' % type(body))
+
+        authority = self.authority
+        fields = []
+        for name, value in (headers or {}).items():
+            name = name.lower()
+            if name == 'host':
+                authority = value
+            elif name not in _CONNECTION_HEADERS:
+                fields.append((name, value))
+        fields[:0] = [(':method', method), (':scheme', 'https'),
+                      (':authority', authority), (':path', url)]
+
+        with self._cond:
+            h2_conn = self._h2
+            self._wait(lambda: (h2_conn.open_outbound_streams <
+                                h2_conn.remote_settings.max_concurrent_streams),
+                       timeout)
+
+            stream_id = h2_conn.get_next_available_stream_id()
+            self._streams[stream_id] = stream = _Stream()
+            h2_conn.send_headers(stream_id, fields, end_stream=not body)
+            self._flush()
+
+            while body:
+                self._wait(lambda: (stream.ended or stream.error is not None or
+                                    h2_conn.local_flow_control_window(stream_id) > 0),
+                           timeout)
+                if stream.ended or stream.error is not None:
+                    # The server answered early, or gave up on the request.
+                    break
+                size = min(h2_conn.local_flow_control_window(stream_id),
+                           h2_conn.max_outbound_frame_size)
+                chunk, body = body[:size], body[size:]
+                h2_conn.send_data(stream_id, chunk, end_stream=not body)
+                self._flush()
+
+        return stream_id
+
+    def get_response(self, stream_id, timeout=None):
+        """
+        Wait for the response to the request of ``stream_id`` and return its
+        status, headers and body.
+
+        :param timeout:
+            Longest wait for each part of the response.
+        """
+        with self._cond:
+            stream = self._streams[stream_id]
+            try:
+                self._wait(lambda: stream.ended or stream.error is not None, timeout,
+                           progress=lambda: len(stream.data))
+            except SocketTimeout:
+                # Let the server know the response isn't wanted anymore.
+                if self._error is None:
+                    self._h2.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+                    self._flush()
+                raise
+            finally:
+                del self._streams[stream_id]
+
+            if stream.error is not None:
+                raise stream.error
+
+        headers = HTTPHeaderDict()
+        status = None
+        for name, value in stream.headers:
+            if name == ':status':
+                status = int(value)
+            elif not name.startswith(':'):
+                headers.add(name, value)
+        return status, headers, bytes(stream.data)
+
+    def close(self):
+        with self._cond:
+            if self._error is None:
+                self._error = ProtocolError('Connection closed.')
+                try:
+                    self._h2.close_connection()
+                    self._flush()
+                except (SocketError, h2.exceptions.ProtocolError):
+                    pass
+        self.sock.close()
+
+    def _flush(self):
+        data = self._h2.data_to_send()
+        if data:
+            self.sock.sendall(data)
+
+    def _wait(self, predicate, timeout, progress=None):
+        """
+        Read frames until ``predicate()`` is true, or wait for the thread
+        reading them. Must be called with the lock held.
+
+        Raises :class:`socket.timeout` when ``timeout`` seconds go by without
+        ``progress()`` changing, or at all if not given.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        last = progress and progress()
+        while not predicate():
+            if self._error is not None:
+                raise self._error
+
+            if progress is not None and progress() != last:
+                last = progress()
+                deadline = None if timeout is None else time.time() + timeout
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                raise SocketTimeout('timed out')
+
+            if self._reading:
+                self._cond.wait(remaining)
+                continue
+
+            self._reading = True
+            try:
+                self._read(remaining)
+            finally:
+                self._reading = False
+                self._cond.notify_all()
+
+    def _read(self, timeout):
+        # Only wait for the socket with the lock released, reading from it
+        # and every other use of the TLS connection happen with it held.
+        pending = getattr(self.sock, 'pending', None)
+        if not (pending and pending()):
+            self._cond.release()
+            try:
+                ready = wait_for_read([self.sock], timeout)
+            finally:
+                self._cond.acquire()
+            if not ready:
+                return
+
+        try:
+            data = self.sock.recv(65535)
+            if not data:
+                raise ProtocolError('Connection aborted.', SocketError(
+                    'Remote end closed connection'))
+            events = self._h2.receive_data(data)
+            for event in events:
+                self._handle(event)
+            self._flush()
+        except (SocketError, BaseSSLError, ProtocolError,
+                h2.exceptions.ProtocolError) as e:
+            self._fail(e)
+
+    def _handle(self, event):
+        stream = self._streams.get(getattr(event, 'stream_id', None))
+        if isinstance(event, h2.events.ResponseReceived):
+            if stream is not None:
+                stream.headers = event.headers
+        elif isinstance(event, h2.events.DataReceived):
+            self._h2.acknowledge_received_data(event.flow_controlled_length,
+                                               event.stream_id)
+            if stream is not None:
+                stream.data += event.data
+        elif isinstance(event, h2.events.StreamEnded):
+            if stream is not None:
+                stream.ended = True
+        elif isinstance(event, h2.events.StreamReset):
+            if stream is not None:
+                stream.error = ProtocolError(
+                    'Stream reset by the server (error code %s).' % event.error_code)
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            self._going_away = True
+            error = ProtocolError('Connection terminated by the server '
+                                  '(error code %s).' % event.error_code)
+            # The server didn't process the requests past last_stream_id, so
+            # they may be sent again.
+            last = event.last_stream_id or 0
+            for stream_id, stream in self._streams.items():
+                if stream_id > last and not stream.ended:
+                    stream.error = error
+
+    def _fail(self, error):
+        if not isinstance(error, ProtocolError):
+            error = ProtocolError('Connection aborted.', error)
+        self._error = error
+        for stream in self._streams.values():
+            if not stream.ended:
+                stream.error = error
+
+
+class HTTP2ConnectionPool(HTTPSConnectionPool):
+    """
+    Same as :class:`~urllib3.connectionpool.HTTPSConnectionPool`, but
+    multiplexing requests over a single HTTP/2 connection when the server
+    supports it, in which case ``maxsize`` and ``block`` don't apply.
+
+    HTTP/2 is only used if ``'h2'`` is among the ``alpn_protocols``, which
+    default to :attr:`default_alpn_protocols`. An ``ssl_context`` that is
+    passed in must offer them with ALPN itself.
+    """
+
+    #: The protocols offered with ALPN when ``alpn_protocols`` isn't given.
+    default_alpn_protocols = ['h2', 'http/1.1']
+
+    def __init__(self, *args, **kw):
+        if kw.get('alpn_protocols') is None:
+            kw['alpn_protocols'] = self.default_alpn_protocols
+        super(HTTP2ConnectionPool, self).__init__(*args, **kw)
+
+        #: Whether the server speaks HTTP/2, None until a connection is made.
+        self.is_http2 = None if 'h2' in self.alpn_protocols else False
+        self._h2_conn = None
+        self._h2_lock = threading.Lock()
+
+    def close(self):
+        super(HTTP2ConnectionPool, self).close()
+        with self._h2_lock:
+            h2_conn, self._h2_conn = self._h2_conn, None
+        if h2_conn is not None:
+            h2_conn.close()
+
+    def _get_h2_conn(self, timeout_obj, pool_timeout):
+        """
+        Return the HTTP/2 connection, connecting it first if needed, or None
+        if the server doesn't speak HTTP/2.
+        """
+        with self._h2_lock:
+            if self._h2_conn is not None and self._h2_conn.is_usable():
+                return self._h2_conn
+            if self.is_http2 is False:
+                return None
+
+            # Connecting takes a slot of the pool, which is either kept by
+            # the connection for HTTP/1.1 or given back for HTTP/2.
+            conn = self._get_conn(timeout=pool_timeout)
+            conn.timeout = timeout_obj.connect_timeout
+            try:
+                self._validate_conn(conn)
+            except (SocketTimeout, BaseSSLError) as e:
+                conn.close()
+                self._put_conn(None)
+                self._raise_timeout(err=e, url='/', timeout_value=conn.timeout)
+                raise
+            except BaseException:
+                conn.close()
+                self._put_conn(None)
+                raise
+
+            self.is_http2 = conn.alpn_protocol == 'h2'
+            if not self.is_http2:
+                log.debug("%s:%s doesn't speak HTTP/2, falling back to HTTP/1.1",
+                          self.host, self.port)
+                self._put_conn(conn)
+                return None
+
+            authority = self.host
+            if ':' in authority:
+                authority = '[%s]' % authority
+            if self.port and self.port != 443:
+                authority = '%s:%d' % (authority, self.port)
+            # The old connection, if any, finishes its requests on its own.
+            self._put_conn(None)
+            self._h2_conn = HTTP2Connection(conn.sock, authority)
+            return self._h2_conn
+
+    def _drop_h2_conn(self, h2_conn):
+        with self._h2_lock:
+            if self._h2_conn is h2_conn:
+                self._h2_conn = None
+        h2_conn.close()
+
+    def urlopen(self, method, url, body=None, headers=None, retries=None,
+                redirect=True, assert_same_host=True, timeout=_Default,
+                pool_timeout=None, release_conn=None, chunked=False,
+                body_pos=None, content_encoding=None, hedge=None, **response_kw):
+        """
+        Same as :meth:`urllib3.connectionpool.HTTPConnectionPool.urlopen`,
+        over HTTP/2 when the server supports it. The response is then read
+        in full before it is returned, so ``release_conn`` doesn't apply, and
+        neither ``chunked``, ``content_encoding`` nor ``hedge`` are supported.
+        """
+        if self.is_http2 is False:
+            return super(HTTP2ConnectionPool, self).urlopen(
+                method, url, body, headers, retries, redirect, assert_same_host,
+                timeout=timeout, pool_timeout=pool_timeout, release_conn=release_conn,
+                chunked=chunked, body_pos=body_pos, content_encoding=content_encoding,
+                hedge=hedge, **response_kw)
+
+        if headers is None:
+            headers = self.headers
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, redirect=redirect, default=self.retries)
+
+        if isinstance(url, Url):
+            url = url.url
+
+        if assert_same_host and not self.is_same_host(url):
+            raise HostChangedError(self, url, retries)
+
+        if self.circuit_breaker and not self.circuit_breaker.allow_request(self):
+            raise CircuitOpenError(self, "Circuit is open, the host keeps failing.")
+
+        # Rewind body position, if needed. Record current position
+        # for future rewinds in the event of a redirect/retry.
+        body_pos = set_file_position(body, body_pos)
+
+        h2_conn = None
+        try:
+            timeout_obj = self._get_timeout(timeout)
+            timeout_obj.start_connect()
+            h2_conn = self._get_h2_conn(timeout_obj, pool_timeout)
+            if h2_conn is None:
+                # The server turned out not to speak HTTP/2. It is up though,
+                # so a half-open circuit lets the request through again.
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success(self)
+                return self.urlopen(method, url, body, headers, retries, redirect,
+                                    assert_same_host, timeout=timeout,
+                                    pool_timeout=pool_timeout, release_conn=release_conn,
+                                    chunked=chunked, body_pos=body_pos,
+                                    content_encoding=content_encoding, hedge=hedge,
+                                    **response_kw)
+
+            read_timeout = timeout_obj.read_timeout
+            if read_timeout is Timeout.DEFAULT_TIMEOUT:
+                read_timeout = socket.getdefaulttimeout()
+            try:
+                self.num_requests += 1
+                stream_id = h2_conn.request(method, url, headers, body, read_timeout)
+                status, response_headers, data = h2_conn.get_response(stream_id,
+                                                                      read_timeout)
+            except (SocketTimeout, BaseSSLError, SocketError) as e:
+                self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
+                raise
+
+            log.debug("%s://%s:%s \"%s %s %s\" %s %s", self.scheme, self.host, self.port,
+                      method, url, 'HTTP/2', status, len(data))
+
+            response_kw['request_method'] = method
+            response = self.ResponseCls(body=io.BytesIO(data), headers=response_headers,
+                                        status=status, version=20,
+                                        reason=responses.get(status), pool=self,
+                                        retries=retries, alpn_protocol='h2',
+                                        **response_kw)
+
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success(self)
+
+        except (TimeoutError, HTTPException, SocketError, ProtocolError,
+                BaseSSLError, SSLError, CertificateError) as e:
+            if isinstance(e, (BaseSSLError, CertificateError)):
+                e = SSLError(e)
+            elif isinstance(e, (SocketError, HTTPException)):
+                e = ProtocolError('Connection aborted.', e)
+
+            # A timed out or reset stream leaves the connection usable.
+            if h2_conn is not None and not h2_conn.is_usable():
+                self._drop_h2_conn(h2_conn)
+
+            if self.circuit_breaker and (retries._is_connection_error(e) or
+                                         retries._is_read_error(e)):
+                self.circuit_breaker.record_failure(self)
+
+            retries = retries.increment(method, url, error=e, _pool=self,
+                                        _stacktrace=sys.exc_info()[2])
+            retries.sleep()
+            log.warning("Retrying (%r) after connection "
+                        "broken by '%r': %s", retries, e, url)
+            return self.urlopen(method, url, body, headers, retries,
+                                redirect, assert_same_host,
+                                timeout=timeout, pool_timeout=pool_timeout,
+                                body_pos=body_pos, **response_kw)
+
+        # Handle redirect?
+        redirect_location = redirect and response.get_redirect_location()
+        if redirect_location:
+            if response.status == 303:
+                method = 'GET'
+
+            try:
+                retries = retries.increment(method, url, response=response, _pool=self)
+            except MaxRetryError:
+                if retries.raise_on_redirect:
+                    raise
+                return response
+
+            retries.sleep_for_retry(response)
+            log.debug("Redirecting %s -> %s", url, redirect_location)
+            return self.urlopen(
+                method, redirect_location, body, headers,
+                retries=retries, redirect=redirect,
+                assert_same_host=assert_same_host,
+                timeout=timeout, pool_timeout=pool_timeout,
+                body_pos=body_pos, **response_kw)
+
+        # Check if we should retry the HTTP response.
+        has_retry_after = bool(response.getheader('Retry-After'))
+        if retries.is_retry(method, response.status, has_retry_after):
+            try:
+                retries = retries.increment(method, url, response=response, _pool=self)
+            except MaxRetryError:
+                if retries.raise_on_status:
+                    raise
+                return response
+
+            retries.sleep(response)
+            log.debug("Retry: %s", url)
+            return self.urlopen(
+                method, url, body, headers,
+                retries=retries, redirect=redirect,
+                assert_same_host=assert_same_host,
+                timeout=timeout, pool_timeout=pool_timeout,
+                body_pos=body_pos, **response_kw)
+
+        if retries.budget is not None:
+            retries.budget.deposit()
+
+        return response
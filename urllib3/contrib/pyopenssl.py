@@ -348,6 +348,10 @@ class WrappedSocket(object):
             'subjectAltName': get_subj_alt_name(x509)
         }
 
+    def selected_alpn_protocol(self):
+        protocol = self.connection.get_alpn_proto_negotiated()
+        return protocol.decode('ascii') if protocol else None
+
     def _reuse(self):
         self._makefile_refs += 1
 
@@ -423,6 +427,9 @@ class PyOpenSSLContext(object):
             self._ctx.set_passwd_cb(lambda max_length, prompt_twice, userdata: password)
         self._ctx.use_privatekey_file(keyfile or certfile)
 
+    def set_alpn_protocols(self, protocols):
+        self._ctx.set_alpn_protos([p.encode('ascii') for p in protocols])
+
     def wrap_socket(self, sock, server_side=False,
                     do_handshake_on_connect=True, suppress_ragged_eofs=True,
                     server_hostname=None):
@@ -42,7 +42,7 @@ from ._securetransport.bindings import (
 )
 from ._securetransport.low_level import (
     _assert_no_error, _cert_array_from_pem, _temporary_keychain,
-    _load_client_cert_chain
+    _load_client_cert_chain, _cf_string_array_from_list, _cf_string_to_unicode
 )
 
 try:  # Platform-specific: Python 2
@@ -421,7 +421,8 @@ class WrappedSocket(object):
                   max_version,
                   client_cert,
                   client_key,
-                  client_key_passphrase):
+                  client_key_passphrase,
+                  alpn_protocols=None):
         """
         Actually performs the TLS handshake. This is run automatically by
         wrapped socket, and shouldn't be needed in user code.
@@ -467,6 +468,15 @@ class WrappedSocket(object):
         result = Security.SSLSetProtocolVersionMax(self.context, max_version)
         _assert_no_error(result)
 
+        # Offer the application protocols, where SecureTransport can.
+        if alpn_protocols and hasattr(Security, 'SSLSetALPNProtocols'):
+            protocols = _cf_string_array_from_list(alpn_protocols)
+            try:
+                result = Security.SSLSetALPNProtocols(self.context, protocols)
+                _assert_no_error(result)
+            finally:
+                CoreFoundation.CFRelease(protocols)
+
         # If there's a trust DB, we need to use it. We do that by telling
         # SecureTransport to break on server auth. We also do that if we don't
         # want to validate the certs at all: we just won't actually do any
@@ -673,6 +683,27 @@ class WrappedSocket(object):
 
         return der_bytes
 
+    def selected_alpn_protocol(self):
+        if not self.context or not hasattr(Security, 'SSLCopyALPNProtocols'):
+            return None
+
+        protocols = CoreFoundation.CFArrayRef()
+        result = Security.SSLCopyALPNProtocols(
+            self.context, ctypes.byref(protocols)
+        )
+        _assert_no_error(result)
+        if not protocols:
+            return None
+
+        try:
+            if not CoreFoundation.CFArrayGetCount(protocols):
+                return None
+            return _cf_string_to_unicode(
+                CoreFoundation.CFArrayGetValueAtIndex(protocols, 0)
+            )
+        finally:
+            CoreFoundation.CFRelease(protocols)
+
     def _reuse(self):
         self._makefile_refs += 1
 
@@ -711,6 +742,7 @@ class SecureTransportContext(object):
         self._client_cert = None
         self._client_key = None
         self._client_key_passphrase = None
+        self._alpn_protocols = None
 
     @property
     def check_hostname(self):
@@ -787,6 +819,10 @@ class SecureTransportContext(object):
         self._client_key = keyfile
         self._client_cert_passphrase = password
 
+    def set_alpn_protocols(self, protocols):
+        # Only offered on macOS 10.13 and later, ignored elsewhere.
+        self._alpn_protocols = list(protocols)
+
     def wrap_socket(self, sock, server_side=False,
                     do_handshake_on_connect=True, suppress_ragged_eofs=True,
                     server_hostname=None):
@@ -805,6 +841,6 @@ class SecureTransportContext(object):
         wrapped_socket.handshake(
             server_hostname, self._verify, self._trust_bundle,
             self._min_version, self._max_version, self._client_cert,
-            self._client_key, self._client_key_passphrase
+            self._client_key, self._client_key_passphrase, self._alpn_protocols
         )
         return wrapped_socket
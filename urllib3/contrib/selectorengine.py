@@ -0,0 +1,922 @@
+"""
+This module contains provisional support for driving many HTTP/1.1 requests
+at once from a single thread, with an event loop on top of the selectors of
+:mod:`urllib3.util.selectors` (epoll, kqueue, poll or select, whichever is
+best on the platform).
+
+:class:`SelectorEngine` keeps connections to each host with the same
+``maxsize`` and ``block`` semantics as
+:class:`~urllib3.connectionpool.HTTPConnectionPool`, retries requests
+according to :class:`~urllib3.util.retry.Retry` and returns
+:class:`~urllib3.response.HTTPResponse` objects::
+
+    from urllib3.contrib.selectorengine import SelectorEngine
+
+    with SelectorEngine(maxsize=4, block=True, timeout=10.0) as engine:
+        requests = [('GET', url) for url in urls]
+        for index, response in engine.request_many(requests, ordered=False):
+            ...
+
+It suits workloads spending most of their time waiting on many hosts, such
+as crawlers, which would otherwise need a thread for each request in flight.
+
+Known Limitations:
+
+- Host names are resolved with :func:`socket.getaddrinfo`, which blocks.
+- Responses are read into memory in full before they are returned, so
+  ``preload_content=False`` only defers decoding their content.
+- Redirects are not followed, ``Retry`` only counts errors and statuses.
+- Request bodies must be bytes, text or file objects, not iterables.
+- HTTPS requires the standard library's :mod:`ssl` module; pyOpenSSL and
+  SecureTransport are not used even if injected.
+"""
+from __future__ import absolute_import
+
+import collections
+import errno
+import io
+import logging
+import os
+import socket
+import sys
+import time
+import warnings
+
+from ..connection import (
+    FastHTTPResponse, HTTPConnection, port_by_scheme, _encode_request,
+    _find_head_end, _match_hostname,
+)
+from ..exceptions import (
+    ConnectTimeoutError,
+    HTTPError,
+    InsecureRequestWarning,
+    LocationValueError,
+    MaxRetryError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+    SSLError,
+)
+from ..packages import six
+from ..packages.ssl_match_hostname import CertificateError
+from ..request import RequestMethods
+from ..response import HTTPResponse
+from ..util.connection import allowed_gai_family, _set_socket_options
+from ..util.retry import Retry
+from ..util.selectors import DefaultSelector, EVENT_READ, EVENT_WRITE
+from ..util.ssl_ import (
+    HAS_SNI, assert_fingerprint, create_urllib3_context, resolve_cert_reqs,
+    resolve_ssl_version,
+)
+from ..util.timeout import Timeout
+from ..util.url import parse_url
+from ..util.wait import wait_for_read
+
+try:
+    import ssl
+    BaseSSLError = ssl.SSLError
+except ImportError:
+    ssl = None
+
+    class BaseSSLError(Exception):
+        pass
+
+
+__all__ = ['SelectorEngine']
+
+
+log = logging.getLogger(__name__)
+
+_Default = object()
+
+_CONNECT_IN_PROGRESS = frozenset([errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY])
+_WOULD_BLOCK = frozenset([errno.EAGAIN, errno.EWOULDBLOCK])
+
+# States of a connection
+_CONNECTING = 'connecting'
+_HANDSHAKING = 'handshaking'
+_SENDING = 'sending'
+_RECEIVING = 'receiving'
+_IDLE = 'idle'
+
+
+class _ResponseSocket(object):
+    """Hands bytes already received to httplib as if it read them itself."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def makefile(self, *args, **kw):
+        return io.BytesIO(self._data)
+
+
+class _HostPool(object):
+    """The connections of a :class:`SelectorEngine` to one host."""
+
+    def __init__(self, key, scheme, host, port):
+        self.key = key
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        #: Connections which can be reused, the most recently used last.
+        self.idle = []
+        #: Number of open connections, idle or not.
+        self.num_connections = 0
+        #: Exchanges waiting for a connection.
+        self.waiting = collections.deque()
+
+
+class _Connection(object):
+    """A non-blocking socket to a host and the exchange it is serving."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.sock = None
+        self.state = None
+        self.events = 0
+        self.deadline = None
+        self.addresses = None
+        self.exchange = None
+
+
+class _Exchange(object):
+    """A request, its retries and the response to it as it comes in."""
+
+    def __init__(self, method, url, pool=None, request=None, retries=None,
+                 timeout=None, response_kw=None):
+        self.method = method
+        self.url = url
+        self.pool = pool
+        self.request = request
+        self.retries = retries
+        self.timeout = timeout
+        self.response_kw = response_kw
+
+        #: Time before which a retry must not be started.
+        self.not_before = None
+        #: Where this exchange is put once done, if anywhere.
+        self.completed = None
+        self.index = None
+        self.done = False
+        self.result = None
+        self.reset()
+
+    def reset(self):
+        self.timeout_obj = None
+        self.sent = 0
+        self.buffer = bytearray()
+        self.response = None
+        self.head_end = None
+        self.scan_pos = None
+
+
+class _Submitter(RequestMethods):
+    """
+    Encodes requests the way :meth:`RequestMethods.request` does, handing
+    them to a :class:`SelectorEngine` without waiting for their responses.
+    """
+
+    def __init__(self, engine):
+        RequestMethods.__init__(self, engine.headers)
+        self.engine = engine
+
+    def urlopen(self, method, url, **kw):
+        return self.engine._submit(method, url, **kw)
+
+
+class SelectorEngine(RequestMethods):
+    """
+    Makes HTTP/1.1 requests to any number of hosts concurrently, from the
+    thread calling it.
+
+    Requests are only made progress on while waiting for a response, with
+    :meth:`urlopen` or :meth:`request`, or while iterating over the results of
+    :meth:`request_many`. An engine must only be used by one thread at a time.
+
+    :param maxsize:
+        Number of connections to each host kept to be reused, as for
+        :class:`~urllib3.connectionpool.HTTPConnectionPool`.
+
+    :param block:
+        If true, no more than ``maxsize`` connections are opened to a host at
+        once, further requests to it wait for one of them.
+
+    :param max_connections:
+        Most connections open at once, to all hosts together. Idle connections
+        are closed to make room for new ones. ``None`` means no limit.
+
+    :param timeout:
+        Default :class:`~urllib3.util.timeout.Timeout` of requests. Its read
+        timeout is the longest wait for the server between any two sends or
+        receives.
+
+    :param retries:
+        Default :class:`~urllib3.util.retry.Retry` of requests. Backoffs and
+        ``Retry-After`` waits don't block other requests.
+
+    :param headers:
+        Headers to include with all requests, unless other headers are given
+        explicitly.
+
+    :param socket_options:
+        Options set on every socket, defaulting to
+        :attr:`HTTPConnection.default_socket_options
+        <urllib3.connection.HTTPConnection.default_socket_options>`.
+
+    The remaining parameters configure HTTPS connections as for
+    :class:`~urllib3.connectionpool.HTTPSConnectionPool`.
+    """
+
+    def __init__(self, maxsize=1, block=False, max_connections=None,
+                 timeout=Timeout.DEFAULT_TIMEOUT, retries=None, headers=None,
+                 socket_options=None, key_file=None, cert_file=None,
+                 cert_reqs=None, ca_certs=None, ca_cert_dir=None,
+                 ssl_version=None, ssl_context=None, assert_hostname=None,
+                 assert_fingerprint=None):
+        RequestMethods.__init__(self, headers)
+
+        if not isinstance(timeout, Timeout):
+            timeout = Timeout.from_float(timeout)
+        if retries is None:
+            retries = Retry.DEFAULT
+
+        self.maxsize = maxsize
+        self.block = block
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        if socket_options is None:
+            socket_options = HTTPConnection.default_socket_options
+        self.socket_options = socket_options
+
+        self.key_file = key_file
+        self.cert_file = cert_file
+        self.cert_reqs = cert_reqs
+        self.ca_certs = ca_certs
+        self.ca_cert_dir = ca_cert_dir
+        self.ssl_version = ssl_version
+        self.ssl_context = ssl_context
+        self.assert_hostname = assert_hostname
+        self.assert_fingerprint = assert_fingerprint
+
+        self._selector = DefaultSelector()
+        self._pools = {}
+        self._busy = set()
+        self._delayed = []
+        self._num_connections = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        # Return False to re-raise any potential exceptions
+        return False
+
+    def close(self):
+        """
+        Close all connections. Requests still in progress are abandoned.
+        """
+        for pool in list(self._pools.values()):
+            for conn in pool.idle:
+                self._close(conn)
+            pool.idle = []
+            pool.waiting.clear()
+        for conn in list(self._busy):
+            conn.exchange = None
+            self._close(conn)
+        self._delayed = []
+        self._pools.clear()
+
+    def urlopen(self, method, url, body=None, headers=None, retries=None,
+                timeout=_Default, **response_kw):
+        """
+        Make a request to the absolute ``url`` and wait for the response,
+        making progress on any other request in the meantime.
+
+        ``release_conn`` and ``pool_timeout`` are accepted and ignored, and
+        ``chunked=True`` raises :class:`NotImplementedError`.
+
+        :param retries:
+            Configure the number of retries to allow before raising a
+            :class:`~urllib3.exceptions.MaxRetryError` exception, as for
+            :meth:`~urllib3.connectionpool.HTTPConnectionPool.urlopen`.
+
+        :param timeout:
+            If specified, overrides the default timeout for this one request.
+
+        :param \\**response_kw:
+            Additional parameters are passed to
+            :meth:`urllib3.response.HTTPResponse.from_httplib`
+        """
+        exchange = self._submit(method, url, body=body, headers=headers,
+                                retries=retries, timeout=timeout, **response_kw)
+        self._run_until(lambda: exchange.done)
+        if isinstance(exchange.result, Exception):
+            raise exchange.result
+        return exchange.result
+
+    def request_many(self, requests, ordered=True):
+        """
+        Make a batch of requests concurrently and iterate over their results.
+
+        :param requests:
+            An iterable of ``(method, url)`` or ``(method, url, kw)`` tuples.
+            ``kw`` is a dictionary of keyword arguments given to
+            :meth:`request`, such as ``retries``, ``timeout``, ``fields`` or
+            ``headers`` for that request alone.
+
+        :param ordered:
+            If true, results are produced in the order of ``requests``,
+            otherwise as soon as each request completes.
+
+        :return:
+            An iterator of ``(index, result)`` pairs, where ``index`` is the
+            position of the request in ``requests`` and ``result`` either its
+            response or the exception it raised. Requests make progress while
+            it is iterated over.
+        """
+        submitter = _Submitter(self)
+        completed = collections.deque()
+        exchanges = []
+        for index, item in enumerate(requests):
+            method, url = item[0], item[1]
+            kw = item[2] if len(item) > 2 else {}
+            try:
+                exchange = submitter.request(method, url, **kw)
+            except Exception as e:
+                exchange = _Exchange(method, url)
+                self._finish(exchange, e)
+            exchange.index = index
+            if exchange.done:
+                completed.append(exchange)
+            else:
+                exchange.completed = completed
+            exchanges.append(exchange)
+
+        return self._iter_results(exchanges, completed, ordered)
+
+    def _iter_results(self, exchanges, completed, ordered):
+        if ordered:
+            for exchange in exchanges:
+                self._run_until(lambda: exchange.done)
+                yield exchange.index, exchange.result
+            return
+
+        for _ in range(len(exchanges)):
+            self._run_until(lambda: completed)
+            exchange = completed.popleft()
+            yield exchange.index, exchange.result
+
+    def _submit(self, method, url, body=None, headers=None, retries=None,
+                timeout=_Default, chunked=False, release_conn=None, pool_timeout=None,
+                **response_kw):
+        # release_conn and pool_timeout don't apply: responses are read in
+        # full, releasing their connection, and requests queue for one.
+        if chunked:
+            raise NotImplementedError(
+                'Chunked request bodies are not supported by SelectorEngine')
+
+        u = parse_url(url)
+        if not u.host:
+            raise LocationValueError("No host specified.")
+        scheme = (u.scheme or 'http').lower()
+        port = u.port or port_by_scheme.get(scheme, 80)
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, redirect=False, default=self.retries)
+        if timeout is _Default:
+            timeout = self.timeout.clone()
+        elif isinstance(timeout, Timeout):
+            timeout = timeout.clone()
+        else:
+            timeout = Timeout.from_float(timeout)
+
+        host = u.host
+        if port != port_by_scheme.get(scheme):
+            host = '%s:%d' % (host, port)
+        request = _encode_request(method, u.request_uri, host, body,
+                                  self.headers if headers is None else headers)
+
+        key = (scheme, u.host.lower(), port)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _HostPool(key, scheme, u.host.strip('[]'), port)
+
+        response_kw['request_method'] = method
+        exchange = _Exchange(method, u.url, pool, request, retries, timeout, response_kw)
+        pool.waiting.append(exchange)
+        return exchange
+
+    def _run_until(self, done):
+        """
+        Run the event loop until ``done()`` is true.
+        """
+        while not done():
+            self._dispatch()
+            if done():
+                break
+
+            timeout = self._next_timeout()
+            if timeout is None and not self._busy:
+                # Nothing in progress, so nothing could ever make done() true
+                raise RuntimeError('No requests in progress')
+
+            for key, events in self._selector.select(timeout):
+                self._handle(key.data)
+            self._expire()
+
+    def _next_timeout(self):
+        deadlines = [conn.deadline for conn in self._busy if conn.deadline is not None]
+        deadlines.extend(exchange.not_before for exchange in self._delayed)
+        if not deadlines:
+            return None
+        return max(min(deadlines) - time.time(), 0)
+
+    def _dispatch(self):
+        """
+        Start the waiting requests for which a connection is available.
+        """
+        if self._delayed:
+            now = time.time()
+            for exchange in [e for e in self._delayed if e.not_before <= now]:
+                self._delayed.remove(exchange)
+                self._requeue(exchange)
+
+        for pool in list(self._pools.values()):
+            while pool.waiting:
+                conn = self._get_conn(pool)
+                if conn is None:
+                    break
+                self._start(conn, pool.waiting.popleft())
+
+    def _get_conn(self, pool):
+        while pool.idle:
+            conn = pool.idle.pop()
+            # An idle connection with something to read has been closed by
+            # the server, or is out of step with it.
+            if not wait_for_read([conn.sock], timeout=0.0):
+                return conn
+            log.debug("Dropping stale connection to %s", pool.host)
+            self._close(conn)
+
+        if self.block and pool.num_connections >= self.maxsize:
+            return None
+        if (self.max_connections is not None and
+                self._num_connections >= self.max_connections and
+                not self._close_idle()):
+            return None
+
+        conn = _Connection(pool)
+        pool.num_connections += 1
+        self._num_connections += 1
+        return conn
+
+    def _close_idle(self):
+        for pool in self._pools.values():
+            if pool.idle:
+                self._close(pool.idle.pop(0))
+                return True
+        return False
+
+    def _start(self, conn, exchange):
+        conn.exchange = exchange
+        exchange.timeout_obj = exchange.timeout.clone()
+        exchange.timeout_obj.start_connect()
+        self._busy.add(conn)
+
+        if exchange.pool.scheme == 'https' and not self._is_verified():
+            warnings.warn((
+                'Unverified HTTPS request is being made. '
+                'Adding certificate verification is strongly advised. See: '
+                'https://urllib3.readthedocs.io/en/latest/advanced-usage.html'
+                '#ssl-warnings'),
+                InsecureRequestWarning)
+
+        if conn.state is None:
+            conn.deadline = self._deadline(exchange.timeout_obj.connect_timeout)
+            self._step(conn, self._connect)
+        else:
+            conn.state = _SENDING
+            conn.deadline = self._deadline(exchange.timeout_obj.read_timeout)
+            self._step(conn, self._send)
+
+    def _deadline(self, timeout):
+        if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+            timeout = socket.getdefaulttimeout()
+        if timeout is None:
+            return None
+        return time.time() + timeout
+
+    def _handle(self, conn):
+        if conn.state == _CONNECTING:
+            self._step(conn, self._connected)
+        elif conn.state == _HANDSHAKING:
+            self._step(conn, self._handshake)
+        elif conn.state == _SENDING:
+            self._step(conn, self._send)
+        elif conn.state == _RECEIVING:
+            self._step(conn, self._receive)
+
+    def _step(self, conn, step):
+        """
+        Call ``step(conn)``, failing the exchange of ``conn`` on errors.
+        """
+        try:
+            step(conn)
+        except (BaseSSLError, CertificateError) as e:
+            self._fail(conn, SSLError(e), retry=False)
+        except SSLError as e:
+            self._fail(conn, e, retry=False)
+        except (ConnectTimeoutError, ProtocolError) as e:
+            # Once the response has started, it is too late to retry.
+            self._fail(conn, e, retry=conn.exchange.response is None)
+        except socket.error as e:
+            self._fail(conn, ProtocolError('Connection aborted.', e),
+                       retry=conn.exchange.response is None)
+
+    def _want(self, conn, events):
+        """
+        Wait for ``events`` on the socket of ``conn``, or for nothing if 0.
+        """
+        if events == conn.events:
+            return
+        if not conn.events:
+            self._selector.register(conn.sock, events, conn)
+        elif not events:
+            self._selector.unregister(conn.sock)
+        else:
+            self._selector.modify(conn.sock, events, conn)
+        conn.events = events
+
+    def _connect(self, conn):
+        pool = conn.pool
+        if conn.addresses is None:
+            try:
+                conn.addresses = socket.getaddrinfo(pool.host, pool.port,
+                                                    allowed_gai_family(),
+                                                    socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                raise NewConnectionError(
+                    self, "Failed to establish a new connection: %s" % e)
+
+        while conn.addresses:
+            af, socktype, proto, _canonname, sa = conn.addresses.pop(0)
+            sock = socket.socket(af, socktype, proto)
+            _set_socket_options(sock, self.socket_options)
+            sock.setblocking(False)
+
+            err = sock.connect_ex(sa)
+            if err == 0 or err in _CONNECT_IN_PROGRESS:
+                conn.sock = sock
+                conn.state = _CONNECTING
+                self._want(conn, EVENT_WRITE)
+                return
+            sock.close()
+
+        raise NewConnectionError(
+            self, "Failed to establish a new connection: [Errno %d] %s" % (
+                err, os.strerror(err)))
+
+    def _connected(self, conn):
+        err = conn.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            self._want(conn, 0)
+            conn.sock.close()
+            conn.sock = None
+            if conn.addresses:
+                return self._connect(conn)
+            raise NewConnectionError(
+                self, "Failed to establish a new connection: [Errno %d] %s" % (
+                    err, os.strerror(err)))
+
+        if conn.pool.scheme == 'https':
+            # Wrapping the socket detaches the original one
+            self._want(conn, 0)
+            server_hostname = conn.pool.host if HAS_SNI else None
+            conn.sock = self._get_ssl_context().wrap_socket(
+                conn.sock, server_hostname=server_hostname,
+                do_handshake_on_connect=False)
+            conn.state = _HANDSHAKING
+            return self._handshake(conn)
+
+        conn.state = _SENDING
+        conn.deadline = self._deadline(conn.exchange.timeout_obj.read_timeout)
+        self._send(conn)
+
+    def _handshake(self, conn):
+        try:
+            conn.sock.do_handshake()
+        except BaseSSLError as e:
+            if self._wait_for_ssl(conn, e):
+                return
+            raise
+
+        sock = conn.sock
+        context = self._get_ssl_context()
+        if self.assert_fingerprint:
+            assert_fingerprint(sock.getpeercert(binary_form=True),
+                               self.assert_fingerprint)
+        elif (context.verify_mode != ssl.CERT_NONE and
+              not getattr(context, 'check_hostname', False) and
+              self.assert_hostname is not False):
+            _match_hostname(sock.getpeercert(), self.assert_hostname or conn.pool.host)
+
+        conn.state = _SENDING
+        conn.deadline = self._deadline(conn.exchange.timeout_obj.read_timeout)
+        self._send(conn)
+
+    def _wait_for_ssl(self, conn, e):
+        """
+        Wait for the socket of ``conn`` as asked by ``e``, returning False if
+        ``e`` is an actual error.
+        """
+        if e.args and e.args[0] == ssl.SSL_ERROR_WANT_READ:
+            self._want(conn, EVENT_READ)
+            return True
+        if e.args and e.args[0] == ssl.SSL_ERROR_WANT_WRITE:
+            self._want(conn, EVENT_WRITE)
+            return True
+        return False
+
+    def _get_ssl_context(self):
+        if self.ssl_context is None:
+            context = create_urllib3_context(resolve_ssl_version(self.ssl_version),
+                                             resolve_cert_reqs(self.cert_reqs))
+            if self.ca_certs or self.ca_cert_dir:
+                context.load_verify_locations(self.ca_certs, self.ca_cert_dir)
+            elif getattr(context, 'load_default_certs', None) is not None:
+                context.load_default_certs()
+            if self.cert_file:
+                context.load_cert_chain(self.cert_file, self.key_file)
+            self.ssl_context = context
+        return self.ssl_context
+
+    def _is_verified(self):
+        if self.assert_fingerprint is not None:
+            return True
+        if self.ssl_context is not None:
+            return self.ssl_context.verify_mode == ssl.CERT_REQUIRED
+        return resolve_cert_reqs(self.cert_reqs) == ssl.CERT_REQUIRED
+
+    def _send(self, conn):
+        exchange = conn.exchange
+        try:
+            sent = conn.sock.send(memoryview(exchange.request)[exchange.sent:])
+        except BaseSSLError as e:
+            if self._wait_for_ssl(conn, e):
+                return
+            raise
+        except socket.error as e:
+            if e.errno in _WOULD_BLOCK:
+                self._want(conn, EVENT_WRITE)
+                return
+            raise
+
+        exchange.sent += sent
+        conn.deadline = self._deadline(exchange.timeout_obj.read_timeout)
+        if exchange.sent < len(exchange.request):
+            self._want(conn, EVENT_WRITE)
+            return
+
+        conn.state = _RECEIVING
+        self._want(conn, EVENT_READ)
+
+    def _receive(self, conn):
+        exchange = conn.exchange
+        try:
+            data = conn.sock.recv(65536)
+            pending = getattr(conn.sock, 'pending', None)
+            while data and pending is not None and pending():
+                data += conn.sock.recv(pending())
+        except BaseSSLError as e:
+            if self._wait_for_ssl(conn, e):
+                return
+            raise
+        except socket.error as e:
+            if e.errno in _WOULD_BLOCK:
+                return
+            raise
+
+        if not data:
+            response = exchange.response
+            if response is not None and response.length is None and not response.chunked:
+                # The end of the connection is the end of the body
+                return self._complete(conn, len(exchange.buffer))
+            if response is None and not exchange.buffer:
+                raise ProtocolError('Connection aborted.', socket.error(
+                    errno.ECONNRESET, 'Remote end closed connection without response'))
+            raise ProtocolError('Connection broken: incomplete response')
+
+        exchange.buffer += data
+        conn.deadline = self._deadline(exchange.timeout_obj.read_timeout)
+
+        if exchange.response is None and not self._parse_head(exchange):
+            return
+        end = self._body_end(exchange)
+        if end is not None:
+            self._complete(conn, end)
+
+    def _parse_head(self, exchange):
+        """
+        Parse the head of the response if all of it was received, skipping
+        any informational responses, and return whether it was.
+        """
+        buf = exchange.buffer
+        while True:
+            end = _find_head_end(buf)
+            if end is None:
+                if len(buf) > FastHTTPResponse.max_line * FastHTTPResponse.max_headers:
+                    raise ProtocolError('Response head too long')
+                return False
+
+            head = bytes(buf[:end])
+            status = head.split(None, 2)[1:2]
+            if not status or not status[0].startswith(b'1') or status[0] == b'101':
+                break
+            del buf[:end]
+
+        response = FastHTTPResponse(_ResponseSocket(head), method=exchange.method)
+        try:
+            response.begin()
+        except (socket.error, six.moves.http_client.HTTPException) as e:
+            raise ProtocolError('Connection aborted.', e)
+
+        exchange.response = response
+        exchange.head_end = exchange.scan_pos = end
+        return True
+
+    def _body_end(self, exchange):
+        """
+        Return the offset of the end of the response body in the buffer, or
+        None if it hasn't all been received.
+        """
+        response = exchange.response
+        buf = exchange.buffer
+        if response.length is not None:
+            end = exchange.head_end + response.length
+            return end if len(buf) >= end else None
+        if not response.chunked:
+            return None
+
+        # Skip over the chunks received so far
+        pos = exchange.scan_pos
+        while True:
+            line_end = buf.find(b'\n', pos)
+            if line_end == -1:
+                break
+            size = bytes(buf[pos:line_end]).split(b';', 1)[0].strip()
+            try:
+                size = int(size, 16)
+            except ValueError:
+                raise ProtocolError('Connection broken: invalid chunk length %r' % size)
+
+            if size == 0:
+                # The trailer ends with an empty line
+                line_start = line_end + 1
+                while True:
+                    line_end = buf.find(b'\n', line_start)
+                    if line_end == -1:
+                        return None
+                    if not buf[line_start:line_end].strip():
+                        return line_end + 1
+                    line_start = line_end + 1
+
+            end = line_end + 1 + size + 2
+            if len(buf) < end:
+                break
+            pos = exchange.scan_pos = end
+        return None
+
+    def _complete(self, conn, end):
+        exchange = conn.exchange
+        httplib_response = exchange.response
+        httplib_response.fp = io.BytesIO(bytes(exchange.buffer[exchange.head_end:end]))
+
+        # Anything past the response means the connection is out of step.
+        reusable = not httplib_response.will_close and end == len(exchange.buffer)
+        self._release(conn, reusable)
+
+        retries = exchange.retries
+        try:
+            response = HTTPResponse.from_httplib(httplib_response, retries=retries,
+                                                 **exchange.response_kw)
+
+            has_retry_after = bool(response.getheader('Retry-After'))
+            if not retries.is_retry(exchange.method, response.status, has_retry_after):
+                self._finish(exchange, response)
+                return
+
+            try:
+                retries = retries.increment(exchange.method, exchange.url,
+                                            response=response, _pool=self)
+            except MaxRetryError as e:
+                self._finish(exchange, e if retries.raise_on_status else response)
+                return
+            delay = retries.get_retry_after(response) or retries.get_backoff_time()
+        except ProtocolError as e:
+            # The body is broken, which Retry may count as a read error.
+            self._fail_exchange(exchange, e)
+            return
+        except HTTPError as e:
+            # Such as a DecodeError, which the same response would raise again.
+            self._finish(exchange, e)
+            return
+
+        log.debug("Retry: %s", exchange.url)
+        self._retry(exchange, retries, delay)
+
+    def _fail(self, conn, error, retry=True):
+        exchange = conn.exchange
+        self._release(conn, False)
+        self._fail_exchange(exchange, error, retry)
+
+    def _fail_exchange(self, exchange, error, retry=True):
+        if not retry:
+            self._finish(exchange, error)
+            return
+
+        try:
+            retries = exchange.retries.increment(exchange.method, exchange.url,
+                                                 error=error, _pool=self,
+                                                 _stacktrace=sys.exc_info()[2])
+        except Exception as e:
+            self._finish(exchange, e)
+            return
+
+        log.warning("Retrying (%r) after connection broken by '%r': %s",
+                    retries, error, exchange.url)
+        self._retry(exchange, retries, retries.get_backoff_time())
+
+    def _retry(self, exchange, retries, delay):
+        exchange.retries = retries
+        exchange.reset()
+        if delay > 0:
+            exchange.not_before = time.time() + delay
+            self._delayed.append(exchange)
+        else:
+            self._requeue(exchange)
+
+    def _requeue(self, exchange):
+        pool = exchange.pool
+        # The pool is forgotten once it has neither connections nor requests
+        self._pools.setdefault(pool.key, pool)
+        pool.waiting.appendleft(exchange)
+
+    def _finish(self, exchange, result):
+        exchange.done = True
+        exchange.result = result
+        if exchange.completed is not None:
+            exchange.completed.append(exchange)
+
+    def _release(self, conn, reusable):
+        """
+        Return ``conn`` to its pool if ``reusable`` and the pool has room,
+        otherwise close it.
+        """
+        self._busy.discard(conn)
+        conn.exchange = None
+        conn.deadline = None
+        pool = conn.pool
+        if reusable and len(pool.idle) < self.maxsize:
+            self._want(conn, 0)
+            conn.state = _IDLE
+            pool.idle.append(conn)
+            return
+
+        if reusable:
+            log.warning("Connection pool is full, discarding connection: %s", pool.host)
+        self._close(conn)
+
+    def _close(self, conn):
+        self._busy.discard(conn)
+        pool = conn.pool
+        if conn.sock is not None:
+            self._want(conn, 0)
+            conn.sock.close()
+            conn.sock = None
+        pool.num_connections -= 1
+        self._num_connections -= 1
+        if not pool.num_connections and not pool.waiting:
+            self._pools.pop(pool.key, None)
+
+    def _expire(self):
+        """
+        Fail the exchanges which went on for longer than their timeouts.
+        """
+        now = time.time()
+        for conn in list(self._busy):
+            if conn.deadline is None or conn.deadline > now:
+                continue
+
+            exchange = conn.exchange
+            if conn.state in (_CONNECTING, _HANDSHAKING):
+                timeout = exchange.timeout_obj.connect_timeout
+                error = ConnectTimeoutError(
+                    self, "Connection to %s timed out. (connect timeout=%s)" %
+                    (conn.pool.host, timeout))
+            else:
+                timeout = exchange.timeout_obj.read_timeout
+                error = ReadTimeoutError(
+                    self, exchange.url, "Read timed out. (read timeout=%s)" % timeout)
+            self._fail(conn, error, retry=exchange.response is None)
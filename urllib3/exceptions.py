@@ -132,6 +132,11 @@ class ClosedPoolError(PoolError):
     pass
 
 
+class CircuitOpenError(PoolError):
+    "Raised when a request enters a pool whose host's circuit is open."
+    pass
+
+
 class LocationValueError(ValueError, HTTPError):
     "Raised when there is something wrong with a given URL input."
     pass
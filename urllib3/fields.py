@@ -54,7 +54,8 @@ class RequestField(object):
     :param name:
         The name of this request field.
     :param data:
-        The data/value body.
+        The data/value body. This may also be a file object opened in binary
+        mode, which is read lazily by :class:`~urllib3.filepost.MultipartEncoder`.
     :param filename:
         An optional filename of the request field.
     :param headers:
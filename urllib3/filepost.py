@@ -1,8 +1,6 @@
 from __future__ import absolute_import
 import codecs
 
-from io import BytesIO
-
 from .packages import six
 from .packages.six import b
 from .fields import RequestField
@@ -63,39 +61,204 @@ def iter_fields(fields):
     return ((k, v) for k, v in fields)
 
 
-def encode_multipart_formdata(fields, boundary=None):
+def _to_bytes(data):
+    if isinstance(data, int):
+        data = str(data)  # Backwards compatibility
+
+    if isinstance(data, six.text_type):
+        return data.encode('utf-8')
+    return data
+
+
+def _remaining_size(fp):
     """
-    Encode a dictionary of ``fields`` using the multipart/form-data MIME format.
+    Return the number of bytes left to read from the file object ``fp``, or
+    ``None`` if it can't be determined without consuming it.
+    """
+    try:
+        pos = fp.tell()
+        fp.seek(0, 2)
+        end = fp.tell()
+        fp.seek(pos)
+    except (AttributeError, IOError, OSError):
+        return None
+    return end - pos
+
+
+class MultipartEncoder(object):
+    """
+    Lazily encode ``fields`` using the multipart/form-data MIME format.
+
+    Unlike :func:`encode_multipart_formdata`, the body is never built in
+    memory. The encoder is a read-only file-like object: field headers and
+    string data are rendered up front, while field data that is itself a
+    file-like object (opened in binary mode) is only read as the body is
+    consumed. This allows uploading large files without loading them.
+
+    The total size of the body is computed from the field sizes when it is
+    created and is available as :attr:`content_length`. It is ``None`` if the
+    size of a file field can't be determined, in which case the body has to be
+    sent with chunked transfer encoding.
+
+    The encoder supports ``tell()`` and ``seek()`` so that it can be rewound
+    for redirects and retries, provided its file fields are seekable.
 
     :param fields:
         Dictionary of fields or list of (key, :class:`~urllib3.fields.RequestField`).
 
     :param boundary:
         If not specified, then a random boundary will be generated using
-        :func:`mimetools.choose_boundary`.
+        :func:`choose_boundary`.
+
+    :param blocksize:
+        Size of the blocks yielded when iterating over the encoder.
     """
-    body = BytesIO()
-    if boundary is None:
-        boundary = choose_boundary()
 
-    for field in iter_field_objects(fields):
-        body.write(b('--%s\r\n' % (boundary)))
+    def __init__(self, fields, boundary=None, blocksize=16384):
+        if boundary is None:
+            boundary = choose_boundary()
+
+        self.boundary = boundary
+        self.blocksize = blocksize
+        self.content_type = str('multipart/form-data; boundary=%s' % boundary)
+
+        # Each part is a (data, start, length) tuple. For string parts,
+        # ``start`` is None; for file parts, it's the file position where the
+        # field data begins.
+        self._parts = []
+        self.is_streaming = False
+
+        for field in iter_field_objects(fields):
+            self._add_bytes(b('--%s\r\n' % (boundary)))
+            self._add_bytes(_to_bytes(field.render_headers()))
 
-        writer(body).write(field.render_headers())
-        data = field.data
+            data = field.data
+            if hasattr(data, 'read'):
+                self._add_file(data)
+            else:
+                self._add_bytes(_to_bytes(data))
 
-        if isinstance(data, int):
-            data = str(data)  # Backwards compatibility
+            self._add_bytes(b'\r\n')
 
-        if isinstance(data, six.text_type):
-            writer(body).write(data)
+        self._add_bytes(b('--%s--\r\n' % (boundary)))
+
+        lengths = [length for _data, _start, length in self._parts]
+        if None in lengths:
+            self.content_length = None
         else:
-            body.write(data)
+            self.content_length = sum(lengths)
+
+        self._index = 0
+        self._offset = 0
+        self._pos = 0
+
+    def _add_bytes(self, data):
+        if not data:
+            return
+
+        # Merge consecutive string parts to keep reads coarse.
+        if self._parts and self._parts[-1][1] is None:
+            prev = self._parts.pop()[0]
+            data = prev + data
+
+        self._parts.append((data, None, len(data)))
+
+    def _add_file(self, fp):
+        self.is_streaming = True
+        length = _remaining_size(fp)
+        # Unseekable files are read from wherever they are; rewinding them
+        # will fail.
+        start = fp.tell() if length is not None else 0
+        self._parts.append((fp, start, length))
 
-        body.write(b'\r\n')
+    def __iter__(self):
+        while True:
+            data = self.read(self.blocksize)
+            if not data:
+                break
+            yield data
 
-    body.write(b('--%s--\r\n' % (boundary)))
+    def tell(self):
+        return self._pos
 
-    content_type = str('multipart/form-data; boundary=%s' % boundary)
+    def seek(self, pos, whence=0):
+        """
+        Move to ``pos`` bytes from the beginning of the body. Only absolute
+        positioning is supported.
+        """
+        if whence != 0:
+            raise IOError("MultipartEncoder only supports absolute seeks.")
 
-    return body.getvalue(), content_type
+        self._index = 0
+        self._offset = 0
+        self._pos = 0
+
+        for data, start, length in self._parts:
+            if start is not None:
+                if length is None and pos > 0:
+                    raise IOError("Can't seek past a file field of unknown size.")
+                data.seek(start)
+
+        while pos > 0 and self._index < len(self._parts):
+            data, start, length = self._parts[self._index]
+            step = min(pos, length - self._offset)
+            if start is not None:
+                data.seek(start + self._offset + step)
+            self._advance(step, length)
+            pos -= step
+
+        return self._pos
+
+    def _advance(self, amt, length):
+        self._pos += amt
+        self._offset += amt
+        if length is not None and self._offset >= length:
+            self._index += 1
+            self._offset = 0
+
+    def read(self, amt=None):
+        """
+        Read at most ``amt`` bytes of the encoded body, or all of the
+        remaining body if ``amt`` is omitted.
+        """
+        chunks = []
+
+        while self._index < len(self._parts) and (amt is None or amt > 0):
+            data, start, length = self._parts[self._index]
+
+            if start is None:
+                end = length if amt is None else self._offset + amt
+                chunk = data[self._offset:end]
+            else:
+                to_read = -1 if length is None else length - self._offset
+                if amt is not None and (to_read < 0 or amt < to_read):
+                    to_read = amt
+                chunk = _to_bytes(data.read(to_read))
+
+                if not chunk:
+                    # The file ended early (or is of unknown size), move on.
+                    self._index += 1
+                    self._offset = 0
+                    continue
+
+            self._advance(len(chunk), length)
+            chunks.append(chunk)
+            if amt is not None:
+                amt -= len(chunk)
+
+        return b''.join(chunks)
+
+
+def encode_multipart_formdata(fields, boundary=None):
+    """
+    Encode a dictionary of ``fields`` using the multipart/form-data MIME format.
+
+    :param fields:
+        Dictionary of fields or list of (key, :class:`~urllib3.fields.RequestField`).
+
+    :param boundary:
+        If not specified, then a random boundary will be generated using
+        :func:`mimetools.choose_boundary`.
+    """
+    encoder = MultipartEncoder(fields, boundary=boundary)
+    return encoder.read(), encoder.content_type
@@ -2,14 +2,16 @@ from __future__ import absolute_import
 import collections
 import functools
 import logging
+import threading
 
-from ._collections import RecentlyUsedContainer
+from ._collections import OrderedDict, RecentlyUsedContainer
 from .connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from .connectionpool import port_by_scheme
 from .exceptions import LocationValueError, MaxRetryError, ProxySchemeUnknown
+from .packages.six.moves import queue
 from .packages.six.moves.urllib.parse import urljoin
 from .request import RequestMethods
-from .util.url import parse_url
+from .util.url import parse_url, Url
 from .util.retry import Retry
 
 
@@ -19,7 +21,7 @@ __all__ = ['PoolManager', 'ProxyManager', 'proxy_from_url']
 log = logging.getLogger(__name__)
 
 SSL_KEYWORDS = ('key_file', 'cert_file', 'cert_reqs', 'ca_certs',
-                'ssl_version', 'ca_cert_dir', 'ssl_context')
+                'ssl_version', 'ca_cert_dir', 'ssl_context', 'alpn_protocols')
 
 # All known keyword arguments that could be provided to the pool manager, its
 # pools, or the underlying connections. This is used to construct a pool key.
@@ -47,6 +49,12 @@ _key_fields = (
     'key__socks_options',  # dict
     'key_assert_hostname',  # bool or string
     'key_assert_fingerprint',  # str
+    'key_chunk_size',  # int
+    'key_fast_response_parser',  # bool
+    'key_fast_request_serializer',  # bool
+    'key_alpn_protocols',  # list of str
+    'key_hedge',  # Hedge
+    'key_circuit_breaker',  # CircuitBreaker
 )
 
 #: The namedtuple class used to construct keys for the connection pool.
@@ -54,6 +62,28 @@ _key_fields = (
 PoolKey = collections.namedtuple('PoolKey', _key_fields)
 
 
+def _key_fields_from_context(context):
+    """
+    Map the items of a request context to the fields of a pool key.
+
+    Dictionaries are turned into frozensets and lists into tuples so that the
+    key is hashable, and every name is given the ``key_`` prefix since
+    namedtuples can't have fields starting with '_'.
+    """
+    fields = {}
+    for key, value in context.items():
+        if value is not None:
+            # These are dictionaries and need to be transformed into
+            # frozensets. The socket_options and alpn_protocols keys may be
+            # lists and need to be transformed into tuples.
+            if key in ('headers', '_proxy_headers', '_socks_options'):
+                value = frozenset(value.items())
+            elif key in ('socket_options', 'alpn_protocols'):
+                value = tuple(value)
+        fields['key_' + key] = value
+    return fields
+
+
 def _default_key_normalizer(key_class, request_context):
     """
     Create a pool key out of a request context dictionary.
@@ -74,26 +104,9 @@ def _default_key_normalizer(key_class, request_context):
     :return: A namedtuple that can be used as a connection pool key.
     :rtype:  PoolKey
     """
-    # Since we mutate the dictionary, make a copy first
-    context = request_context.copy()
-    context['scheme'] = context['scheme'].lower()
-    context['host'] = context['host'].lower()
-
-    # These are both dictionaries and need to be transformed into frozensets
-    for key in ('headers', '_proxy_headers', '_socks_options'):
-        if key in context and context[key] is not None:
-            context[key] = frozenset(context[key].items())
-
-    # The socket_options key may be a list and needs to be transformed into a
-    # tuple.
-    socket_opts = context.get('socket_options')
-    if socket_opts is not None:
-        context['socket_options'] = tuple(socket_opts)
-
-    # Map the kwargs to the names in the namedtuple - this is necessary since
-    # namedtuples can't have fields starting with '_'.
-    for key in list(context.keys()):
-        context['key_' + key] = context.pop(key)
+    context = _key_fields_from_context(request_context)
+    context['key_scheme'] = context['key_scheme'].lower()
+    context['key_host'] = context['key_host'].lower()
 
     # Default to ``None`` for keys missing from the context
     for field in key_class._fields:
@@ -117,6 +130,14 @@ pool_classes_by_scheme = {
     'https': HTTPSConnectionPool,
 }
 
+# The key functions whose keys PoolManager knows how to build from parts
+# computed in advance.
+_default_key_fns = tuple(key_fn_by_scheme.values())
+
+#: Number of (scheme, host, port) triples each :class:`PoolManager` remembers
+#: the pool key of.
+POOL_KEY_CACHE_SIZE = 256
+
 
 class PoolManager(RequestMethods):
     """
@@ -131,6 +152,19 @@ class PoolManager(RequestMethods):
         Headers to include with all requests, unless other headers are given
         explicitly.
 
+    :param pool_shards:
+        Number of shards the pools are spread over, each with its own lock.
+        Threads looking up or creating pools for hosts of different shards
+        don't wait on one another, at the cost of evicting pools only
+        approximately least recently used first. See
+        :class:`urllib3._collections.RecentlyUsedContainer`.
+
+    :param close_pools_in_background:
+        If true, pools evicted to make room for a new one are closed on a
+        background thread, so that the request which needed the new pool
+        doesn't wait for the connections of another host to be shut down.
+        :meth:`clear` still closes all pools before returning.
+
     :param \\**connection_pool_kw:
         Additional parameters are used to create fresh
         :class:`urllib3.connectionpool.ConnectionPool` instances.
@@ -148,17 +182,25 @@ class PoolManager(RequestMethods):
 
     proxy = None
 
-    def __init__(self, num_pools=10, headers=None, **connection_pool_kw):
+    def __init__(self, num_pools=10, headers=None, pool_shards=1,
+                 close_pools_in_background=False, **connection_pool_kw):
         RequestMethods.__init__(self, headers)
         self.connection_pool_kw = connection_pool_kw
-        self.pools = RecentlyUsedContainer(num_pools,
-                                           dispose_func=lambda p: p.close())
+        self.num_pools = num_pools
+        self.pools = RecentlyUsedContainer(
+            num_pools, dispose_func=lambda p: p.close(), shards=pool_shards,
+            background_dispose=close_pools_in_background)
 
         # Locally set the pool classes and keys so other PoolManagers can
         # override them.
         self.pool_classes_by_scheme = pool_classes_by_scheme
         self.key_fn_by_scheme = key_fn_by_scheme.copy()
 
+        # The normalized connection_pool_kw, the part of every pool key
+        # coming from it, and pool keys by (scheme, host, port), as of the
+        # last time connection_pool_kw changed.
+        self._pool_key_state = (None, None, {})
+
     def __enter__(self):
         return self
 
@@ -217,14 +259,68 @@ class PoolManager(RequestMethods):
         if not host:
             raise LocationValueError("No host specified.")
 
-        request_context = self._merge_pool_kwargs(pool_kwargs)
-        request_context['scheme'] = scheme or 'http'
+        scheme = scheme or 'http'
         if not port:
-            port = port_by_scheme.get(request_context['scheme'].lower(), 80)
+            port = port_by_scheme.get(scheme.lower(), 80)
+
+        pool_key = self._pool_key_from_host(scheme, host, port, pool_kwargs)
+        if pool_key is not None:
+            pool = self.pools.get(pool_key)
+            if pool:
+                return pool
+
+        request_context = self._merge_pool_kwargs(pool_kwargs)
+        request_context['scheme'] = scheme
         request_context['port'] = port
         request_context['host'] = host
 
-        return self.connection_from_context(request_context)
+        if pool_key is None:
+            return self.connection_from_context(request_context)
+        return self.connection_from_pool_key(pool_key, request_context=request_context)
+
+    def _pool_key_from_host(self, scheme, host, port, pool_kwargs=None):
+        """
+        Get the pool key of a request to ``host``, without building its
+        request context, or ``None`` if ``key_fn_by_scheme`` has a custom
+        key function for ``scheme``.
+
+        The part of the key coming from ``connection_pool_kw`` is only built
+        again once its normalized items change, and the keys of requests
+        without ``pool_kwargs`` are cached until then.
+        """
+        key_fn = self.key_fn_by_scheme[scheme.lower()]
+        if not any(key_fn is fn for fn in _default_key_fns):
+            return None
+
+        # Normalizing turns the headers into frozensets, so they are compared
+        # by value and changes made to them in place are noticed too.
+        kw_fields = _key_fields_from_context(self.connection_pool_kw)
+        last_kw_fields, base, cache = self._pool_key_state
+        if kw_fields != last_kw_fields:
+            base = key_fn(dict(self.connection_pool_kw, scheme='', host=''))
+            cache = {}
+            self._pool_key_state = (kw_fields, base, cache)
+
+        if not pool_kwargs:
+            pool_key = cache.get((scheme, host, port))
+            if pool_key is None:
+                pool_key = base._replace(
+                    key_scheme=scheme.lower(), key_host=host.lower(), key_port=port)
+                if len(cache) >= POOL_KEY_CACHE_SIZE:
+                    cache.clear()
+                cache[(scheme, host, port)] = pool_key
+            return pool_key
+
+        fields = _key_fields_from_context(pool_kwargs)
+        fields['key_scheme'] = scheme.lower()
+        fields['key_host'] = host.lower()
+        fields['key_port'] = port
+        try:
+            return base._replace(**fields)
+        except ValueError:
+            # Overrides which aren't pool key fields are either dropped or an
+            # error, leave it to the key function to tell.
+            return None
 
     def connection_from_context(self, request_context):
         """
@@ -247,9 +343,16 @@ class PoolManager(RequestMethods):
         objects. At a minimum it must have the ``scheme``, ``host``, and
         ``port`` fields.
         """
-        with self.pools.lock:
+        # Looking up an existing pool doesn't wait on other threads, only
+        # creating one does.
+        pool = self.pools.get(pool_key)
+        if pool:
+            return pool
+
+        with self.pools.lock_for(pool_key):
             # If the scheme, host, or port doesn't match existing open
-            # connections, open a new ConnectionPool.
+            # connections, open a new ConnectionPool. Another thread may have
+            # done so since the lookup above.
             pool = self.pools.get(pool_key)
             if pool:
                 return pool
@@ -273,6 +376,8 @@ class PoolManager(RequestMethods):
         is provided, it is used instead. Note that if a new pool does not
         need to be created for the request, the provided ``pool_kwargs`` are
         not used.
+
+        ``url`` may also be a :class:`~urllib3.util.url.Url`.
         """
         u = parse_url(url)
         return self.connection_from_host(u.host, port=u.port, scheme=u.scheme,
@@ -306,6 +411,8 @@ class PoolManager(RequestMethods):
 
         The given ``url`` parameter must be absolute, such that an appropriate
         :class:`urllib3.connectionpool.ConnectionPool` can be chosen for it.
+        It may also be a :class:`~urllib3.util.url.Url`, which is then passed
+        along as it is rather than parsed again.
         """
         u = parse_url(url)
         conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
@@ -324,6 +431,9 @@ class PoolManager(RequestMethods):
         if not redirect_location:
             return response
 
+        if isinstance(url, Url):
+            url = url.url
+
         # Support relative URLs for redirecting.
         redirect_location = urljoin(url, redirect_location)
 
@@ -348,6 +458,150 @@ class PoolManager(RequestMethods):
         log.info("Redirecting %s -> %s", url, redirect_location)
         return self.urlopen(method, redirect_location, **kw)
 
+    def request_many(self, requests, max_workers=None, per_host_limit=None,
+                     ordered=True):
+        """
+        Make a batch of requests concurrently, on threads of this
+        :class:`PoolManager`, and iterate over their results.
+
+        :param requests:
+            An iterable of ``(method, url)`` or ``(method, url, kw)`` tuples.
+            ``kw`` is a dictionary of keyword arguments given to
+            :meth:`request`, such as ``retries``, ``timeout``, ``fields`` or
+            ``headers`` for that request alone.
+
+        :param max_workers:
+            Maximum number of threads making requests, at least 1. By default
+            there is one thread for every connection the pools kept by this
+            manager can use at a time: ``per_host_limit`` for each distinct
+            host, up to ``num_pools`` hosts.
+
+        :param per_host_limit:
+            Maximum number of requests in flight to a single host, at least 1.
+            Defaults to the ``maxsize`` of the pools, so that every connection
+            used is kept by its pool rather than discarded.
+
+        :param ordered:
+            If true, results are produced in the order of ``requests``,
+            otherwise as soon as each request completes.
+
+        :return:
+            An iterator of ``(index, result)`` pairs, where ``index`` is the
+            position of the request in ``requests`` and ``result`` either its
+            response or the exception it raised, including for a URL which
+            can't be parsed. The requests are all started before this method
+            returns.
+
+        Example::
+
+            >>> manager = PoolManager(maxsize=4)
+            >>> for i, r in manager.request_many([
+            ...         ('GET', 'http://example.com/'),
+            ...         ('GET', 'http://example.org/', {'retries': 1})]):
+            ...     print(i, r.status)
+            0 200
+            1 200
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError('max_workers must be at least 1, not %r' % (max_workers,))
+        if per_host_limit is not None and per_host_limit < 1:
+            raise ValueError('per_host_limit must be at least 1, not %r' %
+                             (per_host_limit,))
+
+        if per_host_limit is None:
+            per_host_limit = max(self.connection_pool_kw.get('maxsize', 1), 1)
+
+        results = queue.Queue()
+
+        # Pending requests by host, in the order they were given.
+        pending = OrderedDict()
+        count = 0
+        for index, item in enumerate(requests):
+            method, url = item[0], item[1]
+            kw = item[2] if len(item) > 2 else {}
+            count += 1
+            try:
+                u = parse_url(url)
+            except LocationValueError as e:
+                results.put((index, e))
+                continue
+
+            # Normalized as by connection_from_host, so that the requests
+            # to a host count against the same limit however it is written.
+            scheme = (u.scheme or 'http').lower()
+            host = (scheme, (u.host or '').lower(),
+                    u.port or port_by_scheme.get(scheme, 80))
+            pending.setdefault(host, collections.deque()).append(
+                (index, method, url, kw))
+
+        if max_workers is None:
+            max_workers = per_host_limit * min(len(pending), self.num_pools)
+        max_workers = min(max_workers, sum(len(r) for r in pending.values()))
+
+        in_flight = collections.defaultdict(int)
+        condition = threading.Condition()
+
+        def next_request():
+            # Pick the oldest request of a host with room for one more, or
+            # wait for a request to complete if all of them are busy.
+            with condition:
+                while pending:
+                    for host, host_requests in pending.items():
+                        if in_flight[host] < per_host_limit:
+                            break
+                    else:
+                        condition.wait()
+                        continue
+
+                    request = host_requests.popleft()
+                    if not host_requests:
+                        del pending[host]
+                    in_flight[host] += 1
+                    return host, request
+            return None, None
+
+        def worker():
+            while True:
+                host, request = next_request()
+                if request is None:
+                    return
+
+                index, method, url, kw = request
+                try:
+                    result = self.request(method, url, **kw)
+                except Exception as e:
+                    result = e
+
+                with condition:
+                    in_flight[host] -= 1
+                    condition.notify_all()
+                results.put((index, result))
+
+        for _ in range(max_workers):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+
+        return self._iter_results(results, count, ordered)
+
+    @staticmethod
+    def _iter_results(results, count, ordered):
+        """
+        Yield the ``count`` ``(index, result)`` pairs put in the ``results``
+        queue by :meth:`request_many`, in the order of index if ``ordered``.
+        """
+        if not ordered:
+            for _ in range(count):
+                yield results.get()
+            return
+
+        completed = {}
+        for index in range(count):
+            while index not in completed:
+                completed_index, result = results.get()
+                completed[completed_index] = result
+            yield index, completed.pop(index)
+
 
 class ProxyManager(PoolManager):
     """
@@ -431,9 +685,10 @@ class ProxyManager(PoolManager):
             # on the CONNECT to the proxy. For HTTP, we'll definitely
             # need to set 'Host' at the very least.
             headers = kw.get('headers', self.headers)
-            kw['headers'] = self._set_proxy_headers(url, headers)
+            kw['headers'] = self._set_proxy_headers(u, headers)
 
-        return super(ProxyManager, self).urlopen(method, url, redirect=redirect, **kw)
+        # Hand over the parsed url so that it isn't parsed again.
+        return super(ProxyManager, self).urlopen(method, u, redirect=redirect, **kw)
 
 
 def proxy_from_url(url, **kw):
@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from .filepost import encode_multipart_formdata
+from .filepost import MultipartEncoder
 from .packages.six.moves.urllib.parse import urlencode
 
 
@@ -123,6 +123,12 @@ class RequestMethods(object):
         be overwritten because it depends on the dynamic random boundary string
         which is used to compose the body of the request. The random boundary
         string can be explicitly set with the ``multipart_boundary`` parameter.
+
+        The encoded body can be compressed by passing ``content_encoding``
+        (e.g. ``'gzip'``), which is handed on to :meth:`urlopen`. For example::
+
+            r = http.request_encode_body('POST', url, body=payload,
+                                         content_encoding='gzip')
         """
         if headers is None:
             headers = self.headers
@@ -135,13 +141,22 @@ class RequestMethods(object):
                     "request got values for both 'fields' and 'body', can only specify one.")
 
             if encode_multipart:
-                body, content_type = encode_multipart_formdata(fields, boundary=multipart_boundary)
+                encoder = MultipartEncoder(fields, boundary=multipart_boundary)
+                body, content_type = encoder, encoder.content_type
+                if not encoder.is_streaming:
+                    body = encoder.read()
             else:
                 body, content_type = urlencode(fields), 'application/x-www-form-urlencoded'
 
             extra_kw['body'] = body
             extra_kw['headers'] = {'Content-Type': content_type}
 
+            if isinstance(body, MultipartEncoder):
+                if body.content_length is not None:
+                    extra_kw['headers']['Content-Length'] = str(body.content_length)
+                else:
+                    extra_kw['chunked'] = True
+
         extra_kw['headers'].update(headers)
         extra_kw.update(urlopen_kw)
 
@@ -73,6 +73,24 @@ def _get_decoder(mode):
     return DeflateDecoder()
 
 
+if PY3:  # Python 3
+    def _headers_from_httplib(message):
+        return HTTPHeaderDict(message.items())
+
+    def _get_httplib_header(message, name, default=None):
+        values = message.get_all(name)
+        if values is None:
+            return default
+        return ', '.join(values)
+else:  # Python 2
+    def _headers_from_httplib(message):
+        return HTTPHeaderDict.from_httplib(message)
+
+    def _get_httplib_header(message, name, default=None):
+        # httplib already joins repeated fields with ', '
+        return message.getheader(name, default)
+
+
 class HTTPResponse(io.IOBase):
     """
     HTTP Response container.
@@ -105,6 +123,10 @@ class HTTPResponse(io.IOBase):
     :param enforce_content_length:
         Enforce content length checking. Body returned by server must match
         value of Content-Length header, if present. Otherwise, raise error.
+
+    :param alpn_protocol:
+        The application protocol negotiated with ALPN on the connection the
+        response came over, if any, such as ``'http/1.1'`` or ``'h2'``.
     """
 
     CONTENT_DECODERS = ['gzip', 'deflate']
@@ -113,12 +135,19 @@ class HTTPResponse(io.IOBase):
     def __init__(self, body='', headers=None, status=0, version=0, reason=None,
                  strict=0, preload_content=True, decode_content=True,
                  original_response=None, pool=None, connection=None,
-                 retries=None, enforce_content_length=False, request_method=None):
+                 retries=None, enforce_content_length=False, request_method=None,
+                 alpn_protocol=None):
 
+        self._httplib_headers = None
         if isinstance(headers, HTTPHeaderDict):
-            self.headers = headers
+            self._headers = headers
+        elif isinstance(headers, httplib.HTTPMessage):
+            # Only converted once self.headers is accessed, until then single
+            # fields are looked up in the message directly.
+            self._headers = None
+            self._httplib_headers = headers
         else:
-            self.headers = HTTPHeaderDict(headers)
+            self._headers = HTTPHeaderDict(headers)
         self.status = status
         self.version = version
         self.reason = reason
@@ -126,6 +155,7 @@ class HTTPResponse(io.IOBase):
         self.decode_content = decode_content
         self.retries = retries
         self.enforce_content_length = enforce_content_length
+        self.alpn_protocol = alpn_protocol
 
         self._decoder = None
         self._body = None
@@ -145,7 +175,7 @@ class HTTPResponse(io.IOBase):
         # Are we using the chunked-style of transfer encoding?
         self.chunked = False
         self.chunk_left = None
-        tr_enc = self.headers.get('transfer-encoding', '').lower()
+        tr_enc = self._get_header('transfer-encoding', '').lower()
         # Don't incur the penalty of creating a list and then discarding it
         encodings = (enc.strip() for enc in tr_enc.split(","))
         if "chunked" in encodings:
@@ -158,6 +188,27 @@ class HTTPResponse(io.IOBase):
         if preload_content and not self._body:
             self._body = self.read(decode_content=decode_content)
 
+    @property
+    def headers(self):
+        if self._headers is None:
+            self._headers = _headers_from_httplib(self._httplib_headers)
+            self._httplib_headers = None
+        return self._headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = value
+        self._httplib_headers = None
+
+    def _get_header(self, name, default=None):
+        """
+        Look up a single, merged header value without converting the headers
+        of an httplib message.
+        """
+        if self._headers is None:
+            return _get_httplib_header(self._httplib_headers, name, default)
+        return self._headers.get(name, default)
+
     def get_redirect_location(self):
         """
         Should we redirect and where to?
@@ -167,7 +218,7 @@ class HTTPResponse(io.IOBase):
             location. ``False`` if not a redirect status code.
         """
         if self.status in self.REDIRECT_STATUSES:
-            return self.headers.get('location')
+            return self._get_header('location')
 
         return False
 
@@ -203,7 +254,7 @@ class HTTPResponse(io.IOBase):
         """
         Set initial length value for Response content if available.
         """
-        length = self.headers.get('content-length')
+        length = self._get_header('content-length')
 
         if length is not None and self.chunked:
             # This Response will fail with an IncompleteRead if it can't be
@@ -253,7 +304,7 @@ class HTTPResponse(io.IOBase):
         """
         # Note: content-encoding value should be case-insensitive, per RFC 7230
         # Section 3.2
-        content_encoding = self.headers.get('content-encoding', '').lower()
+        content_encoding = self._get_header('content-encoding', '').lower()
         if self._decoder is None and content_encoding in self.CONTENT_DECODERS:
             self._decoder = _get_decoder(content_encoding)
 
@@ -265,7 +316,7 @@ class HTTPResponse(io.IOBase):
             if decode_content and self._decoder:
                 data = self._decoder.decompress(data)
         except (IOError, zlib.error) as e:
-            content_encoding = self.headers.get('content-encoding', '').lower()
+            content_encoding = self._get_header('content-encoding', '').lower()
             raise DecodeError(
                 "Received response with content-encoding: %s, but "
                 "failed to decode it." % content_encoding, e)
@@ -446,14 +497,15 @@ class HTTPResponse(io.IOBase):
 
         Remaining parameters are passed to the HTTPResponse constructor, along
         with ``original_response=r``.
+
+        The headers of an :class:`httplib.HTTPMessage` are only converted into
+        an :class:`~urllib3._collections.HTTPHeaderDict` when
+        :attr:`HTTPResponse.headers` is first accessed.
         """
         headers = r.msg
 
-        if not isinstance(headers, HTTPHeaderDict):
-            if PY3:  # Python 3
-                headers = HTTPHeaderDict(headers.items())
-            else:  # Python 2
-                headers = HTTPHeaderDict.from_httplib(headers)
+        if not isinstance(headers, (HTTPHeaderDict, httplib.HTTPMessage)):
+            headers = _headers_from_httplib(headers)
 
         # HTTPResponse objects in Python 3 don't have a .strict attribute
         strict = getattr(r, 'strict', 0)
@@ -472,7 +524,7 @@ class HTTPResponse(io.IOBase):
         return self.headers
 
     def getheader(self, name, default=None):
-        return self.headers.get(name, default)
+        return self._get_header(name, default)
 
     # Backwards compatibility for http.cookiejar
     def info(self):
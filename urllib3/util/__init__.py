@@ -18,10 +18,15 @@ from .timeout import (
     Timeout,
 )
 
-from .retry import Retry
+from .retry import Retry, RetryBudget
+from .circuit import CircuitBreaker
+from .hedge import Hedge
 from .url import (
+    clear_parse_url_cache,
     get_host,
     parse_url,
+    parse_url_cache_info,
+    set_parse_url_cache_size,
     split_first,
     Url,
 )
@@ -35,18 +40,24 @@ __all__ = (
     'IS_PYOPENSSL',
     'IS_SECURETRANSPORT',
     'SSLContext',
+    'CircuitBreaker',
+    'Hedge',
     'Retry',
+    'RetryBudget',
     'Timeout',
     'Url',
     'assert_fingerprint',
+    'clear_parse_url_cache',
     'current_time',
     'is_connection_dropped',
     'is_fp_closed',
     'get_host',
     'parse_url',
+    'parse_url_cache_info',
     'make_headers',
     'resolve_cert_reqs',
     'resolve_ssl_version',
+    'set_parse_url_cache_size',
     'split_first',
     'ssl_wrap_socket',
     'wait_for_read',
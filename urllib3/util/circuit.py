@@ -0,0 +1,128 @@
+from __future__ import absolute_import
+import logging
+import threading
+
+from .._collections import RecentlyUsedContainer
+from .timeout import current_time
+
+
+log = logging.getLogger(__name__)
+
+
+class _Circuit(object):
+    """ The state of the circuit of a single host. """
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+
+
+class CircuitBreaker(object):
+    """ Circuit breaker configuration and state.
+
+    Against a host that is down, every request otherwise waits for the
+    connect timeout as many times as it is retried. A circuit breaker keeps
+    track of the consecutive connection and read failures of each host, and
+    once there are ``failure_threshold`` of them, it opens the circuit of the
+    host: requests to it fail fast with
+    :class:`~urllib3.exceptions.CircuitOpenError` instead.
+
+    After ``recovery_timeout`` seconds, the circuit is half-open and a
+    single request is let through as a probe. If it gets a response the
+    circuit is closed again, if it fails the circuit opens for another
+    ``recovery_timeout``. Should the probe end without either, another one is
+    let through after ``recovery_timeout``.
+
+    Hosts are told apart by their pool's scheme, host and port, so a circuit
+    breaker can be shared by the pools of a
+    :class:`~urllib3.poolmanager.PoolManager`::
+
+        breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30)
+        http = PoolManager(circuit_breaker=breaker)
+        response = http.request('GET', 'http://example.com/')
+
+    The failures counted are those :class:`~urllib3.util.retry.Retry`
+    considers connection or read errors, whether or not the request is
+    retried. Responses count as successes whatever their status.
+
+    :param int failure_threshold:
+        How many consecutive failures open the circuit of a host.
+
+    :param float recovery_timeout:
+        Seconds for which the circuit stays open before letting a probe
+        through.
+
+    :param int max_hosts:
+        How many hosts with failures are kept track of. Only hosts whose last
+        request failed are, and once there are more of them, those which
+        failed least recently are forgotten.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30, max_hosts=1000):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._circuits = RecentlyUsedContainer(max_hosts)
+        self._lock = threading.Lock()
+
+    def _get_circuit(self, pool, create=False):
+        key = (pool.scheme, pool.host, pool.port)
+        circuit = self._circuits.get(key)
+        if circuit is None and create:
+            circuit = self._circuits[key] = _Circuit()
+        return circuit
+
+    def allow_request(self, pool):
+        """ Whether a request may be made with ``pool``.
+
+        This lets a probe through when the circuit is half-open, so it must
+        only be called right before making the request.
+        """
+        with self._lock:
+            circuit = self._get_circuit(pool)
+            if circuit is None or circuit.opened_at is None:
+                return True
+
+            now = current_time()
+            if now - circuit.opened_at < self.recovery_timeout:
+                return False
+
+            # Half-open, only let the next probe through after another
+            # recovery_timeout.
+            circuit.opened_at = now
+            log.debug("Circuit half-open for %s://%s:%s, probing",
+                      pool.scheme, pool.host, pool.port)
+            return True
+
+    def record_success(self, pool):
+        """ Close the circuit of the host of ``pool``, after a response. """
+        with self._lock:
+            circuit = self._get_circuit(pool)
+            if circuit is None:
+                return
+            if circuit.opened_at is not None:
+                log.info("Circuit closed for %s://%s:%s",
+                         pool.scheme, pool.host, pool.port)
+            # A closed circuit without failures is the same as none at all.
+            del self._circuits[(pool.scheme, pool.host, pool.port)]
+
+    def record_failure(self, pool):
+        """ Count a connection or read failure of the host of ``pool``. """
+        with self._lock:
+            circuit = self._get_circuit(pool, create=True)
+            circuit.failures += 1
+            if circuit.opened_at is not None or circuit.failures >= self.failure_threshold:
+                if circuit.opened_at is None:
+                    log.warning("Circuit opened for %s://%s:%s after %d failures",
+                                pool.scheme, pool.host, pool.port, circuit.failures)
+                circuit.opened_at = current_time()
+
+    def is_open(self, pool):
+        """ Whether the circuit of the host of ``pool`` is open or half-open. """
+        with self._lock:
+            circuit = self._get_circuit(pool)
+            return circuit is not None and circuit.opened_at is not None
+
+    def __repr__(self):
+        return ('{cls.__name__}(failure_threshold={self.failure_threshold}, '
+                'recovery_timeout={self.recovery_timeout})').format(cls=type(self), self=self)
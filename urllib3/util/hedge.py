@@ -0,0 +1,93 @@
+from __future__ import absolute_import
+import math
+
+from ..packages import six
+from .retry import Retry
+
+
+class Hedge(object):
+    """ Hedging configuration.
+
+    A hedged request is sent again on another connection when its response
+    takes longer than most, and whichever response comes first is used. This
+    cuts the tail latency due to the occasional slow server or connection, at
+    the cost of a few extra requests.
+
+    Hedging can be enabled for a pool::
+
+        hedge = Hedge(percentile=95)
+        http = PoolManager(hedge=hedge)
+        response = http.request('GET', 'http://example.com/')
+
+    Or per-request (which overrides the default for the pool)::
+
+        response = http.request('GET', 'http://example.com/', hedge=Hedge(delay=0.5))
+
+    The delay before sending a request again is the ``percentile`` of the
+    response times recently seen by the pool, or ``delay`` until there are
+    ``min_samples`` of them. A response time is how long the request took
+    until its response headers came in, retries and redirects included.
+
+    Of the attempts still going on when one gets its response, the responses
+    are discarded and their connections closed.
+
+    :param float delay:
+        Seconds to wait before sending a request again while too few response
+        times are known, or ``None`` not to until then.
+
+    :param float percentile:
+        The percentile of the recent response times after which to send a
+        request again, between 0 and 100.
+
+    :param int min_samples:
+        How many response times are needed before using ``percentile``.
+
+    :param int sample_size:
+        How many of the latest response times are kept by each pool.
+
+    :param int max_hedges:
+        How many more times a request may be sent, each after a further
+        delay.
+
+    :param iterable method_whitelist:
+        Set of uppercased HTTP method verbs that may be hedged, as they may be
+        sent more than once with the same result. By default, those of
+        :attr:`Retry.DEFAULT_METHOD_WHITELIST`. Requests with a file-like or
+        iterable body are never hedged, as it can only be sent once.
+    """
+
+    def __init__(self, delay=None, percentile=95, min_samples=20, sample_size=100,
+                 max_hedges=1, method_whitelist=Retry.DEFAULT_METHOD_WHITELIST):
+        if not 0 <= percentile <= 100:
+            raise ValueError('percentile must be between 0 and 100, not %r' % percentile)
+
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = max(min_samples, 1)
+        self.sample_size = sample_size
+        self.max_hedges = max_hedges
+        self.method_whitelist = method_whitelist
+
+    def is_hedged(self, method, body=None):
+        """ Whether a request with this ``method`` and ``body`` may be hedged.
+        """
+        if self.max_hedges < 1:
+            return False
+        if method.upper() not in self.method_whitelist:
+            return False
+        return body is None or isinstance(body, (six.binary_type, six.text_type))
+
+    def get_delay(self, response_times):
+        """ Seconds to wait before sending a request again, given the recent
+        ``response_times``, or ``None`` not to.
+        """
+        if len(response_times) < self.min_samples:
+            return self.delay
+
+        ordered = sorted(response_times)
+        index = int(math.ceil(self.percentile / 100.0 * len(ordered))) - 1
+        return ordered[max(index, 0)]
+
+    def __repr__(self):
+        return ('{cls.__name__}(delay={self.delay}, percentile={self.percentile}, '
+                'max_hedges={self.max_hedges})').format(cls=type(self), self=self)
@@ -1,12 +1,16 @@
 from __future__ import absolute_import
 from base64 import b64encode
+import zlib
 
-from ..packages.six import b, integer_types
+from ..packages.six import b, integer_types, string_types, binary_type, text_type
 from ..exceptions import UnrewindableBodyError
 
 ACCEPT_ENCODING = 'gzip,deflate'
 _FAILEDTELL = object()
 
+#: Size of the blocks read from file-like request bodies while compressing.
+BODY_ENCODE_BLOCKSIZE = 16384
+
 
 def make_headers(keep_alive=None, accept_encoding=None, user_agent=None,
                  basic_auth=None, proxy_basic_auth=None, disable_cache=None):
@@ -116,3 +120,95 @@ def rewind_body(body, body_pos):
     else:
         raise ValueError("body_pos must be of type integer, "
                          "instead it was %s." % type(body_pos))
+
+
+class DeflateEncoder(object):
+
+    def __init__(self):
+        self._obj = zlib.compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class GzipEncoder(DeflateEncoder):
+
+    def __init__(self):
+        self._obj = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED,
+                                     16 + zlib.MAX_WBITS)
+
+
+#: Maps a ``Content-Encoding`` value to the class used to compress request
+#: bodies with it. Additional codecs can be registered by adding an entry whose
+#: value is a callable returning an object with ``compress(data)`` and
+#: ``flush()`` methods, like :class:`zlib.Compress`.
+BODY_ENCODERS = {
+    'gzip': GzipEncoder,
+    'deflate': DeflateEncoder,
+}
+
+
+def _get_body_encoder(content_encoding):
+    try:
+        encoder_cls = BODY_ENCODERS[content_encoding.lower()]
+    except KeyError:
+        raise ValueError("Unsupported request content encoding: %r" % content_encoding)
+    return encoder_cls()
+
+
+def _to_bytes(data):
+    if isinstance(data, text_type):
+        return data.encode('utf-8')
+    return data
+
+
+def _iter_body_blocks(body):
+    read = getattr(body, 'read', None)
+    if read is not None:
+        while True:
+            block = read(BODY_ENCODE_BLOCKSIZE)
+            if not block:
+                break
+            yield _to_bytes(block)
+    else:
+        for block in body:
+            if block:
+                yield _to_bytes(block)
+
+
+def _iter_encoded_body(encoder, body):
+    for block in _iter_body_blocks(body):
+        data = encoder.compress(block)
+        if data:
+            yield data
+
+    data = encoder.flush()
+    if data:
+        yield data
+
+
+def encode_body(body, content_encoding):
+    """
+    Compress a request body with the codec registered for ``content_encoding``
+    in :data:`BODY_ENCODERS`.
+
+    String bodies are compressed at once and returned as bytes. File-like
+    objects and other iterables are compressed lazily: a generator of
+    compressed blocks is returned, suitable for sending with chunked transfer
+    encoding. Text is encoded as UTF-8 before compressing.
+
+    :param body:
+        A string, file-like object or iterable of strings.
+
+    :param content_encoding:
+        The name of the codec to use, such as ``'gzip'`` or ``'deflate'``.
+    """
+    encoder = _get_body_encoder(content_encoding)
+
+    if isinstance(body, string_types + (binary_type,)):
+        return encoder.compress(_to_bytes(body)) + encoder.flush()
+
+    return _iter_encoded_body(encoder, body)
@@ -1,6 +1,8 @@
 from __future__ import absolute_import
 import time
 import logging
+import random
+import threading
 from collections import namedtuple
 from itertools import takewhile
 import email
@@ -24,6 +26,62 @@ RequestHistory = namedtuple('RequestHistory', ["method", "url", "error",
                                                "status", "redirect_location"])
 
 
+class RetryBudget(object):
+    """ A budget of retries shared across requests.
+
+    :class:`Retry` bounds the retries of a single request, but when a server
+    is struggling every request retries, multiplying the load on it. A
+    budget bounds the retries of all the requests using it: each retry
+    spends a token, and each request which gets its response earns back a
+    fraction of one. Once the budget is spent, requests give up instead of
+    retrying until enough of them succeed again.
+
+    A budget is shared by the :class:`Retry` objects it is given to, so it
+    can be attached to a pool or a :class:`~urllib3.poolmanager.PoolManager`
+    through its default retries::
+
+        budget = RetryBudget(max_tokens=10, token_ratio=0.1)
+        http = PoolManager(retries=Retry(3, budget=budget))
+
+    :param float max_tokens:
+        How many tokens the budget holds, and starts with. This is how many
+        retries may happen in a row before requests are allowed to fail.
+
+    :param float token_ratio:
+        The fraction of a token earned back for each request which gets its
+        response. With ``0.1``, about one retry per ten requests is allowed
+        in the long run.
+    """
+
+    def __init__(self, max_tokens=10, token_ratio=0.1):
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def withdraw(self):
+        """ Spend a token on a retry.
+
+        :return: ``False`` if the budget is spent, ``True`` otherwise.
+        """
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def deposit(self):
+        """ Earn back ``token_ratio`` of a token for a request which got its
+        response.
+        """
+        with self._lock:
+            self.tokens = min(self.tokens + self.token_ratio, self.max_tokens)
+
+    def __repr__(self):
+        return ('{cls.__name__}(tokens={self.tokens}, max_tokens={self.max_tokens}, '
+                'token_ratio={self.token_ratio})').format(cls=type(self), self=self)
+
+
 class Retry(object):
     """ Retry configuration.
 
@@ -122,6 +180,25 @@ class Retry(object):
 
         By default, backoff is disabled (set to 0).
 
+    :param str backoff_jitter:
+        How to randomize the backoff, so that clients which failed together
+        don't all retry together. One of:
+
+        - ``'full'``: sleep for a random time between 0 and the backoff.
+        - ``'equal'``: sleep for half the backoff, plus a random time up to
+          the other half.
+        - ``'decorrelated'``: sleep for a random time between
+          ``backoff_factor`` and three times the previous sleep, growing
+          independently of the number of retries.
+
+        Sleeps are never longer than :attr:`Retry.BACKOFF_MAX`. By default,
+        the backoff isn't randomized (set to ``None``).
+
+    :param rng:
+        The :class:`random.Random` instance with which to randomize the
+        backoff, for instance a seeded one to make it deterministic. By
+        default, the functions of the :mod:`random` module are used.
+
     :param bool raise_on_redirect: Whether, if the number of redirects is
         exhausted, to raise a MaxRetryError, or to return a response with a
         response code in the 3xx range.
@@ -139,6 +216,13 @@ class Retry(object):
         Whether to respect Retry-After header on status codes defined as
         :attr:`Retry.RETRY_AFTER_STATUS_CODES` or not.
 
+    :param budget:
+        A :class:`RetryBudget` which every retry other than a redirect must
+        spend a token from, shared with the copies of this object. Once it
+        is spent, :meth:`increment` raises a
+        :class:`~urllib3.exceptions.MaxRetryError` as if retries were
+        exhausted.
+
     """
 
     DEFAULT_METHOD_WHITELIST = frozenset([
@@ -149,10 +233,14 @@ class Retry(object):
     #: Maximum backoff time.
     BACKOFF_MAX = 120
 
+    #: Accepted values of ``backoff_jitter``.
+    BACKOFF_JITTERS = frozenset(['full', 'equal', 'decorrelated'])
+
     def __init__(self, total=10, connect=None, read=None, redirect=None, status=None,
                  method_whitelist=DEFAULT_METHOD_WHITELIST, status_forcelist=None,
                  backoff_factor=0, raise_on_redirect=True, raise_on_status=True,
-                 history=None, respect_retry_after_header=True):
+                 history=None, respect_retry_after_header=True, budget=None,
+                 backoff_jitter=None, rng=None):
 
         self.total = total
         self.connect = connect
@@ -171,6 +259,18 @@ class Retry(object):
         self.raise_on_status = raise_on_status
         self.history = history or tuple()
         self.respect_retry_after_header = respect_retry_after_header
+        self.budget = budget
+
+        if backoff_jitter is not None and backoff_jitter not in self.BACKOFF_JITTERS:
+            raise ValueError('Invalid backoff_jitter %r, must be one of %s' % (
+                backoff_jitter, ', '.join(sorted(self.BACKOFF_JITTERS))))
+        self.backoff_jitter = backoff_jitter
+        self.rng = rng
+
+        # Randomized backoffs are drawn once per Retry object, and the
+        # decorrelated one grows from the previous Retry object's.
+        self._backoff_time = None
+        self._previous_backoff_time = None
 
     def new(self, **kw):
         params = dict(
@@ -182,9 +282,14 @@ class Retry(object):
             raise_on_redirect=self.raise_on_redirect,
             raise_on_status=self.raise_on_status,
             history=self.history,
+            budget=self.budget,
+            backoff_jitter=self.backoff_jitter,
+            rng=self.rng,
         )
         params.update(kw)
-        return type(self)(**params)
+        new_retry = type(self)(**params)
+        new_retry._previous_backoff_time = self._backoff_time
+        return new_retry
 
     @classmethod
     def from_int(cls, retries, redirect=True, default=None):
@@ -211,8 +316,29 @@ class Retry(object):
         if consecutive_errors_len <= 1:
             return 0
 
-        backoff_value = self.backoff_factor * (2 ** (consecutive_errors_len - 1))
-        return min(self.BACKOFF_MAX, backoff_value)
+        if self.backoff_jitter is None:
+            backoff_value = self.backoff_factor * (2 ** (consecutive_errors_len - 1))
+            return min(self.BACKOFF_MAX, backoff_value)
+
+        if self._backoff_time is None:
+            self._backoff_time = self._get_jittered_backoff_time(consecutive_errors_len)
+        return self._backoff_time
+
+    def _get_jittered_backoff_time(self, consecutive_errors_len):
+        rng = self.rng or random
+
+        if self.backoff_jitter == 'decorrelated':
+            previous = self.backoff_factor
+            if consecutive_errors_len > 2 and self._previous_backoff_time:
+                previous = max(previous, self._previous_backoff_time)
+            return min(self.BACKOFF_MAX, rng.uniform(self.backoff_factor, previous * 3))
+
+        backoff_value = min(self.BACKOFF_MAX,
+                            self.backoff_factor * (2 ** (consecutive_errors_len - 1)))
+        if self.backoff_jitter == 'full':
+            return rng.uniform(0, backoff_value)
+        # Equal jitter
+        return backoff_value / 2.0 + rng.uniform(0, backoff_value / 2.0)
 
     def parse_retry_after(self, retry_after):
         # Whitespace: https://tools.ietf.org/html/rfc7230#section-3.2.4
@@ -387,6 +513,10 @@ class Retry(object):
         if new_retry.is_exhausted():
             raise MaxRetryError(_pool, url, error or ResponseError(cause))
 
+        if self.budget is not None and not redirect_location and not self.budget.withdraw():
+            log.debug("Retry budget exhausted for (url='%s'): %r", url, self.budget)
+            raise MaxRetryError(_pool, url, error or ResponseError(cause))
+
         log.debug("Incremented Retry for (url='%s'): %r", url, new_retry)
 
         return new_retry
@@ -217,7 +217,7 @@ def resolve_ssl_version(candidate):
 
 
 def create_urllib3_context(ssl_version=None, cert_reqs=None,
-                           options=None, ciphers=None):
+                           options=None, ciphers=None, alpn_protocols=None):
     """All arguments have the same meaning as ``ssl_wrap_socket``.
 
     By default, this function does a lot of the same work that
@@ -247,6 +247,9 @@ def create_urllib3_context(ssl_version=None, cert_reqs=None,
         ``ssl.OP_NO_SSLv3``, ``ssl.OP_NO_COMPRESSION``.
     :param ciphers:
         Which cipher suites to allow the server to select.
+    :param alpn_protocols:
+        The application protocols to offer with ALPN, such as
+        ``['h2', 'http/1.1']``, in order of preference.
     :returns:
         Constructed SSLContext object with specified options
     :rtype: SSLContext
@@ -276,13 +279,47 @@ def create_urllib3_context(ssl_version=None, cert_reqs=None,
         # We do our own verification, including fingerprints and alternative
         # hostnames. So disable it here
         context.check_hostname = False
+
+    if alpn_protocols:
+        _set_alpn_protocols(context, alpn_protocols)
     return context
 
 
+def _set_alpn_protocols(context, alpn_protocols):
+    """
+    Offer ``alpn_protocols`` on ``context``, if ALPN is supported: it needs
+    Python 2.7.10 or 3.5 built against OpenSSL 1.0.2, or one of the contrib
+    contexts. Otherwise no protocol is negotiated.
+    """
+    set_alpn_protocols = getattr(context, 'set_alpn_protocols', None)
+    if set_alpn_protocols is None:  # Platform-specific: Python 2.6 - 2.7.9, 3.4
+        return
+    try:
+        set_alpn_protocols(list(alpn_protocols))
+    except (AttributeError, NotImplementedError):
+        # Platform-specific: pyOpenSSL 0.14, or OpenSSL older than 1.0.2
+        pass
+
+
+def selected_alpn_protocol(sock):
+    """
+    Return the protocol negotiated with ALPN on the TLS socket ``sock``, or
+    None if there was none.
+    """
+    selected = getattr(sock, 'selected_alpn_protocol', None)
+    if selected is None:  # Platform-specific: Python 2.6 - 2.7.9, 3.4
+        return None
+    try:
+        return selected()
+    except (AttributeError, NotImplementedError):
+        # Platform-specific: pyOpenSSL 0.14, or OpenSSL older than 1.0.2
+        return None
+
+
 def ssl_wrap_socket(sock, keyfile=None, certfile=None, cert_reqs=None,
                     ca_certs=None, server_hostname=None,
                     ssl_version=None, ciphers=None, ssl_context=None,
-                    ca_cert_dir=None):
+                    ca_cert_dir=None, alpn_protocols=None):
     """
     All arguments except for server_hostname, ssl_context, and ca_cert_dir have
     the same meaning as they do when using :func:`ssl.wrap_socket`.
@@ -299,6 +336,10 @@ def ssl_wrap_socket(sock, keyfile=None, certfile=None, cert_reqs=None,
         A directory containing CA certificates in multiple separate files, as
         supported by OpenSSL's -CApath flag or the capath argument to
         SSLContext.load_verify_locations().
+    :param alpn_protocols:
+        The application protocols to offer with ALPN, in order of preference.
+        They're only set on the context created here: ALPN must be configured
+        on an ``ssl_context`` that is passed in, which is left as it is.
     """
     context = ssl_context
     if context is None:
@@ -306,7 +347,8 @@ def ssl_wrap_socket(sock, keyfile=None, certfile=None, cert_reqs=None,
         # used by urllib3 itself. We should consider deprecating and removing
         # this code.
         context = create_urllib3_context(ssl_version, cert_reqs,
-                                         ciphers=ciphers)
+                                         ciphers=ciphers,
+                                         alpn_protocols=alpn_protocols)
 
     if ca_certs or ca_cert_dir:
         try:
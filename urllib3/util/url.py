@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 from collections import namedtuple
 
+from .._collections import RecentlyUsedContainer
 from ..exceptions import LocationParseError
 
 
@@ -10,6 +11,16 @@ url_attrs = ['scheme', 'auth', 'host', 'port', 'path', 'query', 'fragment']
 # urllib3 infers URLs without a scheme (None) to be http.
 NORMALIZABLE_SCHEMES = ('http', 'https', None)
 
+#: Most distinct URLs whose parsed form is kept by :func:`parse_url`, see
+#: :func:`set_parse_url_cache_size` to change it.
+PARSE_URL_CACHE_SIZE = 4096
+
+#: Statistics of the :func:`parse_url` cache, see :func:`parse_url_cache_info`.
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_parse_url_cache = RecentlyUsedContainer(PARSE_URL_CACHE_SIZE)
+_parse_url_stats = {'hits': 0, 'misses': 0}
+
 
 class Url(namedtuple('Url', url_attrs)):
     """
@@ -144,8 +155,33 @@ def parse_url(url):
         Url(scheme=None, host='google.com', port=80, path=None, ...)
         >>> parse_url('/foo?bar')
         Url(scheme=None, host=None, port=None, path='/foo', query='bar', ...)
+
+    The results for the last :data:`PARSE_URL_CACHE_SIZE` distinct urls are
+    kept, so parsing the same url again is a lookup which doesn't wait on
+    other threads. :class:`.Url` is immutable, which makes sharing them safe.
+
+    A :class:`.Url` is returned as it is, so functions taking a url can be
+    handed one that was parsed already.
     """
+    if isinstance(url, Url):
+        return url
 
+    # Equal str and unicode urls on Python 2 must not share a result.
+    key = (type(url), url)
+    cache = _parse_url_cache
+    parsed = cache.get(key)
+    if parsed is not None:
+        _parse_url_stats['hits'] += 1
+        return parsed
+
+    _parse_url_stats['misses'] += 1
+    # Urls that fail to parse aren't cached, they raise every time.
+    parsed = _parse_url(url)
+    cache[key] = parsed
+    return parsed
+
+
+def _parse_url(url):
     # While this code has overlap with stdlib's urlparse, it is much
     # simplified for our needs and less annoying.
     # Additionally, this implementations does silly things to be optimal
@@ -222,9 +258,42 @@ def parse_url(url):
     return Url(scheme, auth, host, port, path, query, fragment)
 
 
+def parse_url_cache_info():
+    """
+    Return a :class:`CacheInfo` with the number of :func:`parse_url` calls
+    answered from its cache (``hits``) and parsed anew (``misses``), and the
+    size of the cache. The counts are only approximate while several threads
+    are parsing urls, as they are kept without a lock.
+    """
+    return CacheInfo(_parse_url_stats['hits'], _parse_url_stats['misses'],
+                     PARSE_URL_CACHE_SIZE, len(_parse_url_cache))
+
+
+def clear_parse_url_cache():
+    """
+    Empty the :func:`parse_url` cache and reset its statistics.
+    """
+    _parse_url_cache.clear()
+    _parse_url_stats['hits'] = _parse_url_stats['misses'] = 0
+
+
+def set_parse_url_cache_size(maxsize):
+    """
+    Keep the results of :func:`parse_url` for the last ``maxsize`` distinct
+    urls, for instance to cover every endpoint of a client talking to many.
+    The cache is emptied and its statistics reset. ``0`` disables it.
+    """
+    global _parse_url_cache, PARSE_URL_CACHE_SIZE
+    PARSE_URL_CACHE_SIZE = maxsize
+    _parse_url_cache = RecentlyUsedContainer(maxsize)
+    _parse_url_stats['hits'] = _parse_url_stats['misses'] = 0
+
+
 def get_host(url):
     """
     Deprecated. Use :func:`parse_url` instead.
+
+    Goes through the :func:`parse_url` cache, too.
     """
     p = parse_url(url)
     return p.scheme or 'http', p.hostname, p.port